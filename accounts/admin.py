@@ -1,10 +1,23 @@
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from search.admin import IndexedSearchMixin
+from seminary_management.admin_base import AnnotatedModelAdmin
+
+from .forms import UserImportForm
+from .provisioning import ProvisioningError, provision_users, read_rows
 
 User = get_user_model()
 
+# Tiến trình băm mật khẩu khi nhập từ admin: request web không chiếm hết CPU
+# của máy chủ (lệnh import_users mặc định dùng mọi CPU)
+IMPORT_WORKERS = 2
+
 
 class BaseUserCreationForm(forms.ModelForm):
     """Base form for creating users with profile"""
@@ -18,24 +31,24 @@ class BaseUserCreationForm(forms.ModelForm):
 
     def create_user(self, user_type):
         """Create user with given type"""
-        user = User.objects.create_user(
+        # Ảnh đại diện được gán trước khi lưu để chỉ ghi một lần
+        return User.objects.create_user(
             username=self.cleaned_data["username"],
             first_name=self.cleaned_data["first_name"],
             last_name=self.cleaned_data["last_name"],
             email=self.cleaned_data["email"],
             password=self.cleaned_data["password"],
             user_type=user_type,
+            avatar=self.cleaned_data.get("avatar"),
         )
-        # Set avatar if provided
-        if self.cleaned_data.get("avatar"):
-            user.avatar = self.cleaned_data["avatar"]
-            user.save()
-        return user
 
 
-class BaseProfileAdmin(admin.ModelAdmin):
+class BaseProfileAdmin(AnnotatedModelAdmin):
     """Base admin for profile models"""
 
+    list_select_related = ("user",)
+    str_select_related = ("user",)
+
     def get_readonly_fields(self, request, obj=None):
         readonly = list(self.readonly_fields) if self.readonly_fields else []
         if obj:  # editing an existing object
@@ -57,7 +70,7 @@ class BaseProfileAdmin(admin.ModelAdmin):
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(IndexedSearchMixin, UserAdmin):
     # Fields to display in the admin list view
     list_display = (
         "username",
@@ -74,6 +87,7 @@ class CustomUserAdmin(UserAdmin):
 
     # Search fields
     search_fields = ("username", "first_name", "last_name", "email")
+    indexed_search = (("pk", "accounts.User"),)
 
     # Fields to display in the admin form
     fieldsets = UserAdmin.fieldsets + (
@@ -90,3 +104,48 @@ class CustomUserAdmin(UserAdmin):
             {"fields": ("user_type", "phone", "address", "date_of_birth", "avatar")},
         ),
     )
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="accounts_user_import",
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Tạo hàng loạt tài khoản chủng sinh và giáo viên từ tệp CSV/XLSX"""
+        if not (
+            self.has_add_permission(request)
+            and request.user.has_perm("students.add_student")
+            and request.user.has_perm("teachers.add_teacher")
+        ):
+            raise PermissionDenied
+
+        form = UserImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                result = provision_users(
+                    read_rows(upload, upload.name), workers=IMPORT_WORKERS
+                )
+            except ProvisioningError as error:
+                form.add_error("file", str(error))
+            else:
+                self.message_user(
+                    request,
+                    f"Đã tạo {result.created} tài khoản, "
+                    f"bỏ qua {len(result.errors)} dòng lỗi.",
+                    messages.WARNING if result.errors else messages.SUCCESS,
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Nhập tài khoản từ tệp",
+            "form": form,
+            "result": result,
+        }
+        return TemplateResponse(request, "admin/accounts/user/import.html", context)
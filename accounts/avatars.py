@@ -0,0 +1,167 @@
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import User
+from .profiles import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# Kích thước (px, ảnh vuông) và định dạng của các bản thu nhỏ
+SIZES = (64, 256)
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+VARIANTS_DIR = "avatars/variants"
+# Tùy chọn khi mã hóa lại ảnh gốc (định dạng khác dùng mặc định của Pillow)
+ORIGINAL_OPTIONS = {"JPEG": {"quality": 90}, "WEBP": {"quality": 90}}
+
+# Một luồng nền cho mỗi tiến trình web: ảnh được xử lý sau khi trả lời request.
+# Việc còn chờ bị mất khi tiến trình khởi động lại; lệnh process_avatars xử lý nốt.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="avatars")
+
+
+class AvatarError(Exception):
+    """Tệp ảnh đại diện không đọc được"""
+
+
+def strip_metadata(data):
+    """
+    Re-encode an uploaded image in its own format without EXIF (GPS,
+    camera) or other metadata, rotated according to its EXIF orientation
+    first. The original is served until the variants exist, so it must not
+    carry what the variants leave out.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, **ORIGINAL_OPTIONS.get(image_format, {}))
+    except (
+        UnidentifiedImageError,
+        Image.DecompressionBombError,
+        OSError,
+        ValueError,
+    ) as error:
+        raise AvatarError(str(error)) from error
+    return buffer.getvalue()
+
+
+def render_variants(data):
+    """
+    Decode an uploaded image once and render every size in every format.
+
+    The image is rotated according to its EXIF orientation, flattened onto
+    white and center-cropped to a square; the outputs carry no EXIF or
+    other metadata. Returns (content hash, {(size, format): bytes}); the
+    hash of the original bytes names the files, so identical uploads map to
+    the same names and the files can be cached indefinitely.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG được giải mã thẳng ở độ phân giải nhỏ gần nhất đủ cho bản lớn nhất
+        image.draft("RGB", (max(SIZES), max(SIZES)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGBA", image.size, "white")
+            image = Image.alpha_composite(background, image)
+        image = image.convert("RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+        raise AvatarError(str(error)) from error
+
+    outputs = {}
+    for size in SIZES:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for name, (pil_format, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, pil_format, **options)
+            outputs[size, name] = buffer.getvalue()
+    return hashlib.sha256(data).hexdigest()[:16], outputs
+
+
+def store_variants(source, digest, outputs):
+    """Lưu các bản thu nhỏ (bỏ qua tệp đã có), trả về avatar_variants của User"""
+    sizes = {}
+    for (size, name), content in outputs.items():
+        path = f"{VARIANTS_DIR}/{digest}-{size}.{'jpg' if name == 'jpeg' else name}"
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(content))
+        sizes.setdefault(str(size), {})[name] = path
+    return {"source": source, "sizes": sizes}
+
+
+def save_variants(user_id, source, variants):
+    # Chỉ ghi khi ảnh gốc chưa bị thay trong lúc xử lý
+    updated = User.objects.filter(pk=user_id, avatar=source).update(
+        avatar_variants=variants
+    )
+    invalidate_user(user_id)
+    return updated
+
+
+def process_avatar(user_id):
+    """
+    Build the resized variants of one user's current avatar. Returns False
+    when the user has no avatar, it changed meanwhile or it cannot be
+    decoded (the original is then still served).
+    """
+    source = User.objects.filter(pk=user_id).values_list("avatar", flat=True).first()
+    if not source:
+        return False
+    try:
+        with default_storage.open(source, "rb") as file:
+            digest, outputs = render_variants(file.read())
+    except (AvatarError, OSError) as error:
+        logger.warning("Không xử lý được ảnh đại diện %s: %s", source, error)
+        return False
+    return bool(save_variants(user_id, source, store_variants(source, digest, outputs)))
+
+
+def needs_processing(user):
+    return (
+        bool(user.avatar)
+        and (user.avatar_variants or {}).get("source") != user.avatar.name
+    )
+
+
+def schedule_avatar_processing(user):
+    """Xử lý ảnh đại diện trên luồng nền sau khi giao dịch hiện tại được ghi"""
+    transaction.on_commit(lambda: _executor.submit(_process_logged, user.pk))
+
+
+def _process_logged(user_id):
+    try:
+        process_avatar(user_id)
+    except Exception:
+        logger.exception("Lỗi khi xử lý ảnh đại diện của người dùng %s", user_id)
+    finally:
+        # Kết nối của luồng nền không được Django tự đóng như kết nối của request
+        connection.close()
+
+
+def variant_url(user, size, image_format="jpeg"):
+    """
+    URL of the smallest variant at least `size` px wide (the largest one
+    otherwise). Falls back to the original upload (stored without metadata,
+    see strip_metadata) until the variants of the current avatar exist, and
+    returns "" when the user has no avatar.
+    """
+    if not user.avatar:
+        return ""
+    variants = user.avatar_variants or {}
+    if variants.get("source") != user.avatar.name:
+        return user.avatar.url
+    sizes = sorted(int(value) for value in variants["sizes"])
+    chosen = next((value for value in sizes if value >= size), sizes[-1])
+    return default_storage.url(variants["sizes"][str(chosen)][image_format])
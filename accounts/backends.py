@@ -0,0 +1,15 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .profiles import get_user
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend whose session user comes with the role profile and its
+    parish, community and diocese already loaded (one query per request,
+    none when the user cache is enabled and warm).
+    """
+
+    def get_user(self, user_id):
+        user = get_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -1,9 +1,93 @@
+from typing import ClassVar
+
 from django import forms
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+
+from students.models import Student
+from teachers.models import Teacher
 
 from .models import User
 
+# Ngoài định dạng ISO, chấp nhận ngày kiểu Việt Nam (31/12/2000)
+DATE_INPUT_FORMATS = ["%Y-%m-%d", "%d/%m/%Y"]
+
 
 class AvatarUpdateForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ["avatar"]
+
+
+class ProvisionRowForm(forms.Form):
+    """Một dòng của tệp nhập tài khoản (xem accounts.provisioning)"""
+
+    user_type = forms.ChoiceField(choices=User.USER_TYPE_CHOICES)
+    username = forms.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    first_name = forms.CharField(max_length=150)
+    last_name = forms.CharField(max_length=150)
+    email = forms.EmailField()
+    # Để trống: tài khoản chưa có mật khẩu, người dùng đặt lại mật khẩu sau
+    password = forms.CharField(required=False)
+    phone = forms.CharField(max_length=15, required=False)
+    date_of_birth = forms.DateField(required=False, input_formats=DATE_INPUT_FORMATS)
+
+    # Chủng sinh
+    entry_year = forms.IntegerField(required=False, min_value=1900)
+    current_year = forms.TypedChoiceField(
+        choices=Student.YEAR_CHOICES, coerce=int, required=False
+    )
+    status = forms.ChoiceField(choices=Student.STATUS_CHOICES, required=False)
+    baptism_name = forms.CharField(max_length=100, required=False)
+    hometown = forms.CharField(required=False)
+    diocese = forms.CharField(required=False)  # mã giáo phận, khi mã giáo xứ bị trùng
+    parish = forms.CharField(required=False)  # mã giáo xứ
+    community = forms.CharField(required=False)  # tên giáo họ trong giáo xứ
+
+    # Giáo viên
+    hire_date = forms.DateField(required=False, input_formats=DATE_INPUT_FORMATS)
+    position = forms.ChoiceField(choices=Teacher.POSITION_CHOICES, required=False)
+    specialization = forms.CharField(max_length=200, required=False)
+
+    REQUIRED_BY_TYPE: ClassVar[dict] = {
+        "student": ("entry_year", "current_year"),
+        "teacher": ("hire_date", "position"),
+    }
+
+    def clean_username(self):
+        # Như UserCreationForm: dạng Unicode NFKC, để tên trùng được nhận ra
+        return User.normalize_username(self.cleaned_data["username"])
+
+    def clean_email(self):
+        return User.objects.normalize_email(self.cleaned_data["email"])
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in self.REQUIRED_BY_TYPE.get(cleaned_data.get("user_type"), ()):
+            if cleaned_data.get(field) in (None, "") and field not in self.errors:
+                self.add_error(field, forms.Field.default_error_messages["required"])
+
+        # Như form tạo tài khoản: mật khẩu phải qua AUTH_PASSWORD_VALIDATORS
+        if cleaned_data.get("password"):
+            user = User(
+                **{
+                    field: cleaned_data.get(field)
+                    for field in ("username", "first_name", "last_name", "email")
+                }
+            )
+            try:
+                validate_password(cleaned_data["password"], user)
+            except ValidationError as error:
+                self.add_error("password", error)
+        return cleaned_data
+
+
+class UserImportForm(forms.Form):
+    file = forms.FileField(
+        label="Tệp CSV hoặc XLSX",
+        help_text="Dòng đầu là tên cột: user_type (student/teacher), username, "
+        "first_name, last_name, email, password; chủng sinh thêm entry_year, "
+        "current_year, parish (mã giáo xứ), community (tên giáo họ); giáo viên "
+        "thêm hire_date, position.",
+    )
@@ -0,0 +1,66 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+# Số truy vấn tối đa cho một trang danh sách, không phụ thuộc số dòng hiển thị
+QUERY_BUDGET = 15
+
+
+class Command(BaseCommand):
+    help = (
+        "Kiểm tra số truy vấn của mọi trang danh sách trong admin: lỗi nếu vượt "
+        "ngân sách hoặc tăng theo số dòng hiển thị"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget", type=int, default=QUERY_BUDGET)
+
+    def handle(self, *args, **options):
+        user = User(
+            username="query-budget", is_active=True, is_staff=True, is_superuser=True
+        )
+        failures = []
+        for model, model_admin in sorted(
+            admin.site._registry.items(), key=lambda item: item[0]._meta.label
+        ):
+            # Lần đầu nạp bộ đệm tham chiếu của tiến trình, không tính
+            self._count_queries(model_admin, user, per_page=1)
+            one_row = self._count_queries(model_admin, user, per_page=1)
+            full_page = self._count_queries(
+                model_admin, user, per_page=model_admin.list_per_page
+            )
+            rows = model._default_manager.count()
+            label = model._meta.label
+            self.stdout.write(
+                f"{label}: {full_page} truy vấn "
+                f"({min(rows, model_admin.list_per_page)} dòng), "
+                f"{one_row} truy vấn (1 dòng)"
+            )
+            if full_page > options["budget"]:
+                failures.append(f"{label} vượt ngân sách ({full_page} truy vấn)")
+            elif rows > 1 and full_page > one_row:
+                failures.append(f"{label} tăng theo số dòng ({one_row} → {full_page})")
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(
+            self.style.SUCCESS("Mọi trang danh sách nằm trong ngân sách.")
+        )
+
+    def _count_queries(self, model_admin, user, per_page):
+        request = RequestFactory().get("/")
+        request.user = user
+        original = model_admin.list_per_page
+        model_admin.list_per_page = per_page
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = model_admin.changelist_view(request)
+                response.render()
+        finally:
+            model_admin.list_per_page = original
+        return len(queries)
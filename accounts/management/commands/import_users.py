@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.provisioning import (
+    CHUNK_SIZE,
+    ProvisioningError,
+    provision_users,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Tạo hàng loạt tài khoản chủng sinh và giáo viên từ tệp CSV hoặc XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Tệp .csv (UTF-8) hoặc .xlsx")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Số tiến trình băm mật khẩu (mặc định: số CPU)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], "rb") as file:
+                result = provision_users(
+                    read_rows(file, options["path"]),
+                    workers=options["workers"],
+                    chunk_size=options["chunk_size"],
+                    progress=self._progress,
+                )
+        except (OSError, ProvisioningError) as error:
+            raise CommandError(error)
+
+        for error in result.errors:
+            self.stderr.write(f"Dòng {error.line}: {error.message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Đã tạo {result.created} tài khoản, bỏ qua {len(result.errors)} "
+                f"dòng lỗi trong {result.seconds:.1f} s "
+                f"({result.rows_per_second:.0f} dòng/giây)."
+            )
+        )
+
+    def _progress(self, result):
+        self.stdout.write(
+            f"{result.created} tài khoản, {len(result.errors)} lỗi, "
+            f"{result.rows_per_second:.0f} dòng/giây"
+        )
@@ -0,0 +1,91 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from accounts.avatars import (
+    AvatarError,
+    needs_processing,
+    render_variants,
+    save_variants,
+    store_variants,
+)
+from accounts.models import User
+
+
+def _render(item):
+    user_id, source, data = item
+    try:
+        return user_id, source, render_variants(data), None
+    except AvatarError as error:
+        return user_id, source, None, str(error)
+
+
+class Command(BaseCommand):
+    help = (
+        "Tạo bản thu nhỏ cho các ảnh đại diện chưa có (hoặc tất cả với --all) "
+        "trên nhiều tiến trình. Ảnh mới tải lên được xử lý trên luồng nền của "
+        "tiến trình web; việc còn chờ trong hàng đợi đó bị mất khi tiến trình "
+        "khởi động lại, nên chạy lại lệnh này (ví dụ định kỳ hoặc sau mỗi lần "
+        "triển khai) để xử lý nốt các ảnh bị bỏ sót."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Số tiến trình xử lý ảnh (mặc định: số CPU)",
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Tạo lại cả ảnh đã có bản thu nhỏ"
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or os.process_cpu_count() or 1
+        users = (
+            User.objects.exclude(avatar="")
+            .exclude(avatar__isnull=True)
+            .only("pk", "avatar", "avatar_variants")
+            .order_by("pk")
+        )
+        pending = (
+            user
+            for user in users.iterator()
+            if options["all"] or needs_processing(user)
+        )
+
+        started = time.perf_counter()
+        processed = failed = 0
+        # Tiến trình con (spawn/forkserver) nạp lại module này, cần Django đã sẵn sàng
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup
+        ) as executor:
+            # Tiến trình chính đọc/ghi tệp và cơ sở dữ liệu, tiến trình con chỉ xử lý ảnh
+            for batch in batched(pending, workers * 4):
+                items = []
+                for user in batch:
+                    try:
+                        with default_storage.open(user.avatar.name, "rb") as file:
+                            items.append((user.pk, user.avatar.name, file.read()))
+                    except OSError as error:
+                        failed += 1
+                        self.stderr.write(f"{user.avatar.name}: {error}")
+                for user_id, source, rendered, error in executor.map(_render, items):
+                    if error:
+                        failed += 1
+                        self.stderr.write(f"{source}: {error}")
+                        continue
+                    save_variants(user_id, source, store_variants(source, *rendered))
+                    processed += 1
+
+        seconds = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Đã xử lý {processed} ảnh đại diện, {failed} lỗi trong {seconds:.1f} s "
+                f"({processed / seconds if seconds else 0:.1f} ảnh/giây)."
+            )
+        )
@@ -0,0 +1,19 @@
+from django.utils.functional import SimpleLazyObject
+
+from .profiles import get_profile
+
+
+class ProfileMiddleware:
+    """
+    Set request.profile to the logged-in user's Student or Teacher profile,
+    resolved on first access and kept for the rest of the request. It
+    evaluates as false for anonymous users and users without a profile.
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_profile(request.user))
+        return self.get_response(request)
@@ -13,6 +13,8 @@ class User(AbstractUser):
     address = models.TextField(blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Bản thu nhỏ của ảnh đại diện, do accounts.avatars tạo sau khi tải lên
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
@@ -0,0 +1,75 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+
+from .models import User
+
+# Hồ sơ theo vai trò và các quan hệ cần để hiển thị hồ sơ, nạp cùng người dùng
+PROFILE_RELATED = {
+    "student": ["student_profile__parish__diocese", "student_profile__community"],
+    "teacher": ["teacher_profile"],
+}
+PROFILE_ATTRIBUTES = {"student": "student_profile", "teacher": "teacher_profile"}
+
+GENERATION_KEY = "accounts:user:generation"
+
+
+def load_user(user_id):
+    """
+    The user with their role profile and its church hierarchy, in one query.
+
+    The session only stores the user id, so user_type is not known before
+    the query: both profiles are LEFT JOINed (each through a unique key)
+    and the one matching user_type is used by get_profile().
+    """
+    related = [path for paths in PROFILE_RELATED.values() for path in paths]
+    return User._default_manager.select_related(*related).filter(pk=user_id).first()
+
+
+def _cache_key(user_id):
+    # Thế hệ chung: đổi giáo phận/giáo xứ/giáo họ hay cập nhật hàng loạt làm mới mọi khóa
+    generation = cache.get_or_set(GENERATION_KEY, uuid.uuid4().hex, None)
+    return f"accounts:user:{generation}:{user_id}"
+
+
+def get_user(user_id):
+    """
+    load_user(), cached in the shared cache for USER_CACHE_TIMEOUT seconds
+    when that setting is positive. Saving or deleting the user or their
+    profile drops the entry; church hierarchy changes and bulk updates drop
+    all of them (see accounts.signals).
+    """
+    timeout = getattr(settings, "USER_CACHE_TIMEOUT", 0)
+    if not timeout:
+        return load_user(user_id)
+    key = _cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load_user(user_id)
+        if user is not None:
+            cache.set(key, user, timeout)
+    return user
+
+
+def invalidate_user(user_id):
+    if getattr(settings, "USER_CACHE_TIMEOUT", 0):
+        cache.delete(_cache_key(user_id))
+
+
+def invalidate_users():
+    """Bỏ mọi người dùng đã cache (sau update() hàng loạt hay đổi cấu trúc giáo hội)"""
+    if getattr(settings, "USER_CACHE_TIMEOUT", 0):
+        cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def get_profile(user):
+    """Hồ sơ Student hoặc Teacher ứng với user_type, None nếu không có"""
+    attribute = PROFILE_ATTRIBUTES.get(getattr(user, "user_type", None))
+    if attribute is None:
+        return None
+    try:
+        return getattr(user, attribute)
+    except ObjectDoesNotExist:
+        return None
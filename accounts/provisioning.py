@@ -0,0 +1,323 @@
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+from pathlib import Path
+from typing import NamedTuple
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from church_structure.models import Community
+from church_structure.reference import dioceses, parishes
+from church_structure.rollups import invalidate_student_rollups
+from search.index import index_objects
+from students.models import Student
+from teachers.models import Teacher
+
+from .forms import ProvisionRowForm
+from .models import User
+
+CHUNK_SIZE = 500
+
+USER_FIELDS = ["username", "first_name", "last_name", "email", "phone", "date_of_birth"]
+STUDENT_FIELDS = ["entry_year", "current_year", "baptism_name", "hometown"]
+TEACHER_FIELDS = ["hire_date", "position", "specialization"]
+
+
+class ProvisioningError(Exception):
+    """Không đọc được tệp nhập tài khoản"""
+
+
+class RowError(NamedTuple):
+    line: int  # số dòng trong tệp, dòng tiêu đề là dòng 1
+    message: str
+
+
+class ProvisionResult(NamedTuple):
+    created: int  # số tài khoản đã tạo
+    errors: list  # RowError của các dòng bị bỏ qua
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        rows = self.created + len(self.errors)
+        return rows / self.seconds if self.seconds else 0.0
+
+
+def _header(names):
+    return [str(name or "").strip().lower() for name in names]
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else value
+
+
+def read_csv(file):
+    """Yield (line number, row dict) from a UTF-8 CSV file opened in binary mode."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = _header(next(reader, []))
+        for values in reader:
+            if any(values):
+                yield reader.line_num, dict(zip(header, map(_cell, values)))
+    except UnicodeDecodeError:
+        raise ProvisioningError("Tệp CSV phải được lưu với mã hóa UTF-8.")
+    finally:
+        text.detach()
+
+
+def read_xlsx(file):
+    """Yield (line number, row dict) from the first sheet of an XLSX file."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ProvisioningError("Cần cài gói openpyxl để đọc tệp .xlsx.")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _header(next(rows, []))
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, "") for value in values):
+                yield line, dict(zip(header, map(_cell, values)))
+    finally:
+        workbook.close()
+
+
+def read_rows(file, name):
+    suffix = Path(name).suffix.lower()
+    if suffix == ".csv":
+        return read_csv(file)
+    if suffix == ".xlsx":
+        return read_xlsx(file)
+    raise ProvisioningError(f"Chỉ hỗ trợ tệp .csv hoặc .xlsx (nhận được {name}).")
+
+
+class ChurchLookup:
+    """Giáo xứ theo mã và giáo họ theo tên, tải một lần cho cả tệp"""
+
+    def __init__(self):
+        diocese_codes = {
+            diocese.pk: diocese.code.casefold() for diocese in dioceses.get().values()
+        }
+        self.parishes = {}
+        for parish in parishes.get().values():
+            self.parishes.setdefault(parish.code.casefold(), []).append(
+                (diocese_codes.get(parish.diocese_id), parish.pk)
+            )
+        self.communities = {
+            (parish_id, name.casefold()): pk
+            for pk, parish_id, name in Community.objects.values_list(
+                "pk", "parish_id", "name"
+            )
+        }
+
+    def parish(self, code, diocese_code=""):
+        matches = self.parishes.get(code.casefold(), [])
+        if diocese_code:
+            matches = [m for m in matches if m[0] == diocese_code.casefold()]
+        if not matches:
+            raise ValueError(f"Không có giáo xứ mã {code}.")
+        if len(matches) > 1:
+            raise ValueError(
+                f"Mã giáo xứ {code} có ở nhiều giáo phận, cần ghi cột diocese."
+            )
+        return matches[0][1]
+
+    def community(self, parish_id, name):
+        try:
+            return self.communities[parish_id, name.casefold()]
+        except KeyError:
+            raise ValueError(f"Giáo xứ không có giáo họ {name}.")
+
+
+def _form_errors(form):
+    return "; ".join(
+        f"{field}: {' '.join(messages)}" if field != "__all__" else " ".join(messages)
+        for field, messages in form.errors.items()
+    )
+
+
+def _build(data, lookup):
+    """User và hồ sơ (chưa lưu) từ một dòng đã kiểm tra"""
+    user = User(
+        user_type=data["user_type"],
+        **{field: data[field] for field in USER_FIELDS if data[field] is not None},
+    )
+    if data["user_type"] == "student":
+        parish_id = community_id = None
+        if data["parish"]:
+            parish_id = lookup.parish(data["parish"], data["diocese"])
+        if data["community"]:
+            if parish_id is None:
+                raise ValueError("Cần ghi mã giáo xứ của giáo họ.")
+            community_id = lookup.community(parish_id, data["community"])
+        profile = Student(
+            status=data["status"] or "active",
+            parish_id=parish_id,
+            community_id=community_id,
+            **{field: data[field] for field in STUDENT_FIELDS},
+        )
+    else:
+        profile = Teacher(**{field: data[field] for field in TEACHER_FIELDS})
+    return user, profile
+
+
+def _hash_all(passwords, executor, workers):
+    """Băm mật khẩu trên các tiến trình con; ô trống cho mật khẩu không dùng được"""
+    hashed = [make_password(None)] * len(passwords)
+    given = [index for index, password in enumerate(passwords) if password]
+    if given:
+        values = [passwords[index] for index in given]
+        results = (
+            executor.map(make_password, values, chunksize=-(-len(values) // workers))
+            if executor
+            else map(make_password, values)
+        )
+        for index, value in zip(given, results):
+            hashed[index] = value
+    return hashed
+
+
+def _insert(accounts):
+    """
+    Lưu một lô [(line, user, profile)], trả về (số đã tạo, lỗi, id người dùng).
+
+    Cả lô được ghi bằng bulk_create; nếu vướng ràng buộc (ví dụ tên đăng nhập
+    vừa được tạo ở nơi khác) thì ghi lại từng dòng để chỉ bỏ dòng lỗi.
+    """
+    try:
+        with transaction.atomic():
+            users = User.objects.bulk_create([user for _, user, _ in accounts])
+            for user, (_, _, profile) in zip(users, accounts):
+                profile.user = user
+            Student.objects.bulk_create(
+                [p for _, _, p in accounts if isinstance(p, Student)]
+            )
+            Teacher.objects.bulk_create(
+                [p for _, _, p in accounts if isinstance(p, Teacher)]
+            )
+        return len(users), [], [user.pk for user in users]
+    except IntegrityError:
+        pass
+
+    created, errors, user_ids = 0, [], []
+    for line, user, profile in accounts:
+        user.pk = profile.pk = None
+        try:
+            with transaction.atomic():
+                user.save()
+                profile.user = user
+                profile.save()
+        except IntegrityError as error:
+            errors.append(RowError(line, f"Không lưu được: {error}"))
+        else:
+            created += 1
+            user_ids.append(user.pk)
+    return created, errors, user_ids
+
+
+def provision_users(rows, workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Create User rows with their Student or Teacher profiles from `rows`,
+    an iterable of (line number, {column: value}) such as read_rows() yields.
+
+    Columns are the fields of ProvisionRowForm. Students refer to their
+    parish by code (with the diocese code when a parish code repeats across
+    dioceses) and to their community by name within that parish; a blank
+    password leaves the account with an unusable one.
+
+    Rows are validated with ProvisionRowForm, usernames are checked against
+    the file and the database, and parish / community references against a
+    lookup loaded once. Each chunk's passwords are hashed across a pool of
+    `workers` processes (default: one per CPU), then users and profiles are
+    written with bulk_create. Invalid rows are reported and skipped without
+    aborting the batch. `progress`, when given, is called with the running
+    ProvisionResult after each chunk.
+    """
+    workers = workers or os.process_cpu_count() or 1
+    started = time.perf_counter()
+    lookup = ChurchLookup()
+    seen_usernames = set()
+    created, errors, students_created = 0, [], False
+
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        if workers > 1
+        else None
+    )
+    try:
+        for chunk in batched(rows, chunk_size):
+            valid = []
+            for line, row in chunk:
+                form = ProvisionRowForm(row)
+                if not form.is_valid():
+                    errors.append(RowError(line, _form_errors(form)))
+                    continue
+                data = form.cleaned_data
+                if data["username"] in seen_usernames:
+                    errors.append(
+                        RowError(
+                            line, f"Trùng tên đăng nhập {data['username']} trong tệp."
+                        )
+                    )
+                    continue
+                seen_usernames.add(data["username"])
+                try:
+                    user, profile = _build(data, lookup)
+                except ValueError as error:
+                    errors.append(RowError(line, str(error)))
+                    continue
+                valid.append((line, user, profile, data["password"]))
+
+            existing = set(
+                User.objects.filter(
+                    username__in=[user.username for _, user, _, _ in valid]
+                ).values_list("username", flat=True)
+            )
+            accounts = []
+            for line, user, profile, password in valid:
+                if user.username in existing:
+                    errors.append(
+                        RowError(line, f"Tên đăng nhập {user.username} đã tồn tại.")
+                    )
+                else:
+                    accounts.append((line, user, profile, password))
+
+            hashed = _hash_all(
+                [password for *_, password in accounts], executor, workers
+            )
+            for (_, user, _, _), password in zip(accounts, hashed):
+                user.password = password
+
+            count, insert_errors, user_ids = _insert(
+                [(line, user, profile) for line, user, profile, _ in accounts]
+            )
+            created += count
+            errors.extend(insert_errors)
+            # bulk_create không gửi tín hiệu post_save: tự cập nhật chỉ mục tìm kiếm
+            if user_ids:
+                index_objects(User, user_ids)
+            students_created |= any(
+                isinstance(profile, Student) and profile.pk
+                for _, _, profile, _ in accounts
+            )
+            if progress:
+                progress(
+                    ProvisionResult(created, errors, time.perf_counter() - started)
+                )
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if students_created:
+        invalidate_student_rollups()
+    errors.sort()
+    return ProvisionResult(created, errors, time.perf_counter() - started)
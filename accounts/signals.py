@@ -0,0 +1,67 @@
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from church_structure.models import Community, Diocese, Parish
+from students.models import Student
+from teachers.models import Teacher
+
+from .avatars import (
+    AvatarError,
+    needs_processing,
+    schedule_avatar_processing,
+    strip_metadata,
+)
+from .models import User
+from .profiles import invalidate_user, invalidate_users
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(pre_save, sender=User)
+def strip_avatar_metadata(sender, instance, **kwargs):
+    """Ảnh gốc vừa tải lên được lưu không kèm EXIF (xem strip_metadata)"""
+    avatar = instance.avatar
+    if not avatar or avatar._committed:
+        return
+    avatar.seek(0)
+    try:
+        data = strip_metadata(avatar.read())
+    except AvatarError as error:
+        logger.warning("Bỏ ảnh đại diện không đọc được %s: %s", avatar.name, error)
+        instance.avatar = None
+        return
+    avatar.save(os.path.basename(avatar.name), ContentFile(data), save=False)
+
+
+@receiver(post_save, sender=User)
+def avatar_changed(sender, instance, **kwargs):
+    if needs_processing(instance):
+        schedule_avatar_processing(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Diocese)
+@receiver(post_delete, sender=Diocese)
+@receiver(post_save, sender=Parish)
+@receiver(post_delete, sender=Parish)
+@receiver(post_save, sender=Community)
+@receiver(post_delete, sender=Community)
+def church_structure_changed(sender, instance, **kwargs):
+    invalidate_users()
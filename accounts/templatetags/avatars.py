@@ -0,0 +1,38 @@
+from django import template
+from django.utils.html import format_html
+
+from accounts.avatars import needs_processing, variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_url(user, size=64, image_format="jpeg"):
+    """{% avatar_url user 256 %}: URL bản thu nhỏ vừa với kích thước cần hiển thị"""
+    return variant_url(user, size, image_format)
+
+
+@register.simple_tag
+def avatar(user, size=64):
+    """{% avatar user 64 %}: ảnh đại diện dạng <picture>, WebP kèm JPEG dự phòng"""
+    if not user.avatar:
+        return ""
+    alt = user.get_full_name() or user.username
+    if needs_processing(user):
+        # Chưa có bản thu nhỏ: hiện ảnh gốc theo kích thước yêu cầu
+        return format_html(
+            '<img src="{}" width="{}" height="{}" alt="{}" loading="lazy">',
+            user.avatar.url,
+            size,
+            size,
+            alt,
+        )
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" width="{}" height="{}" alt="{}" loading="lazy"></picture>',
+        variant_url(user, size, "webp"),
+        variant_url(user, size, "jpeg"),
+        size,
+        size,
+        alt,
+    )
@@ -1,3 +1,330 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from church_structure.models import Community, Diocese, Parish
+from courses.models import (
+    AcademicYear,
+    Assignment,
+    Attendance,
+    Course,
+    Enrollment,
+    Subject,
+)
+from students.models import Student, StudentNote
+from teachers.models import Teacher
+
+from .avatars import FORMATS, SIZES, process_avatar, variant_url
+from .backends import ProfileBackend
+from .forms import ProvisionRowForm
+from .management.commands.check_admin_queries import QUERY_BUDGET
+from .middleware import ProfileMiddleware
+from .models import User
+from .provisioning import provision_users
+from .templatetags.avatars import avatar
+
+ROWS = 3
+
+# Kiểm thử không chạy collectstatic nên không có manifest của tệp tĩnh
+PLAIN_STATIC_STORAGES = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class ChangelistQueryTests(TestCase):
+    """Như lệnh check_admin_queries: số truy vấn không tăng theo số dòng"""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        academic_year = AcademicYear.objects.create(
+            name="2024-2025",
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 6, 30),
+            is_current=True,
+        )
+        for i in range(1, ROWS):
+            AcademicYear.objects.create(
+                name=f"{2024 - i}-{2025 - i}",
+                start_date=date(2024 - i, 9, 1),
+                end_date=date(2025 - i, 6, 30),
+            )
+
+        for i in range(ROWS):
+            diocese = Diocese.objects.create(name=f"Giáo phận {i}", code=f"GP{i}")
+            parish = Parish.objects.create(
+                name=f"Giáo xứ {i}", code=f"GX{i}", diocese=diocese
+            )
+            community = Community.objects.create(name=f"Giáo họ {i}", parish=parish)
+            Group.objects.create(name=f"Nhóm {i}")
+
+            teacher = Teacher.objects.create(
+                user=User.objects.create(
+                    username=f"gv{i}", last_name="Nguyễn", user_type="teacher"
+                ),
+                hire_date=today,
+                position="professor",
+            )
+            student = Student.objects.create(
+                user=User.objects.create(
+                    username=f"cs{i}", last_name="Trần", user_type="student"
+                ),
+                entry_year=2024,
+                current_year=1,
+                parish=parish,
+                community=community,
+            )
+            StudentNote.objects.create(
+                student=student,
+                created_by=teacher.user,
+                note_type="academic",
+                title=f"Ghi chú {i}",
+                content="",
+            )
+
+            course = Course.objects.create(
+                subject=Subject.objects.create(
+                    code=f"MH{i}", name=f"Môn {i}", category="general", credits=2
+                ),
+                instructor=teacher,
+                academic_year=academic_year,
+                semester="fall",
+                class_code=f"L{i}",
+                max_students=30,
+                start_date=today,
+                end_date=today + timedelta(days=90),
+            )
+            Enrollment.objects.create(
+                student=student,
+                course=course,
+                midterm_score=Decimal(7),
+                final_score=Decimal(8),
+            )
+            Assignment.objects.create(
+                course=course,
+                title=f"Bài {i}",
+                type="homework",
+                description="",
+                due_date=timezone.now(),
+            )
+            Attendance.objects.create(
+                course=course,
+                student=student,
+                date=today,
+                session_number=1,
+                status="present",
+                recorded_by=teacher.user,
+            )
+
+        cls.user = User.objects.create_superuser(
+            "admin", password="x", user_type="teacher"
+        )
+
+    def count_queries(self, model_admin, per_page):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        original = model_admin.list_per_page
+        model_admin.list_per_page = per_page
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                model_admin.changelist_view(request).render()
+        finally:
+            model_admin.list_per_page = original
+        return len(queries)
+
+    def test_changelists_run_a_constant_number_of_queries(self):
+        for model, model_admin in admin.site._registry.items():
+            with self.subTest(model._meta.label):
+                self.assertGreaterEqual(model._default_manager.count(), 2)
+                # Lần đầu nạp bộ đệm tham chiếu của tiến trình, không tính
+                self.count_queries(model_admin, per_page=1)
+                one_row = self.count_queries(model_admin, per_page=1)
+                full_page = self.count_queries(model_admin, per_page=ROWS)
+                self.assertEqual(full_page, one_row)
+                self.assertLessEqual(full_page, QUERY_BUDGET)
+
+
+class ProvisioningTests(TestCase):
+    def row(self, **values):
+        return {
+            "user_type": "teacher",
+            "username": "gv1",
+            "first_name": "Văn",
+            "last_name": "Nguyễn",
+            "email": "gv1@example.com",
+            "hire_date": "01/09/2020",
+            "position": "professor",
+            **values,
+        }
+
+    def test_row_form_normalizes_username_and_email(self):
+        form = ProvisionRowForm(self.row(username="ｇｖ１", email="GV1@Example.COM"))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["username"], "gv1")
+        self.assertEqual(form.cleaned_data["email"], "GV1@example.com")
+
+    def test_row_form_applies_password_validators(self):
+        for password in ["123", "gv1example", "matkhau"]:
+            with self.subTest(password):
+                form = ProvisionRowForm(self.row(password=password))
+                self.assertFalse(form.is_valid())
+                self.assertIn("password", form.errors)
+        form = ProvisionRowForm(self.row(password="Chung-vien-2024!"))
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_usernames_differing_only_in_unicode_form_are_duplicates(self):
+        User.objects.create(username="gv2", user_type="teacher")
+        result = provision_users(
+            [
+                (2, self.row()),
+                (3, self.row(username="ｇｖ１")),
+                (4, self.row(username="ｇｖ２")),
+            ],
+            workers=1,
+        )
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.line for error in result.errors], [3, 4])
+        self.assertTrue(Teacher.objects.filter(user__username="gv1").exists())
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class SessionBackendTests(TestCase):
+    def test_sessions_from_model_backend_stay_logged_in(self):
+        user = User.objects.create_user(
+            "gv1", password="x", user_type="teacher", is_staff=True
+        )
+        teacher = Teacher.objects.create(
+            user=user, hire_date=timezone.localdate(), position="professor"
+        )
+        self.client.force_login(
+            user, backend="django.contrib.auth.backends.ModelBackend"
+        )
+
+        response = self.client.get("/admin/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, user)
+        self.assertEqual(response.wsgi_request.profile, teacher)
+
+
+class ProfileMiddlewareTests(TestCase):
+    def setUp(self):
+        diocese = Diocese.objects.create(name="Giáo phận A", code="A")
+        self.parish = Parish.objects.create(name="Giáo xứ 1", code="1", diocese=diocese)
+        self.user = User.objects.create_user("cs1", password="x", user_type="student")
+        self.student = Student.objects.create(
+            user=self.user, entry_year=2024, current_year=1, parish=self.parish
+        )
+
+    def profile_of(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        ProfileMiddleware(lambda request: None)(request)
+        return request.profile
+
+    def test_anonymous_request_has_no_profile(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.profile_of(AnonymousUser()))
+
+    def test_authenticated_request_gets_profile_and_parish_in_one_query(self):
+        with self.assertNumQueries(1):
+            user = ProfileBackend().get_user(self.user.pk)
+            profile = self.profile_of(user)
+            self.assertEqual(profile, self.student)
+            self.assertEqual(profile.parish.diocese.name, "Giáo phận A")
+
+    def test_teacher_without_profile_is_false(self):
+        teacher = User.objects.create_user("gv1", password="x", user_type="teacher")
+        self.assertFalse(self.profile_of(ProfileBackend().get_user(teacher.pk)))
+
+    @override_settings(USER_CACHE_TIMEOUT=60)
+    def test_cached_user_is_dropped_when_the_profile_changes(self):
+        ProfileBackend().get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            ProfileBackend().get_user(self.user.pk)
+
+        self.student.current_year = 2
+        self.student.save()
+        user = ProfileBackend().get_user(self.user.pk)
+        self.assertEqual(user.student_profile.current_year, 2)
+
+
+def make_image(size=(400, 300), image_format="JPEG"):
+    """Ảnh nhỏ trong bộ nhớ, kèm EXIF xoay 90 độ và thông tin máy ảnh"""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: xoay 90 độ theo chiều kim đồng hồ
+    exif[0x010F] = "Máy ảnh"  # Make
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, image_format, exif=exif)
+    return buffer.getvalue()
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create(
+            username="cs1", last_name="Nguyễn", user_type="student"
+        )
+
+    def upload(self, data, name="anh.jpg"):
+        self.user.avatar = SimpleUploadedFile(name, data)
+        self.user.save()
+
+    def test_original_is_stored_without_exif(self):
+        self.upload(make_image())
+        with self.user.avatar.open("rb") as file:
+            image = Image.open(file)
+            image.load()
+        self.assertEqual(dict(image.getexif()), {})
+        self.assertEqual(image.size, (300, 400))
+
+    def test_variants_are_rendered_and_served(self):
+        self.upload(make_image(image_format="PNG"), name="anh.png")
+        # Chưa có bản thu nhỏ: dùng ảnh gốc (đã bỏ EXIF)
+        self.assertEqual(variant_url(self.user, 64), self.user.avatar.url)
+        self.assertIn("<img", avatar(self.user, 64))
+        self.assertNotIn("<picture>", avatar(self.user, 64))
+
+        self.assertTrue(process_avatar(self.user.pk))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_variants["source"], self.user.avatar.name)
+        for size in SIZES:
+            for image_format, (pil_format, _) in FORMATS.items():
+                path = self.user.avatar_variants["sizes"][str(size)][image_format]
+                with default_storage.open(path, "rb") as file:
+                    image = Image.open(file)
+                    image.load()
+                self.assertEqual(image.format, pil_format)
+                self.assertEqual(image.size, (size, size))
+                self.assertEqual(dict(image.getexif()), {})
+
+        self.assertTrue(variant_url(self.user, 100).endswith("-256.jpg"))
+        html = avatar(self.user, 64)
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn("-64.webp", html)
+        self.assertIn('alt="Nguyễn"', html)
+
+    def test_unreadable_upload_is_not_stored(self):
+        with self.assertLogs("accounts.signals", "WARNING"):
+            self.upload(b"khong phai anh")
+        self.assertFalse(self.user.avatar)
+        self.assertEqual(avatar(self.user), "")
@@ -18,12 +18,13 @@ def update_avatar_view(request):
             messages.success(request, 'Your avatar has been updated successfully!')
             
             # Redirect to the appropriate profile page based on user type
-            if request.user.user_type == 'student':
+            # (only when the user has that profile, see ProfileMiddleware)
+            if not request.profile:
+                return redirect('home') # Fallback redirect
+            elif request.user.user_type == 'student':
                 return redirect('student_profile')
-            elif request.user.user_type == 'teacher':
-                return redirect('teacher_profile')
             else:
-                return redirect('home') # Fallback redirect
+                return redirect('teacher_profile')
     else:
         form = AvatarUpdateForm(instance=request.user)
 
@@ -1,10 +1,21 @@
+from typing import ClassVar
+
 from django.contrib import admin
 
+from search.admin import IndexedSearchMixin
+from seminary_management.admin_base import AnnotatedModelAdmin, count_subquery
+
 from .models import Diocese, Parish, Community
+from .rollups import get_counts
+
+
+def student_count_display(counts):
+    """Tổng số chủng sinh, kèm số đang học"""
+    return f"{counts['total']} ({counts['by_status'].get('active', 0)} đang học)"
 
 
 @admin.register(Diocese)
-class DioceseAdmin(admin.ModelAdmin):
+class DioceseAdmin(AnnotatedModelAdmin):
     list_display = [
         "name",
         "code", 
@@ -16,6 +27,9 @@ class DioceseAdmin(admin.ModelAdmin):
     list_filter = ["created_at"]
     search_fields = ["name", "code", "bishop", "email"]
     readonly_fields = ["created_at", "updated_at"]
+    list_annotations: ClassVar[dict] = {
+        "parishes_total": count_subquery(Parish.objects.all(), "diocese"),
+    }
 
     fieldsets = [
         ("Thông tin cơ bản", {"fields": ["name", "code", "bishop"]}),
@@ -24,9 +38,17 @@ class DioceseAdmin(admin.ModelAdmin):
         ("Metadata", {"fields": ["created_at", "updated_at"], "classes": ["collapse"]}),
     ]
 
+    @admin.display(description="Số giáo xứ", ordering="parishes_total")
+    def parish_count(self, obj):
+        return obj.parishes_total
+
+    @admin.display(description="Số chủng sinh")
+    def student_count(self, obj):
+        return student_count_display(get_counts("dioceses", obj.pk))
+
 
 @admin.register(Parish)
-class ParishAdmin(admin.ModelAdmin):
+class ParishAdmin(IndexedSearchMixin, AnnotatedModelAdmin):
     list_display = [
         "name",
         "code",
@@ -38,7 +60,12 @@ class ParishAdmin(admin.ModelAdmin):
     ]
     list_filter = ["diocese", "established_date", "created_at"]
     search_fields = ["name", "code", "pastor", "diocese__name"]
+    indexed_search = (("pk", "church_structure.Parish"),)
     readonly_fields = ["created_at", "updated_at"]
+    list_select_related = ("diocese",)
+    list_annotations: ClassVar[dict] = {
+        "communities_total": count_subquery(Community.objects.all(), "parish"),
+    }
 
     fieldsets = [
         ("Thông tin cơ bản", {"fields": ["name", "code", "diocese", "pastor"]}),
@@ -47,9 +74,17 @@ class ParishAdmin(admin.ModelAdmin):
         ("Metadata", {"fields": ["created_at", "updated_at"], "classes": ["collapse"]}),
     ]
 
+    @admin.display(description="Số giáo họ", ordering="communities_total")
+    def community_count(self, obj):
+        return obj.communities_total
+
+    @admin.display(description="Số chủng sinh")
+    def student_count(self, obj):
+        return student_count_display(get_counts("parishes", obj.pk))
+
 
 @admin.register(Community)
-class CommunityAdmin(admin.ModelAdmin):
+class CommunityAdmin(AnnotatedModelAdmin):
     list_display = [
         "name",
         "parish",
@@ -60,9 +95,14 @@ class CommunityAdmin(admin.ModelAdmin):
     list_filter = ["parish__diocese", "parish", "created_at"]
     search_fields = ["name", "leader", "parish__name"]
     readonly_fields = ["created_at", "updated_at"]
+    list_select_related = ("parish__diocese",)
     
     fieldsets = [
         ("Thông tin cơ bản", {"fields": ["name", "parish", "leader"]}),
         ("Liên hệ", {"fields": ["address", "phone"]}),
         ("Metadata", {"fields": ["created_at", "updated_at"], "classes": ["collapse"]}),
     ]
+
+    @admin.display(description="Số chủng sinh")
+    def student_count(self, obj):
+        return student_count_display(get_counts("communities", obj.pk))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ChurchStructureConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'church_structure'
+
+    def ready(self):
+        from . import signals  # noqa: F401
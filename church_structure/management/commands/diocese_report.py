@@ -0,0 +1,63 @@
+import csv
+import sys
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand
+
+from church_structure.models import Diocese
+from church_structure.rollups import build_student_rollups, empty_counts
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Báo cáo số chủng sinh theo giáo phận gửi (hoặc giáo xứ), chia theo "
+        "trạng thái và năm đào tạo, dạng CSV"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--by-parish", action="store_true", help="Chi tiết đến từng giáo xứ"
+        )
+        parser.add_argument("--output", help="Đường dẫn file CSV (mặc định: stdout)")
+
+    def handle(self, *args, **options):
+        # Báo cáo luôn đọc số liệu mới nhất thay vì bản trong cache
+        rollups = build_student_rollups()
+        statuses = Student.STATUS_CHOICES
+        years = Student.YEAR_CHOICES
+
+        header = ["Giáo phận"]
+        if options["by_parish"]:
+            header.append("Giáo xứ")
+        header += ["Tổng số"] + [label for _, label in statuses]
+        header += [f"Đang học - {label}" for _, label in years]
+
+        def counts_row(counts):
+            return (
+                [counts["total"]]
+                + [counts["by_status"].get(status, 0) for status, _ in statuses]
+                + [counts["by_year"].get(year, 0) for year, _ in years]
+            )
+
+        rows = []
+        for diocese in Diocese.objects.prefetch_related("parishes"):
+            if not options["by_parish"]:
+                counts = rollups["dioceses"].get(diocese.pk) or empty_counts()
+                rows.append([diocese.name] + counts_row(counts))
+                continue
+            for parish in diocese.parishes.all():
+                counts = rollups["parishes"].get(parish.pk) or empty_counts()
+                rows.append([diocese.name, parish.name] + counts_row(counts))
+
+        with ExitStack() as stack:
+            output = (
+                stack.enter_context(
+                    open(options["output"], "w", encoding="utf-8", newline="")
+                )
+                if options["output"]
+                else sys.stdout
+            )
+            writer = csv.writer(output)
+            writer.writerow(header)
+            writer.writerows(rows)
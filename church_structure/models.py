@@ -31,10 +31,12 @@ class Diocese(models.Model):
     def parish_count(self):
         return self.parishes.count()
     
-    @property 
+    @property
     def student_count(self):
         """Tính số chủng sinh từ giáo phận này"""
-        return sum(parish.student_count for parish in self.parishes.all())
+        from .rollups import get_counts
+
+        return get_counts('dioceses', self.pk)['total']
 
 class Parish(models.Model):
     """Giáo xứ"""
@@ -60,7 +62,10 @@ class Parish(models.Model):
         ordering = ['diocese', 'name']
         
     def __str__(self):
-        return f"{self.name} ({self.diocese.name})"
+        from .reference import get_diocese
+
+        diocese = get_diocese(self.diocese_id) or self.diocese
+        return f"{self.name} ({diocese.name})"
     
     def get_absolute_url(self):
         return reverse('church_structure:parish_detail', kwargs={'pk': self.pk})
@@ -72,7 +77,9 @@ class Parish(models.Model):
     @property
     def student_count(self):
         """Tính số chủng sinh từ giáo xứ này"""
-        return self.students.count()
+        from .rollups import get_counts
+
+        return get_counts('parishes', self.pk)['total']
 
 class Community(models.Model):
     """Giáo họ"""
@@ -93,7 +100,10 @@ class Community(models.Model):
         ordering = ['parish', 'name']
         
     def __str__(self):
-        return f"{self.name} - {self.parish.name}"
+        from .reference import get_parish
+
+        parish = get_parish(self.parish_id) or self.parish
+        return f"{self.name} - {parish.name}"
     
     def get_absolute_url(self):
         return reverse('church_structure:community_detail', kwargs={'pk': self.pk})
@@ -101,4 +111,6 @@ class Community(models.Model):
     @property
     def student_count(self):
         """Tính số chủng sinh từ giáo họ này"""
-        return self.students.count()
+        from .rollups import get_counts
+
+        return get_counts('communities', self.pk)['total']
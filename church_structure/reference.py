@@ -0,0 +1,25 @@
+from seminary_management.reference_cache import ReferenceCache
+
+
+def _load_dioceses():
+    from .models import Diocese
+
+    return {diocese.pk: diocese for diocese in Diocese.objects.all()}
+
+
+def _load_parishes():
+    from .models import Parish
+
+    return {parish.pk: parish for parish in Parish.objects.all()}
+
+
+dioceses = ReferenceCache("church_structure:dioceses", _load_dioceses)
+parishes = ReferenceCache("church_structure:parishes", _load_parishes)
+
+
+def get_diocese(pk):
+    return dioceses.get().get(pk)
+
+
+def get_parish(pk):
+    return parishes.get().get(pk)
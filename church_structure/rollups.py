@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from students.models import Student
+
+CACHE_KEY = "church_structure:student_rollups"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+LEVELS = ["dioceses", "parishes", "communities"]
+
+
+def empty_counts():
+    return {"total": 0, "by_status": {}, "by_year": {}}
+
+
+def _add(counts, status, current_year, total):
+    counts["total"] += total
+    counts["by_status"][status] = counts["by_status"].get(status, 0) + total
+    if status == "active":
+        counts["by_year"][current_year] = counts["by_year"].get(current_year, 0) + total
+
+
+def build_student_rollups():
+    """
+    Student counts per diocese, parish and community from one grouped query.
+
+    Returns {"dioceses": {...}, "parishes": {...}, "communities": {...}},
+    each mapping a primary key to {"total", "by_status", "by_year"}, where
+    by_year counts active students per formation year. Dioceses are reached
+    through the student's parish; students without a parish or community
+    are left out of that level.
+    """
+    rows = (
+        Student.objects.order_by()
+        .values(
+            "parish__diocese_id", "parish_id", "community_id", "status", "current_year"
+        )
+        .annotate(total=Count("pk"))
+    )
+    rollups = {level: defaultdict(empty_counts) for level in LEVELS}
+    for row in rows:
+        keys = (row["parish__diocese_id"], row["parish_id"], row["community_id"])
+        for level, key in zip(LEVELS, keys):
+            if key is not None:
+                _add(
+                    rollups[level][key],
+                    row["status"],
+                    row["current_year"],
+                    row["total"],
+                )
+    return {level: dict(counts) for level, counts in rollups.items()}
+
+
+def get_student_rollups():
+    """build_student_rollups() qua cache, làm mới khi chủng sinh thay đổi"""
+    rollups = cache.get(CACHE_KEY)
+    if rollups is None:
+        rollups = build_student_rollups()
+        cache.set(CACHE_KEY, rollups, CACHE_TIMEOUT)
+    return rollups
+
+
+def get_counts(level, pk):
+    return get_student_rollups()[level].get(pk) or empty_counts()
+
+
+def invalidate_student_rollups():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from students.models import Student
+
+from .models import Community, Diocese, Parish
+from .reference import dioceses, parishes
+from .rollups import invalidate_student_rollups
+
+
+@receiver(post_save, sender=Diocese)
+@receiver(post_delete, sender=Diocese)
+def diocese_changed(sender, instance, **kwargs):
+    dioceses.invalidate()
+    invalidate_student_rollups()
+
+
+@receiver(post_save, sender=Parish)
+@receiver(post_delete, sender=Parish)
+def parish_changed(sender, instance, **kwargs):
+    parishes.invalidate()
+    # Giáo xứ chuyển giáo phận làm thay đổi số chủng sinh của giáo phận
+    invalidate_student_rollups()
+
+
+@receiver(post_delete, sender=Community)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_rollups_changed(sender, instance, **kwargs):
+    invalidate_student_rollups()
@@ -1,3 +1,72 @@
+import csv
+import os
+import tempfile
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from students.models import Student
+
+from .models import Community, Diocese, Parish
+from .rollups import get_counts
+
+
+def create_student(username, **fields):
+    user = User.objects.create(username=username, user_type="student")
+    return Student.objects.create(
+        user=user, entry_year=2024, current_year=fields.pop("current_year", 1), **fields
+    )
+
+
+class StudentRollupTests(TestCase):
+    def setUp(self):
+        self.diocese = Diocese.objects.create(name="Giáo phận A", code="A")
+        self.other_diocese = Diocese.objects.create(name="Giáo phận B", code="B")
+        self.parish = Parish.objects.create(
+            name="Giáo xứ 1", code="1", diocese=self.diocese
+        )
+        self.community = Community.objects.create(name="Giáo họ 1", parish=self.parish)
+        self.student = create_student(
+            "cs1", parish=self.parish, community=self.community
+        )
+        create_student("cs2", parish=self.parish, current_year=2)
+        create_student("cs3", parish=self.parish, status="graduated")
+
+    def test_counts_per_level(self):
+        counts = get_counts("dioceses", self.diocese.pk)
+        self.assertEqual(counts["total"], 3)
+        self.assertEqual(counts["by_status"], {"active": 2, "graduated": 1})
+        self.assertEqual(counts["by_year"], {1: 1, 2: 1})
+        self.assertEqual(get_counts("parishes", self.parish.pk)["total"], 3)
+        self.assertEqual(get_counts("communities", self.community.pk)["total"], 1)
+        self.assertEqual(self.other_diocese.student_count, 0)
+
+    def test_counts_follow_student_and_parish_changes(self):
+        self.assertEqual(self.diocese.student_count, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.diocese.student_count, 3)
+
+        self.student.status = "graduated"
+        self.student.save()
+        counts = get_counts("dioceses", self.diocese.pk)
+        self.assertEqual(counts["by_status"], {"active": 1, "graduated": 2})
+
+        self.parish.diocese = self.other_diocese
+        self.parish.save()
+        self.assertEqual(self.diocese.student_count, 0)
+        self.assertEqual(self.other_diocese.student_count, 3)
+
+    def test_diocese_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.csv")
+            call_command("diocese_report", output=path)
+            with open(path, encoding="utf-8", newline="") as report:
+                rows = list(csv.reader(report))
+
+        header = rows[0]
+        self.assertEqual(header[:2], ["Giáo phận", "Tổng số"])
+        by_name = {row[0]: dict(zip(header, row)) for row in rows[1:]}
+        self.assertEqual(set(by_name), {"Giáo phận A", "Giáo phận B"})
+        self.assertEqual(by_name["Giáo phận A"]["Tổng số"], "3")
+        self.assertEqual(by_name["Giáo phận B"]["Tổng số"], "0")
@@ -1,10 +1,57 @@
-from django.contrib import admin
+import io
+from datetime import timedelta
+from typing import ClassVar
+
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import AcademicYear, Subject, Course, Enrollment, Assignment, Attendance
+
+from search.admin import IndexedSearchMixin
+from seminary_management.admin_base import AnnotatedModelAdmin, StrSelectRelatedMixin
+
+from . import cloning, grading
+from .attendance import get_roster, record_attendance
+from .changelist import KeysetPaginationMixin
+from .exports import ExportError, iter_grade_csv, write_grade_xlsx
+from .gradebook import (
+    PAGE_SIZE,
+    SCORE_FIELDS,
+    StaleGradesError,
+    gradebook_rows,
+    save_grades,
+)
+from .rankings import cohort_rankings
+from .statistics import get_dashboard
+from .forms import (
+    AttendanceFormSet,
+    AttendanceSessionForm,
+    CloneCoursesForm,
+    GradebookFilterForm,
+    GradeFormSet,
+    RankingFilterForm,
+    SubjectAdminForm,
+)
+from .models import (
+    AcademicYear,
+    Subject,
+    Course,
+    Enrollment,
+    Assignment,
+    AssignmentSubmission,
+    Attendance,
+)
 
 
 @admin.register(AcademicYear)
-class AcademicYearAdmin(admin.ModelAdmin):
+class AcademicYearAdmin(AnnotatedModelAdmin):
     list_display = [
         "name",
         "start_date",
@@ -12,18 +59,130 @@ class AcademicYearAdmin(admin.ModelAdmin):
         "is_current",
         "courses_count",
         "created_at",
+        "rankings_link",
+        "dashboard_link",
     ]
     list_filter = ["is_current", "start_date"]
     search_fields = ["name"]
-    readonly_fields = ["created_at"]
+    readonly_fields = ("closed_at", "created_at")
+    list_annotations: ClassVar[dict] = {"courses_total": Count("course")}
+    actions = ("export_grades", "export_grades_xlsx")
 
-    @admin.display(description="Số lớp học")
+    @admin.action(description="Xuất bảng điểm (CSV)")
+    def export_grades(self, request, queryset):
+        response = StreamingHttpResponse(
+            iter_grade_csv(queryset), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self._export_name(queryset)}.csv"'
+        )
+        return response
+
+    @admin.action(description="Xuất bảng điểm (XLSX)")
+    def export_grades_xlsx(self, request, queryset):
+        # Tệp XLSX chỉ hoàn chỉnh khi ghi xong (nén, nhỏ hơn nhiều so với CSV)
+        buffer = io.BytesIO()
+        try:
+            write_grade_xlsx(buffer, queryset)
+        except ExportError as error:
+            self.message_user(request, str(error), messages.ERROR)
+            return None
+        buffer.seek(0)
+        return FileResponse(
+            buffer,
+            as_attachment=True,
+            filename=f"{self._export_name(queryset)}.xlsx",
+            content_type=(
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            ),
+        )
+
+    @staticmethod
+    def _export_name(queryset):
+        names = "_".join(queryset.order_by("name").values_list("name", flat=True))
+        return f"bang-diem-{names}"
+
+    @admin.display(description="Số lớp học", ordering="courses_total")
     def courses_count(self, obj):
-        return obj.course_set.count()
+        return obj.courses_total
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/rankings/",
+                self.admin_site.admin_view(self.rankings_view),
+                name="courses_academicyear_rankings",
+            ),
+            path(
+                "<path:object_id>/dashboard/",
+                self.admin_site.admin_view(self.dashboard_view),
+                name="courses_academicyear_dashboard",
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description="Xếp hạng")
+    def rankings_link(self, obj):
+        return format_html(
+            '<a href="{}">Xếp hạng</a>',
+            reverse("admin:courses_academicyear_rankings", args=[obj.pk]),
+        )
+
+    @admin.display(description="Thống kê")
+    def dashboard_link(self, obj):
+        return format_html(
+            '<a href="{}">Thống kê</a>',
+            reverse("admin:courses_academicyear_dashboard", args=[obj.pk]),
+        )
+
+    def rankings_view(self, request, object_id):
+        """Xếp hạng chủng sinh theo khóa trong năm học (hoặc một học kỳ)"""
+        if not request.user.has_perm("courses.view_enrollment"):
+            raise PermissionDenied
+        academic_year = self.get_object(request, object_id)
+        if academic_year is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+
+        form = RankingFilterForm(request.GET or None)
+        semester, cohort = None, "current_year"
+        if form.is_valid():
+            semester = form.cleaned_data["semester"] or None
+            cohort = form.cleaned_data["cohort"] or cohort
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": f"Xếp hạng năm học {academic_year}",
+            "academic_year": academic_year,
+            "form": form,
+            "rankings": cohort_rankings(academic_year, semester, cohort),
+        }
+        return TemplateResponse(
+            request, "admin/courses/academicyear/rankings.html", context
+        )
+
+    def dashboard_view(self, request, object_id):
+        """Thống kê đăng ký và kết quả học tập của năm học"""
+        if not request.user.has_perm("courses.view_enrollment"):
+            raise PermissionDenied
+        academic_year = self.get_object(request, object_id)
+        if academic_year is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": f"Thống kê năm học {academic_year}",
+            "academic_year": academic_year,
+            "dashboard": get_dashboard(academic_year),
+        }
+        return TemplateResponse(
+            request, "admin/courses/academicyear/dashboard.html", context
+        )
 
 
 @admin.register(Subject)
-class SubjectAdmin(admin.ModelAdmin):
+class SubjectAdmin(IndexedSearchMixin, AnnotatedModelAdmin):
+    form = SubjectAdminForm
     list_display = [
         "code",
         "name",
@@ -37,8 +196,12 @@ class SubjectAdmin(admin.ModelAdmin):
     ]
     list_filter = ["category", "level", "is_required", "year_taught", "is_active"]
     search_fields = ["code", "name", "english_name"]
+    indexed_search = (("pk", "courses.Subject"),)
     readonly_fields = ["created_at", "updated_at"]
     filter_horizontal = ["prerequisites"]
+    list_annotations: ClassVar[dict] = {
+        "active_courses_count": Count("courses", filter=Q(courses__is_active=True))
+    }
 
     fieldsets = [
         (
@@ -72,8 +235,16 @@ class SubjectAdmin(admin.ModelAdmin):
         return count
 
 
+def _row_enrollment(form):
+    """Mã đăng ký của một dòng bảng điểm (None nếu dữ liệu gửi lên sai)"""
+    try:
+        return int(form["enrollment"].value())
+    except (TypeError, ValueError):
+        return None
+
+
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(IndexedSearchMixin, AnnotatedModelAdmin):
     list_display = [
         "subject",
         "class_code",
@@ -84,6 +255,8 @@ class CourseAdmin(admin.ModelAdmin):
         "max_students",
         "status",
         "is_active",
+        "attendance_link",
+        "grades_link",
     ]
     list_filter = [
         "academic_year",
@@ -95,11 +268,18 @@ class CourseAdmin(admin.ModelAdmin):
     search_fields = [
         "subject__name",
         "subject__code",
-        "class_code",
+        "^class_code",
         "instructor__user__first_name",
         "instructor__user__last_name",
     ]
-    readonly_fields = ["created_at", "updated_at", "enrolled_count", "available_slots"]
+    indexed_search = (
+        ("subject", "courses.Subject"),
+        ("instructor__user", "accounts.User"),
+    )
+    autocomplete_fields = ("instructor",)
+    # Sĩ số chỉ do đăng ký/hủy đăng ký cập nhật, không sửa tay
+    readonly_fields = ("created_at", "updated_at", "enrolled_total", "available_slots")
+    list_select_related = ("subject", "instructor__user", "academic_year")
 
     fieldsets = [
         (
@@ -140,10 +320,255 @@ class CourseAdmin(admin.ModelAdmin):
         ("Trạng thái", {"fields": ["status", "is_active", "notes"]}),
         (
             "Thống kê",
-            {"fields": ["enrolled_count", "available_slots"], "classes": ["collapse"]},
+            {"fields": ["enrolled_total", "available_slots"], "classes": ["collapse"]},
         ),
         ("Metadata", {"fields": ["created_at", "updated_at"], "classes": ["collapse"]}),
     ]
+    actions = ("recompute_grades", "clone_courses")
+
+    @admin.action(description="Tính lại điểm tổng kết")
+    def recompute_grades(self, request, queryset):
+        changed = grading.recompute_grades(queryset.values_list("pk", flat=True))
+        self.message_user(request, f"Đã cập nhật {changed} điểm.")
+
+    @admin.action(description="Sao chép sang năm học khác", permissions=["add"])
+    def clone_courses(self, request, queryset):
+        form = CloneCoursesForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            shift_days = form.cleaned_data["shift_days"]
+            result = cloning.clone_courses(
+                queryset,
+                form.cleaned_data["target_year"],
+                shift=timedelta(days=shift_days) if shift_days is not None else None,
+                on_conflict=form.cleaned_data["on_conflict"],
+            )
+            self.message_user(
+                request,
+                f"Đã tạo {result.created} lớp, cập nhật {result.updated} lớp, "
+                f"bỏ qua {result.skipped} lớp.",
+                messages.SUCCESS,
+            )
+            return None
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Sao chép lớp học sang năm học khác",
+            "form": form,
+            "courses": queryset.select_related("subject", "academic_year"),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, "admin/courses/course/clone.html", context)
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/attendance/",
+                self.admin_site.admin_view(self.attendance_view),
+                name="courses_course_attendance",
+            ),
+            path(
+                "<path:object_id>/grades/",
+                self.admin_site.admin_view(self.gradebook_view),
+                name="courses_course_grades",
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description="Điểm danh")
+    def attendance_link(self, obj):
+        return format_html(
+            '<a href="{}">Điểm danh</a>',
+            reverse("admin:courses_course_attendance", args=[obj.pk]),
+        )
+
+    def attendance_view(self, request, object_id):
+        """Điểm danh cả lớp cho một buổi học và lưu trong một lần ghi"""
+        if not (
+            request.user.has_perm("courses.add_attendance")
+            and request.user.has_perm("courses.change_attendance")
+        ):
+            raise PermissionDenied
+        course = self.get_object(request, object_id)
+        if course is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+
+        session_form = AttendanceSessionForm(
+            request.GET or None,
+            initial={"date": timezone.localdate(), "session_number": 1},
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": f"Điểm danh: {course}",
+            "course": course,
+            "session_form": session_form,
+        }
+        if not session_form.is_valid():
+            return TemplateResponse(
+                request, "admin/courses/course/attendance.html", context
+            )
+
+        date = session_form.cleaned_data["date"]
+        session_number = session_form.cleaned_data["session_number"]
+        roster = get_roster(course, date, session_number)
+
+        if request.method == "POST":
+            formset = AttendanceFormSet(request.POST)
+            if formset.is_valid():
+                enrolled = {enrollment.student_id for enrollment, _ in roster}
+                entries = {
+                    form.cleaned_data["student"]: (
+                        form.cleaned_data["status"],
+                        form.cleaned_data["notes"],
+                    )
+                    for form in formset
+                    if form.cleaned_data.get("student") in enrolled
+                }
+                saved = record_attendance(
+                    course, date, session_number, entries, request.user
+                )
+                self.message_user(
+                    request,
+                    f"Đã lưu điểm danh cho {saved} chủng sinh.",
+                    messages.SUCCESS,
+                )
+                return redirect(request.get_full_path())
+        else:
+            formset = AttendanceFormSet(
+                initial=[
+                    {
+                        "student": enrollment.student_id,
+                        "status": attendance.status if attendance else "present",
+                        "notes": attendance.notes if attendance else "",
+                    }
+                    for enrollment, attendance in roster
+                ]
+            )
+
+        context.update(
+            {
+                "formset": formset,
+                "rows": zip(formset, [enrollment for enrollment, _ in roster]),
+            }
+        )
+        return TemplateResponse(
+            request, "admin/courses/course/attendance.html", context
+        )
+
+    @admin.display(description="Bảng điểm")
+    def grades_link(self, obj):
+        return format_html(
+            '<a href="{}">Nhập điểm</a>',
+            reverse("admin:courses_course_grades", args=[obj.pk]),
+        )
+
+    def gradebook_view(self, request, object_id):
+        """Nhập điểm cả lớp theo trang, lưu các ô đã sửa trong một lần ghi"""
+        if not request.user.has_perm("courses.change_enrollment"):
+            raise PermissionDenied
+        course = self.get_object(request, object_id)
+        if course is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+
+        filter_form = GradebookFilterForm(request.GET)
+        filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+        rows = gradebook_rows(course, filters.get("status"), filters.get("q", ""))
+        page = Paginator(rows, PAGE_SIZE).get_page(request.GET.get("page"))
+        filter_query = request.GET.copy()
+        filter_query.pop("page", None)
+
+        if request.method == "POST":
+            formset = GradeFormSet(request.POST)
+            if formset.is_valid():
+                changes = {
+                    form.cleaned_data["enrollment"]: (
+                        form.cleaned_data["updated_at"],
+                        {
+                            field: form.cleaned_data[field]
+                            for field in SCORE_FIELDS
+                            if field in form.changed_data
+                        },
+                    )
+                    for form in formset
+                    if not set(SCORE_FIELDS).isdisjoint(form.changed_data)
+                }
+                try:
+                    saved = save_grades(course, changes)
+                except StaleGradesError as error:
+                    formset = self._stale_grades_formset(formset, error)
+                    self.message_user(
+                        request,
+                        f"Chưa lưu: {error} Kiểm tra lại các dòng được đánh dấu "
+                        "rồi lưu lại để ghi đè.",
+                        messages.ERROR,
+                    )
+                else:
+                    self.message_user(
+                        request,
+                        f"Đã lưu điểm cho {saved} chủng sinh.",
+                        messages.SUCCESS,
+                    )
+                    return redirect(request.get_full_path())
+            # Hiển thị đúng các dòng đã gửi lên, kể cả khi danh sách lớp vừa đổi
+            enrollments = rows.in_bulk([_row_enrollment(form) for form in formset])
+        else:
+            formset = GradeFormSet(
+                initial=[
+                    {
+                        "enrollment": enrollment.pk,
+                        "updated_at": enrollment.updated_at,
+                        **{field: getattr(enrollment, field) for field in SCORE_FIELDS},
+                    }
+                    for enrollment in page
+                ]
+            )
+            enrollments = {enrollment.pk: enrollment for enrollment in page}
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": f"Bảng điểm: {course}",
+            "course": course,
+            "filter_form": filter_form,
+            "filter_query": filter_query.urlencode(),
+            "page": page,
+            "page_range": page.paginator.get_elided_page_range(page.number),
+            "formset": formset,
+            "rows": [
+                (form, enrollments.get(_row_enrollment(form))) for form in formset
+            ],
+        }
+        return TemplateResponse(request, "admin/courses/course/grades.html", context)
+
+    def _stale_grades_formset(self, formset, error):
+        """Giữ điểm vừa nhập, báo điểm hiện tại của các dòng bị sửa chồng"""
+        # Ô chưa sửa nhận điểm hiện tại; updated_at và giá trị ban đầu cũng được
+        # cập nhật nên lưu lại lần nữa là cố ý ghi đè các ô đã sửa
+        data = formset.data.copy()
+        for form in formset:
+            enrollment = error.enrollments.get(_row_enrollment(form))
+            if enrollment is None:
+                continue
+            data[form.add_prefix("updated_at")] = enrollment.updated_at.isoformat()
+            for field in SCORE_FIELDS:
+                value = getattr(enrollment, field)
+                value = "" if value is None else value
+                data[form.add_initial_prefix(field)] = value
+                if field not in form.changed_data:
+                    data[form.add_prefix(field)] = value
+
+        formset = GradeFormSet(data)
+        formset.is_valid()
+        for form in formset:
+            enrollment = error.enrollments.get(_row_enrollment(form))
+            if enrollment is not None:
+                scores = [getattr(enrollment, field) for field in SCORE_FIELDS]
+                current = ", ".join(
+                    f"{form.fields[field].label.lower()} {'-' if score is None else score}"
+                    for field, score in zip(SCORE_FIELDS, scores)
+                )
+                form.add_error(None, f"Người khác vừa sửa điểm dòng này: {current}.")
+        return formset
 
     @admin.display(description="Số sinh viên đã đăng ký")
     def enrolled_count(self, obj):
@@ -159,14 +584,18 @@ class CourseAdmin(admin.ModelAdmin):
         return count
 
 
-class EnrollmentInline(admin.TabularInline):
+class EnrollmentInline(StrSelectRelatedMixin, admin.TabularInline):
     model = Enrollment
     extra = 0
+    autocomplete_fields = ("student",)
+    str_select_related = ("student__user", "course__subject")
     readonly_fields = [
         "enrollment_date",
         "overall_score",
         "letter_grade",
         "attendance_rate",
+        "attendance_count",
+        "total_sessions",
     ]
     fields = [
         "student",
@@ -180,8 +609,29 @@ class EnrollmentInline(admin.TabularInline):
     ]
 
 
+class AssignmentSubmissionInline(StrSelectRelatedMixin, admin.TabularInline):
+    model = AssignmentSubmission
+    extra = 0
+    str_select_related = ("assignment", "enrollment__student__user")
+    fields = ("assignment", "score", "submitted_at", "feedback")
+    _course_id = None
+
+    def get_formset(self, request, obj=None, **kwargs):
+        # Chỉ cho chọn bài tập của lớp học đang xem
+        self._course_id = obj.course_id if obj is not None else None
+        return super().get_formset(request, obj, **kwargs)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "assignment" and self._course_id is not None:
+            kwargs["queryset"] = Assignment.objects.filter(
+                course_id=self._course_id
+            ).select_related("course__subject")
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(KeysetPaginationMixin, IndexedSearchMixin, AnnotatedModelAdmin):
+    inlines = (AssignmentSubmissionInline,)
     list_display = [
         "student",
         "course",
@@ -199,12 +649,31 @@ class EnrollmentAdmin(admin.ModelAdmin):
         "letter_grade",
     ]
     search_fields = [
+        "student__user__username",
         "student__user__first_name",
         "student__user__last_name",
-        "student__student_id",
         "course__subject__name",
     ]
-    readonly_fields = ["enrollment_date", "updated_at", "overall_score", "letter_grade"]
+    indexed_search = (
+        ("student__user", "accounts.User"),
+        ("course__subject", "courses.Subject"),
+    )
+    autocomplete_fields = ("student", "course")
+    str_select_related = ("student__user", "course__subject")
+    keyset_ordering = ("-enrollment_date", "-id")
+    list_select_related = (
+        "student__user",
+        "course__subject",
+        "course__academic_year",
+    )
+    readonly_fields = (
+        "enrollment_date",
+        "updated_at",
+        "overall_score",
+        "letter_grade",
+        "attendance_count",
+        "total_sessions",
+    )
 
     fieldsets = [
         (
@@ -215,7 +684,6 @@ class EnrollmentAdmin(admin.ModelAdmin):
             "Điểm số",
             {
                 "fields": [
-                    "assignment_scores",
                     "midterm_score",
                     "final_score",
                     "overall_score",
@@ -239,20 +707,22 @@ class EnrollmentAdmin(admin.ModelAdmin):
         rate = obj.attendance_rate
         if rate < 50:
             return format_html(
-                '<span style="color: red; font-weight: bold;">{:.1f}%</span>', rate
+                '<span style="color: red; font-weight: bold;">{}</span>', f"{rate:.1f}%"
             )
         elif rate < 80:
             return format_html(
-                '<span style="color: orange; font-weight: bold;">{:.1f}%</span>', rate
+                '<span style="color: orange; font-weight: bold;">{}</span>',
+                f"{rate:.1f}%",
             )
         else:
             return format_html(
-                '<span style="color: green; font-weight: bold;">{:.1f}%</span>', rate
+                '<span style="color: green; font-weight: bold;">{}</span>',
+                f"{rate:.1f}%",
             )
 
 
 @admin.register(Assignment)
-class AssignmentAdmin(admin.ModelAdmin):
+class AssignmentAdmin(AnnotatedModelAdmin):
     list_display = [
         "title",
         "course",
@@ -264,7 +734,10 @@ class AssignmentAdmin(admin.ModelAdmin):
     ]
     list_filter = ["type", "course__academic_year", "course__semester", "is_active"]
     search_fields = ["title", "course__subject__name", "course__class_code"]
+    autocomplete_fields = ("course",)
+    str_select_related = ("course__subject",)
     readonly_fields = ["assigned_date", "created_at"]
+    list_select_related = ("course__subject", "course__academic_year")
 
     fieldsets = [
         ("Thông tin cơ bản", {"fields": ["course", "title", "type", "description"]}),
@@ -276,7 +749,7 @@ class AssignmentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(KeysetPaginationMixin, IndexedSearchMixin, AnnotatedModelAdmin):
     list_display = [
         "student",
         "course",
@@ -291,8 +764,21 @@ class AttendanceAdmin(admin.ModelAdmin):
         "student__user__last_name",
         "course__subject__name",
     ]
+    indexed_search = (
+        ("student__user", "accounts.User"),
+        ("course__subject", "courses.Subject"),
+    )
+    autocomplete_fields = ("course", "student", "recorded_by")
+    str_select_related = ("student__user", "course__subject")
     readonly_fields = ["created_at"]
+    list_select_related = (
+        "student__user",
+        "course__subject",
+        "course__academic_year",
+        "recorded_by",
+    )
     date_hierarchy = "date"
+    keyset_ordering = ("-date", "-id")
 
     fieldsets = [
         (
@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Attendance, Enrollment
+
+UNIQUE_FIELDS = ["course", "student", "date", "session_number"]
+
+
+def get_roster(course, date, session_number):
+    """
+    Enrolled students of `course` with their attendance for one session.
+
+    Returns a list of (enrollment, attendance or None) ordered by name, using
+    one query for the roster and one for the session's attendance rows.
+    """
+    enrollments = (
+        Enrollment.objects.filter(course=course, status="enrolled")
+        .select_related("student__user")
+        .order_by("student__user__last_name", "student__user__first_name")
+    )
+    existing = {
+        attendance.student_id: attendance
+        for attendance in Attendance.objects.filter(
+            course=course, date=date, session_number=session_number
+        )
+    }
+    return [
+        (enrollment, existing.get(enrollment.student_id)) for enrollment in enrollments
+    ]
+
+
+def record_attendance(course, date, session_number, entries, recorded_by):
+    """
+    Save attendance for a whole roster in one transaction.
+
+    `entries` maps student_id to (status, notes). All rows are written with a
+    single INSERT ... ON CONFLICT upsert on the unique (course, student, date,
+    session_number) key, and the Enrollment attendance counters are moved by
+    the resulting deltas with at most one UPDATE per kind of change. Returns
+    the number of rows written.
+    """
+    rows = [
+        Attendance(
+            course=course,
+            student_id=student_id,
+            date=date,
+            session_number=session_number,
+            status=status,
+            notes=notes,
+            recorded_by=recorded_by,
+        )
+        for student_id, (status, notes) in entries.items()
+    ]
+    with transaction.atomic():
+        # bulk_create bỏ qua Attendance.save(), nên tự tính thay đổi số buổi.
+        # Khóa các đăng ký trước để hai lần lưu đồng thời không cộng trùng.
+        list(
+            Enrollment.objects.select_for_update()
+            .filter(course=course, student_id__in=entries)
+            .values_list("pk", flat=True)
+        )
+        previous = dict(
+            Attendance.objects.filter(
+                course=course,
+                date=date,
+                session_number=session_number,
+                student_id__in=entries,
+            ).values_list("student_id", "status")
+        )
+        Attendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=UNIQUE_FIELDS,
+            update_fields=["status", "notes", "recorded_by"],
+        )
+
+        students_by_delta = defaultdict(list)
+        for student_id, (status, _) in entries.items():
+            attended = status in Attendance.ATTENDED_STATUSES
+            if student_id not in previous:
+                delta = (1, int(attended))
+            else:
+                delta = (
+                    0,
+                    attended - (previous[student_id] in Attendance.ATTENDED_STATUSES),
+                )
+            if delta != (0, 0):
+                students_by_delta[delta].append(student_id)
+        for (total, present), student_ids in students_by_delta.items():
+            Enrollment.objects.filter(course=course, student_id__in=student_ids).update(
+                total_sessions=F("total_sessions") + total,
+                attendance_count=F("attendance_count") + present,
+            )
+    return len(rows)
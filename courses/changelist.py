@@ -0,0 +1,244 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Min, Q
+
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+CURSOR_VARS = (AFTER_VAR, BEFORE_VAR)
+
+# Danh sách có lọc chỉ đếm tới ngưỡng này rồi hiện "hơn N"
+COUNT_LIMIT = 10000
+TABLE_COUNT_TIMEOUT = 60 * 5
+
+
+def table_count(model):
+    """
+    Estimated number of rows in `model`'s table: the planner statistics
+    (pg_class.reltuples) on PostgreSQL, a COUNT(*) cached for a few minutes
+    elsewhere or when the table has never been analyzed.
+    """
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            row = cursor.fetchone()
+        # reltuples là -1 khi bảng chưa từng được ANALYZE
+        if row and row[0] >= 0:
+            return row[0]
+    return cache.get_or_set(
+        f"changelist:count:{table}", model._default_manager.count, TABLE_COUNT_TIMEOUT
+    )
+
+
+def estimated_count(queryset):
+    """
+    Number of rows of a changelist query as (count, precision).
+
+    Unfiltered queries use table_count() ("estimate"); filtered ones count
+    at most COUNT_LIMIT + 1 rows, so the cost stays bounded however many
+    match ("exact", or "at_least" when the limit was reached).
+    """
+    if not queryset.query.where:
+        return table_count(queryset.model), "estimate"
+    count = queryset.order_by()[: COUNT_LIMIT + 1].count()
+    if count > COUNT_LIMIT:
+        return COUNT_LIMIT, "at_least"
+    return count, "exact"
+
+
+def encode_cursor(values):
+    values = [
+        value.isoformat() if hasattr(value, "isoformat") else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(token, fields):
+    values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError(token)
+    return [field.to_python(value) for field, value in zip(fields, values)]
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """
+    Rows that come after `values` in `ordering` (before them when
+    `reverse`), e.g. date < d OR (date = d AND id < i) for ("-date", "-id").
+    The extra bound on the first field lets the database answer it with a
+    range scan of the (date, id) index.
+    """
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        field = name.lstrip("-")
+        descending = name.startswith("-") != reverse
+        condition |= Q(**equal, **{f"{field}__{'lt' if descending else 'gt'}": value})
+        equal[field] = value
+    first = ordering[0].lstrip("-")
+    descending = ordering[0].startswith("-") != reverse
+    return Q(**{f"{first}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+
+def _next_date(value, kind):
+    if kind == "year":
+        return datetime.date(value.year + 1, 1, 1)
+    if kind == "month":
+        return datetime.date(value.year + value.month // 12, value.month % 12 + 1, 1)
+    return value + datetime.timedelta(days=1)
+
+
+def _starting_from(queryset, field_name, start):
+    lower_bound = {f"{field_name}__gte": start}
+    if queryset.query.distinct:
+        return queryset.filter(**lower_bound)
+    # Cận dưới mới phải đứng trước cận của bộ lọc ngày: SQLite chỉ dùng cận
+    # đầu tiên của cột để dò chỉ mục, PostgreSQL tự chọn cận chặt nhất
+    return queryset.model._default_manager.filter(**lower_bound) & queryset
+
+
+def distinct_dates(queryset, field_name, kind):
+    """
+    Distinct years, months or days of a DateField, like QuerySet.dates().
+
+    Instead of SELECT DISTINCT over every row, each value is found with one
+    MIN() seek from the end of the previous one (a loose index scan), so the
+    cost follows the number of values shown, not the number of rows.
+    """
+    dates = []
+    current = queryset.aggregate(first=Min(field_name))["first"]
+    while current is not None:
+        if kind == "year":
+            current = datetime.date(current.year, 1, 1)
+        elif kind == "month":
+            current = datetime.date(current.year, current.month, 1)
+        dates.append(current)
+        current = _starting_from(
+            queryset, field_name, _next_date(current, kind)
+        ).aggregate(first=Min(field_name))["first"]
+    return dates
+
+
+class IndexedDates:
+    """Bọc queryset cho thẻ date_hierarchy của admin, thay dates() bằng distinct_dates()"""
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def aggregate(self, **aggregates):
+        # Mỗi MIN/MAX một truy vấn để cơ sở dữ liệu chỉ đọc một đầu chỉ mục
+        return {
+            name: self.queryset.aggregate(**{name: aggregate})[name]
+            for name, aggregate in aggregates.items()
+        }
+
+    def dates(self, field_name, kind, order="ASC"):
+        return distinct_dates(self.queryset, field_name, kind)
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList for high-volume tables.
+
+    Rows are paged with a cursor on the admin's `keyset_ordering` (e.g.
+    date, id) instead of OFFSET, so any page costs the same as the first;
+    only previous / next links are offered. Counts come from
+    estimated_count() instead of exact COUNT(*) queries. The page is a list,
+    so list_editable is not supported.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for name in CURSOR_VARS:
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Đổi bộ lọc, tìm kiếm hay ngày thì quay về trang đầu
+        return super().get_query_string(new_params, [*(remove or []), *CURSOR_VARS])
+
+    def get_ordering(self, request, queryset):
+        return list(self.model_admin.keyset_ordering)
+
+    def get_results(self, request):
+        ordering = list(self.model_admin.keyset_ordering)
+        fields = [
+            self.lookup_opts.pk
+            if name.lstrip("-") == "pk"
+            else self.lookup_opts.get_field(name.lstrip("-"))
+            for name in ordering
+        ]
+        per_page = self.list_per_page
+        after = request.GET.get(AFTER_VAR)
+        before = request.GET.get(BEFORE_VAR)
+        try:
+            if before:
+                cursor = decode_cursor(before, fields)
+                rows = list(
+                    self.queryset.filter(
+                        keyset_filter(ordering, cursor, reverse=True)
+                    ).reverse()[: per_page + 1]
+                )
+                has_previous, has_next = len(rows) > per_page, True
+                rows = rows[:per_page][::-1]
+            else:
+                queryset = self.queryset
+                if after:
+                    cursor = decode_cursor(after, fields)
+                    queryset = queryset.filter(keyset_filter(ordering, cursor))
+                rows = list(queryset[: per_page + 1])
+                has_previous, has_next = bool(after), len(rows) > per_page
+                rows = rows[:per_page]
+        except (ValueError, ValidationError, binascii.Error):
+            raise IncorrectLookupParameters
+
+        def cursor_of(row):
+            return encode_cursor([field.value_from_object(row) for field in fields])
+
+        self.result_count, self.count_precision = estimated_count(self.queryset)
+        self.full_result_count = (
+            table_count(self.model) if self.model_admin.show_full_result_count else None
+        )
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = bool(rows) or has_previous
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_previous or has_next
+        self.paginator = None
+        self.previous_url = (
+            self.get_query_string({BEFORE_VAR: cursor_of(rows[0])})
+            if has_previous and rows
+            else None
+        )
+        self.next_url = (
+            self.get_query_string({AFTER_VAR: cursor_of(rows[-1])})
+            if has_next and rows
+            else None
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Admin mixin switching a changelist to KeysetChangeList.
+
+    `keyset_ordering` must end with a unique field and be backed by an
+    index, e.g. ("-date", "-id") with Index(fields=["date", "id"]). Column
+    sorting is disabled since the cursor follows this ordering.
+    """
+
+    keyset_ordering = ("-pk",)
+    sortable_by = ()
+    change_list_template = "admin/keyset_change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
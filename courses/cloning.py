@@ -0,0 +1,139 @@
+from typing import NamedTuple
+
+from django.db import transaction
+
+from . import grading
+from .models import Course
+from .statistics import invalidate_statistics
+
+UNIQUE_FIELDS = ["subject", "academic_year", "semester", "class_code"]
+
+# Các trường được sao chép nguyên từ lớp gốc
+COPIED_FIELDS = [
+    "subject_id",
+    "semester",
+    "class_code",
+    "max_students",
+    "schedule",
+    "classroom",
+    "notes",
+    "attendance_required",
+    "midterm_weight",
+    "final_weight",
+    "assignment_weight",
+]
+
+# Các trường được ghi đè khi lớp đã tồn tại ở năm học đích (on_conflict="update")
+UPSERT_FIELDS = [
+    "instructor",
+    "max_students",
+    "schedule",
+    "classroom",
+    "notes",
+    "start_date",
+    "end_date",
+    "registration_start",
+    "registration_end",
+    "attendance_required",
+    "midterm_weight",
+    "final_weight",
+    "assignment_weight",
+    "updated_at",
+]
+
+CONFLICT_CHOICES = [
+    ("skip", "Bỏ qua lớp đã có"),
+    ("update", "Cập nhật lớp đã có"),
+]
+
+
+class CloneResult(NamedTuple):
+    created: int
+    updated: int
+    skipped: int
+
+
+def _shift(value, days):
+    return value + days if value is not None else None
+
+
+def clone_courses(
+    courses, target_year, instructor_map=None, shift=None, on_conflict="skip"
+):
+    """
+    Copy `courses` (a queryset, cancelled courses excluded) into `target_year`.
+
+    Subject, semester, class_code, capacity, schedule and grade weights are
+    kept; `instructor_map` ({teacher_id: teacher_id}) replaces instructors,
+    and dates are moved by `shift` (a timedelta, default: the gap between the
+    start dates of the source and target years). New courses start in
+    "planning" with no enrollments.
+
+    A course whose (subject, academic_year, semester, class_code) already
+    exists in the target year is skipped, or overwritten with
+    on_conflict="update" through one INSERT ... ON CONFLICT DO UPDATE.
+    Existing rows are looked up with one query and everything is written
+    with a single bulk_create.
+    """
+    instructor_map = instructor_map or {}
+    sources = list(
+        courses.exclude(status="cancelled")
+        .exclude(academic_year=target_year)
+        .select_related("academic_year")
+    )
+    existing = {
+        (subject_id, semester, class_code): pk
+        for pk, subject_id, semester, class_code in Course.objects.filter(
+            academic_year=target_year,
+            subject_id__in={course.subject_id for course in sources},
+        ).values_list("pk", "subject_id", "semester", "class_code")
+    }
+
+    clones = {}
+    for course in sources:
+        key = (course.subject_id, course.semester, course.class_code)
+        # Cùng một lớp từ nhiều năm nguồn: giữ bản đầu tiên
+        if key in clones or (on_conflict == "skip" and key in existing):
+            continue
+        days = (
+            shift
+            if shift is not None
+            else target_year.start_date - course.academic_year.start_date
+        )
+        clone = Course(
+            academic_year=target_year,
+            instructor_id=instructor_map.get(
+                course.instructor_id, course.instructor_id
+            ),
+            start_date=course.start_date + days,
+            end_date=course.end_date + days,
+            registration_start=_shift(course.registration_start, days),
+            registration_end=_shift(course.registration_end, days),
+        )
+        for field in COPIED_FIELDS:
+            setattr(clone, field, getattr(course, field))
+        clones[key] = clone
+
+    updated = [pk for key, pk in existing.items() if key in clones]
+    with transaction.atomic():
+        if on_conflict == "update":
+            Course.objects.bulk_create(
+                clones.values(),
+                update_conflicts=True,
+                unique_fields=UNIQUE_FIELDS,
+                update_fields=UPSERT_FIELDS,
+            )
+        else:
+            Course.objects.bulk_create(clones.values(), ignore_conflicts=True)
+
+    if updated:
+        # bulk_create bỏ qua Course.save(): trọng số mới cần tính lại điểm
+        grading.recompute_grades(updated)
+    if clones:
+        invalidate_statistics()
+
+    return CloneResult(
+        created=len(clones) - len(updated),
+        updated=len(updated),
+        skipped=len(sources) - len(clones),
+    )
@@ -0,0 +1,68 @@
+from django.db.models import Count, Q
+
+from .models import Attendance, Course, Enrollment
+
+
+def reconcile_enrolled_totals():
+    """
+    Recount enrolled students for every course with one grouped query and fix
+    the stored Course.enrolled_total where it has drifted (e.g. after
+    bulk_create or queryset.update() on enrollments, which bypass save()).
+
+    Returns the number of courses that were corrected.
+    """
+    actual = dict(
+        Enrollment.objects.filter(status="enrolled")
+        .order_by()
+        .values("course_id")
+        .annotate(total=Count("id"))
+        .values_list("course_id", "total")
+    )
+
+    drifted = []
+    for course in Course.objects.only("id", "enrolled_total").iterator():
+        total = actual.get(course.pk, 0)
+        if course.enrolled_total != total:
+            course.enrolled_total = total
+            drifted.append(course)
+
+    Course.objects.bulk_update(drifted, ["enrolled_total"], batch_size=500)
+    return len(drifted)
+
+
+def rebuild_attendance_counts():
+    """
+    Recompute Enrollment.total_sessions and attendance_count from the
+    Attendance table with one grouped aggregate and bulk-update the
+    enrollments that differ. Returns the number of enrollments corrected.
+    """
+    actual = {
+        (row["course_id"], row["student_id"]): (row["total"], row["attended"])
+        for row in Attendance.objects.order_by()
+        .values("course_id", "student_id")
+        .annotate(
+            total=Count("id"),
+            attended=Count("id", filter=Q(status__in=Attendance.ATTENDED_STATUSES)),
+        )
+    }
+
+    drifted = []
+    enrollments = Enrollment.objects.only(
+        "id", "course_id", "student_id", "total_sessions", "attendance_count"
+    )
+    for enrollment in enrollments.iterator(chunk_size=2000):
+        total, attended = actual.get(
+            (enrollment.course_id, enrollment.student_id), (0, 0)
+        )
+        if (enrollment.total_sessions, enrollment.attendance_count) != (
+            total,
+            attended,
+        ):
+            enrollment.total_sessions = total
+            enrollment.attendance_count = attended
+            drifted.append(enrollment)
+
+    Enrollment.objects.bulk_update(
+        drifted, ["total_sessions", "attendance_count"], batch_size=500
+    )
+    return len(drifted)
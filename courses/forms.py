@@ -0,0 +1,108 @@
+from django import forms
+
+from .cloning import CONFLICT_CHOICES
+from .models import AcademicYear, Attendance, Course, Enrollment, Subject
+from .prerequisites import PrerequisiteCycleError, would_create_cycle
+
+
+class SubjectAdminForm(forms.ModelForm):
+    class Meta:
+        model = Subject
+        fields = "__all__"
+
+    def clean_prerequisites(self):
+        prerequisites = self.cleaned_data["prerequisites"]
+        if not self.instance.pk:
+            return prerequisites
+        try:
+            cyclic = would_create_cycle(
+                self.instance.pk, [subject.pk for subject in prerequisites]
+            )
+        except PrerequisiteCycleError as error:
+            raise forms.ValidationError(str(error))
+        if cyclic:
+            raise forms.ValidationError("Môn tiên quyết tạo thành vòng lặp.")
+        return prerequisites
+
+
+class AttendanceSessionForm(forms.Form):
+    date = forms.DateField(
+        label="Ngày học", widget=forms.DateInput(attrs={"type": "date"})
+    )
+    session_number = forms.IntegerField(label="Buổi học số", min_value=1)
+
+
+class AttendanceRowForm(forms.Form):
+    student = forms.IntegerField(widget=forms.HiddenInput)
+    status = forms.ChoiceField(
+        choices=Attendance.STATUS_CHOICES, label="Trạng thái", widget=forms.RadioSelect
+    )
+    notes = forms.CharField(required=False, label="Ghi chú")
+
+
+AttendanceFormSet = forms.formset_factory(AttendanceRowForm, extra=0)
+
+
+def _score_field(label):
+    # Ô chữ thay cho ô số để phím mũi tên dùng cho việc chuyển ô;
+    # giá trị ban đầu được gửi kèm để chỉ lưu những ô đã sửa
+    return forms.DecimalField(
+        label=label,
+        required=False,
+        min_value=0,
+        max_value=10,
+        max_digits=4,
+        decimal_places=2,
+        show_hidden_initial=True,
+        widget=forms.TextInput(
+            attrs={"inputmode": "decimal", "size": 5, "autocomplete": "off"}
+        ),
+    )
+
+
+class GradeRowForm(forms.Form):
+    enrollment = forms.IntegerField(widget=forms.HiddenInput)
+    # Thời điểm sửa cuối cùng lúc mở bảng điểm, để phát hiện sửa chồng
+    updated_at = forms.DateTimeField(widget=forms.HiddenInput)
+    midterm_score = _score_field("Điểm giữa kỳ")
+    final_score = _score_field("Điểm cuối kỳ")
+    participation_score = _score_field("Điểm tham gia")
+
+
+GradeFormSet = forms.formset_factory(GradeRowForm, extra=0)
+
+
+class GradebookFilterForm(forms.Form):
+    status = forms.ChoiceField(
+        choices=[("", "Tất cả")] + Enrollment.STATUS_CHOICES,
+        required=False,
+        label="Trạng thái",
+    )
+    q = forms.CharField(required=False, label="Tìm chủng sinh")
+
+
+class RankingFilterForm(forms.Form):
+    semester = forms.ChoiceField(
+        choices=[("", "Cả năm")] + Course.SEMESTER_CHOICES,
+        required=False,
+        label="Học kỳ",
+    )
+    cohort = forms.ChoiceField(
+        choices=[("current_year", "Năm hiện tại"), ("entry_year", "Năm nhập học")],
+        required=False,
+        label="Xếp hạng theo",
+    )
+
+
+class CloneCoursesForm(forms.Form):
+    target_year = forms.ModelChoiceField(
+        queryset=AcademicYear.objects.all(), label="Sang năm học"
+    )
+    shift_days = forms.IntegerField(
+        required=False,
+        label="Dời ngày (số ngày)",
+        help_text="Để trống: theo khoảng cách ngày bắt đầu giữa hai năm học.",
+    )
+    on_conflict = forms.ChoiceField(
+        choices=CONFLICT_CHOICES, initial="skip", label="Lớp đã tồn tại"
+    )
@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Enrollment,
+    assignment_averages,
+    calculate_letter_grade,
+    calculate_overall_score,
+)
+from .statistics import invalidate_statistics
+from .transcripts import invalidate_transcripts
+
+SCORE_FIELDS = ["midterm_score", "final_score", "participation_score"]
+PAGE_SIZE = 50
+
+
+class StaleGradesError(Exception):
+    """Điểm đã bị người khác sửa sau khi bảng điểm được mở"""
+
+    def __init__(self, enrollments):
+        self.enrollments = enrollments  # {enrollment_id: enrollment hiện tại}
+        super().__init__(
+            f"{len(enrollments)} chủng sinh đã được người khác cập nhật điểm."
+        )
+
+
+def gradebook_rows(course, status=None, search=""):
+    """Đăng ký của lớp cho bảng nhập điểm, sắp theo họ tên"""
+    enrollments = (
+        Enrollment.objects.filter(course=course)
+        .select_related("student__user")
+        .only(
+            "id",
+            "course_id",
+            "status",
+            "updated_at",
+            "overall_score",
+            "letter_grade",
+            *SCORE_FIELDS,
+            "student__user__username",
+            "student__user__first_name",
+            "student__user__last_name",
+        )
+        .order_by("student__user__last_name", "student__user__first_name", "pk")
+    )
+    if status:
+        enrollments = enrollments.filter(status=status)
+    for word in search.split():
+        enrollments = enrollments.filter(
+            Q(student__user__username__icontains=word)
+            | Q(student__user__first_name__icontains=word)
+            | Q(student__user__last_name__icontains=word)
+        )
+    return enrollments
+
+
+def save_grades(course, changes):
+    """
+    Save a batch of grade edits for one course in a single transaction.
+
+    `changes` maps enrollment_id to (updated_at as seen by the editor,
+    {score field: value}). The rows are locked and their updated_at compared
+    first: if any was saved by someone else in the meantime nothing is
+    written and StaleGradesError lists the current rows. Otherwise overall
+    score and letter grade are recomputed in memory (assignment averages in
+    one query) and everything is written with one bulk_update. Returns the
+    number of enrollments updated.
+    """
+    if not changes:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        enrollments = list(
+            Enrollment.objects.select_for_update()
+            .filter(course=course, pk__in=changes)
+            .only(
+                "id",
+                "student_id",
+                "updated_at",
+                "overall_score",
+                "letter_grade",
+                *SCORE_FIELDS,
+            )
+        )
+        stale = {
+            enrollment.pk: enrollment
+            for enrollment in enrollments
+            if enrollment.updated_at != changes[enrollment.pk][0]
+        }
+        if stale:
+            raise StaleGradesError(stale)
+
+        averages = assignment_averages(enrollment.pk for enrollment in enrollments)
+        for enrollment in enrollments:
+            for field, value in changes[enrollment.pk][1].items():
+                setattr(enrollment, field, value)
+            # Như Enrollment.save(): chỉ tính lại khi đã có đủ điểm giữa và cuối kỳ
+            if (
+                enrollment.midterm_score is not None
+                and enrollment.final_score is not None
+            ):
+                enrollment.overall_score = calculate_overall_score(
+                    enrollment.midterm_score,
+                    enrollment.final_score,
+                    averages.get(enrollment.pk, 0),
+                    course.midterm_weight,
+                    course.final_weight,
+                    course.assignment_weight,
+                )
+                enrollment.letter_grade = calculate_letter_grade(
+                    enrollment.overall_score
+                )
+            enrollment.updated_at = now
+
+        Enrollment.objects.bulk_update(
+            enrollments,
+            [*SCORE_FIELDS, "overall_score", "letter_grade", "updated_at"],
+        )
+    invalidate_transcripts(enrollment.student_id for enrollment in enrollments)
+    invalidate_statistics()
+    return len(enrollments)
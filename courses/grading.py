@@ -0,0 +1,93 @@
+from itertools import batched
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Course,
+    Enrollment,
+    assignment_averages,
+    calculate_letter_grade,
+    calculate_overall_score,
+)
+from .statistics import invalidate_statistics
+from .transcripts import invalidate_transcripts
+
+RECOMPUTE_BATCH_SIZE = 500
+
+
+def recompute_grades(courses, enrollment_ids=None):
+    """
+    Recompute overall_score and letter_grade for every enrollment of the given
+    courses (a queryset, model instances or primary keys), or only for
+    `enrollment_ids` when given.
+
+    Weights are loaded once per course, enrollments are streamed with only
+    the score columns and assignment averages are aggregated in SQL per
+    batch, so the cost is a few SELECTs plus one UPDATE per batch of changed
+    rows regardless of class size. Returns the number of enrollments whose
+    stored grade changed.
+    """
+    course_ids = [getattr(course, "pk", course) for course in courses]
+    weights = {
+        pk: (midterm, final, assignment)
+        for pk, midterm, final, assignment in Course.objects.filter(
+            pk__in=course_ids
+        ).values_list("pk", *Course.GRADE_WEIGHT_FIELDS)
+    }
+    if not weights:
+        return 0
+
+    enrollments = (
+        Enrollment.objects.filter(
+            course_id__in=weights,
+            midterm_score__isnull=False,
+            final_score__isnull=False,
+        )
+        .only(
+            "id",
+            "course_id",
+            "student_id",
+            "midterm_score",
+            "final_score",
+            "overall_score",
+            "letter_grade",
+        )
+        .order_by()
+    )
+    if enrollment_ids is not None:
+        enrollments = enrollments.filter(pk__in=enrollment_ids)
+
+    changed = []
+    now = timezone.now()
+    for batch in batched(
+        enrollments.iterator(chunk_size=RECOMPUTE_BATCH_SIZE), RECOMPUTE_BATCH_SIZE
+    ):
+        averages = assignment_averages(enrollment.pk for enrollment in batch)
+        for enrollment in batch:
+            overall_score = calculate_overall_score(
+                enrollment.midterm_score,
+                enrollment.final_score,
+                averages.get(enrollment.pk, 0),
+                *weights[enrollment.course_id],
+            )
+            letter_grade = calculate_letter_grade(overall_score)
+            if (
+                enrollment.overall_score != overall_score
+                or enrollment.letter_grade != letter_grade
+            ):
+                enrollment.overall_score = overall_score
+                enrollment.letter_grade = letter_grade
+                enrollment.updated_at = now
+                changed.append(enrollment)
+
+    with transaction.atomic():
+        Enrollment.objects.bulk_update(
+            changed,
+            ["overall_score", "letter_grade", "updated_at"],
+            batch_size=RECOMPUTE_BATCH_SIZE,
+        )
+    invalidate_transcripts(enrollment.student_id for enrollment in changed)
+    if changed:
+        invalidate_statistics()
+    return len(changed)
@@ -0,0 +1,105 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import AcademicYear, Course
+from courses.reference import current_academic_year
+from courses.scheduling import (
+    DAYS,
+    TermSchedule,
+    describe_conflict,
+    format_time,
+    load_term_schedule,
+)
+
+
+class Command(BaseCommand):
+    help = "Kiểm tra trùng lịch phòng học, giảng viên và chủng sinh trong một học kỳ"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--academic-year", help="Tên năm học (mặc định: năm học hiện tại)"
+        )
+        parser.add_argument(
+            "--semester", choices=[choice for choice, _ in Course.SEMESTER_CHOICES]
+        )
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            metavar="SECTIONS",
+            help="Đo hiệu năng trên dữ liệu tổng hợp thay vì cơ sở dữ liệu",
+        )
+        parser.add_argument("--limit", type=int, default=50)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["synthetic"]:
+            term = self._synthetic_term(options["synthetic"])
+        else:
+            term = load_term_schedule(
+                self._academic_year(options["academic_year"]), options["semester"]
+            )
+        loaded = time.perf_counter()
+        conflicts = term.conflicts()
+        finished = time.perf_counter()
+
+        for course_id, messages in term.invalid.items():
+            self.stderr.write(
+                f"Lịch học không hợp lệ ({term.labels[course_id]}): {'; '.join(messages)}"
+            )
+        for conflict in conflicts[: options["limit"]]:
+            self.stdout.write(describe_conflict(conflict, term.labels))
+        if len(conflicts) > options["limit"]:
+            self.stdout.write(
+                f"... và {len(conflicts) - options['limit']} xung đột khác"
+            )
+
+        self.stdout.write(
+            f"{len(term.slots)} lớp, {len(conflicts)} xung đột. "
+            f"Tải dữ liệu {(loaded - started) * 1000:.0f} ms, "
+            f"kiểm tra {(finished - loaded) * 1000:.0f} ms."
+        )
+
+    def _academic_year(self, name):
+        if not name:
+            academic_year = current_academic_year()
+            if academic_year is None:
+                raise CommandError("Chưa đặt năm học hiện tại.")
+            return academic_year
+        try:
+            return AcademicYear.objects.get(name=name)
+        except AcademicYear.DoesNotExist:
+            raise CommandError("Không tìm thấy năm học.")
+
+    def _synthetic_term(self, sections):
+        rng = random.Random(0)
+        rooms = [f"P{number}" for number in range(max(1, sections // 10))]
+        courses = []
+        for course_id in range(1, sections + 1):
+            schedule = []
+            for day in rng.sample(DAYS[:6], 2):
+                start = rng.randrange(7 * 60, 17 * 60, 30)
+                schedule.append(
+                    {
+                        "day": day,
+                        "start": format_time(start),
+                        "end": format_time(start + 90),
+                        "room": rng.choice(rooms),
+                    }
+                )
+            courses.append(
+                (
+                    course_id,
+                    rng.randrange(sections // 4 + 1),
+                    schedule,
+                    "",
+                    f"L{course_id}",
+                )
+            )
+        enrollments = [
+            (student_id, rng.randrange(1, sections + 1))
+            for student_id in range(sections * 2)
+            for _ in range(6)
+        ]
+        return TermSchedule(courses, enrollments)
@@ -0,0 +1,131 @@
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from courses.changelist import AFTER_VAR, encode_cursor
+from courses.models import AcademicYear, Attendance, Course, Subject
+from students.models import Student
+from teachers.models import Teacher
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo trang danh sách điểm danh (trang đầu, trang xa, lọc theo ngày) trên "
+        "dữ liệu tổng hợp (mọi thay đổi được hoàn tác khi kết thúc)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=400)
+        parser.add_argument("--days", type=int, default=500)
+        parser.add_argument("--page", type=int, default=500)
+
+    def handle(self, *args, **options):
+        model_admin = admin.site._registry[Attendance]
+        with transaction.atomic():
+            tag = uuid.uuid4().hex[:8]
+            started = time.perf_counter()
+            user = self._create_dataset(tag, options["students"], options["days"])
+            self.stdout.write(
+                f"Tạo {Attendance.objects.count()} dòng điểm danh: "
+                f"{time.perf_counter() - started:.2f} s"
+            )
+
+            per_page = model_admin.list_per_page
+            offset = (options["page"] - 1) * per_page
+            ordering = model_admin.keyset_ordering
+            anchor = Attendance.objects.order_by(*ordering)[offset - 1 : offset].get()
+            cursor = encode_cursor([anchor.date, anchor.pk])
+
+            self._measure("Trang 1", model_admin, user, {})
+            self._measure(
+                f"Trang {options['page']} (theo khóa)",
+                model_admin,
+                user,
+                {AFTER_VAR: cursor},
+            )
+            self._measure(
+                f"Năm {anchor.date.year}",
+                model_admin,
+                user,
+                {"date__year": anchor.date.year},
+            )
+
+            # Cách cũ: OFFSET, COUNT(*) chính xác và SELECT DISTINCT theo ngày
+            started = time.perf_counter()
+            list(Attendance.objects.order_by(*ordering)[offset : offset + per_page])
+            Attendance.objects.count()
+            list(Attendance.objects.dates("date", "year"))
+            self.stdout.write(
+                f"OFFSET + COUNT + DISTINCT (chỉ truy vấn, trang {options['page']}): "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+            transaction.set_rollback(True)
+
+    def _measure(self, label, model_admin, user, params):
+        request = RequestFactory().get("/admin/courses/attendance/", params)
+        request.user = user
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            model_admin.changelist_view(request).render()
+            timings.append(time.perf_counter() - started)
+        self.stdout.write(f"{label}: tốt nhất {min(timings) * 1000:.1f} ms")
+
+    def _create_dataset(self, tag, student_count, days):
+        user = User.objects.create(
+            username=f"bc-{tag}", is_staff=True, is_superuser=True
+        )
+        year = AcademicYear.objects.create(
+            name=f"BC-{tag}", start_date=date(2090, 9, 1), end_date=date(2091, 6, 30)
+        )
+        teacher = Teacher.objects.create(
+            user=User.objects.create(username=f"bc-{tag}-gv", user_type="teacher"),
+            hire_date=date(2090, 9, 1),
+            position="lecturer",
+        )
+        course = Course.objects.create(
+            subject=Subject.objects.create(
+                code=f"BC-{tag}", name=f"Bench {tag}", category="general", credits=1
+            ),
+            instructor=teacher,
+            academic_year=year,
+            semester="fall",
+            class_code=f"BC-{tag}",
+            start_date=year.start_date,
+            end_date=year.end_date,
+        )
+        users = User.objects.bulk_create(
+            (
+                User(username=f"bc-{tag}-{i}", user_type="student")
+                for i in range(student_count)
+            ),
+            batch_size=2000,
+        )
+        students = Student.objects.bulk_create(
+            Student(user=user, entry_year=2090, current_year=1) for user in users
+        )
+        first_day = date(2090, 9, 1)
+        Attendance.objects.bulk_create(
+            (
+                Attendance(
+                    course=course,
+                    student=student,
+                    date=first_day + timedelta(days=day),
+                    session_number=1,
+                    status="present",
+                    recorded_by=user,
+                )
+                for day in range(days)
+                for student in students
+            ),
+            batch_size=5000,
+        )
+        return user
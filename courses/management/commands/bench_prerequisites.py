@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.prerequisites import compute_closure, eligible_subjects
+
+
+def naive_is_eligible(graph, subject_id, completed):
+    """Cách cũ: duyệt đệ quy môn tiên quyết cho từng lần kiểm tra"""
+    return all(
+        prerequisite_id in completed
+        and naive_is_eligible(graph, prerequisite_id, completed)
+        for prerequisite_id in graph.get(subject_id, ())
+    )
+
+
+class Command(BaseCommand):
+    help = "Đo hiệu năng kiểm tra môn tiên quyết trên danh mục môn học tổng hợp"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", type=int, default=1000)
+        parser.add_argument("--max-prerequisites", type=int, default=4)
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        subject_count = options["subjects"]
+
+        # Chỉ nối tới môn có chỉ số nhỏ hơn nên đồ thị luôn không có vòng lặp
+        edges = [
+            (subject_id, prerequisite_id)
+            for subject_id in range(1, subject_count)
+            for prerequisite_id in rng.sample(
+                range(subject_id),
+                min(subject_id, rng.randint(0, options["max_prerequisites"])),
+            )
+        ]
+        graph = {}
+        for subject_id, prerequisite_id in edges:
+            graph.setdefault(subject_id, set()).add(prerequisite_id)
+
+        started = time.perf_counter()
+        closure = compute_closure(edges)
+        closure_time = time.perf_counter() - started
+
+        prepared = {"closure": closure, "active": frozenset(range(subject_count))}
+        cohort = [
+            set(rng.sample(range(subject_count), rng.randint(0, subject_count // 4)))
+            for _ in range(options["students"])
+        ]
+
+        started = time.perf_counter()
+        fast = [eligible_subjects(completed, prepared) for completed in cohort]
+        fast_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        naive = [
+            {
+                subject_id
+                for subject_id in range(subject_count)
+                if subject_id not in completed
+                and naive_is_eligible(graph, subject_id, completed)
+            }
+            for completed in cohort
+        ]
+        naive_time = time.perf_counter() - started
+
+        if fast != naive:
+            self.stderr.write(self.style.ERROR("Kết quả hai cách tính khác nhau."))
+
+        self.stdout.write(
+            f"{subject_count} môn, {len(edges)} quan hệ tiên quyết, "
+            f"{options['students']} chủng sinh"
+        )
+        self.stdout.write(f"Tính bao đóng: {closure_time * 1000:.1f} ms")
+        self.stdout.write(
+            f"Kiểm tra theo bao đóng: {fast_time * 1000:.1f} ms "
+            f"({fast_time / len(cohort) * 1000:.2f} ms/chủng sinh)"
+        )
+        self.stdout.write(
+            f"Duyệt đệ quy: {naive_time * 1000:.1f} ms "
+            f"({naive_time / len(cohort) * 1000:.2f} ms/chủng sinh)"
+        )
@@ -0,0 +1,101 @@
+import time
+import uuid
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.models import AcademicYear
+from courses.rollover import FINAL_YEAR, rollover
+from students.models import Student
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo hiệu năng kết chuyển năm học trên dữ liệu tổng hợp "
+        "(mọi thay đổi được hoàn tác khi kết thúc)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help="Đo thêm cách cũ: lưu từng chủng sinh qua save()",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tag = uuid.uuid4().hex[:8]
+            started = time.perf_counter()
+            from_year, to_year = self._create_dataset(tag, options["students"])
+            self.stdout.write(
+                f"Tạo {options['students']} chủng sinh: "
+                f"{time.perf_counter() - started:.2f} s"
+            )
+
+            if options["baseline"]:
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    self._row_by_row()
+                    self.stdout.write(
+                        f"Từng dòng qua save(): {time.perf_counter() - started:.2f} s"
+                    )
+                    transaction.set_rollback(True)
+
+            started = time.perf_counter()
+            rollover(from_year, to_year, dry_run=True)
+            self.stdout.write(f"Chạy thử: {time.perf_counter() - started:.3f} s")
+
+            started = time.perf_counter()
+            result = rollover(from_year, to_year)
+            self.stdout.write(
+                f"Kết chuyển: {time.perf_counter() - started:.3f} s "
+                f"({result.promoted} lên năm, {result.graduated} tốt nghiệp)"
+            )
+
+            started = time.perf_counter()
+            again = rollover(from_year, to_year)
+            self.stdout.write(
+                f"Chạy lại: {time.perf_counter() - started:.3f} s "
+                f"(bỏ qua: {again.already_done})"
+            )
+            transaction.set_rollback(True)
+
+    def _create_dataset(self, tag, count):
+        from_year = AcademicYear.objects.create(
+            name=f"BR-{tag}-1",
+            start_date=date(2090, 9, 1),
+            end_date=date(2091, 6, 30),
+            is_current=True,
+        )
+        to_year = AcademicYear.objects.create(
+            name=f"BR-{tag}-2", start_date=date(2091, 9, 1), end_date=date(2092, 6, 30)
+        )
+        users = User.objects.bulk_create(
+            (User(username=f"br-{tag}-{i}", user_type="student") for i in range(count)),
+            batch_size=2000,
+        )
+        Student.objects.bulk_create(
+            (
+                Student(
+                    user=user,
+                    entry_year=2090 - i % FINAL_YEAR,
+                    current_year=1 + i % FINAL_YEAR,
+                )
+                for i, user in enumerate(users)
+            ),
+            batch_size=2000,
+        )
+        return from_year, to_year
+
+    def _row_by_row(self):
+        for student in Student.objects.filter(status="active").select_related("user"):
+            if student.current_year >= FINAL_YEAR:
+                student.status = "graduated"
+            else:
+                student.current_year += 1
+            student.save()
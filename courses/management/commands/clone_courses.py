@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.cloning import CONFLICT_CHOICES, clone_courses
+from courses.models import AcademicYear, Course
+from teachers.models import Teacher
+
+
+class Command(BaseCommand):
+    help = "Sao chép các lớp học của một năm học (hoặc một học kỳ) sang năm học khác"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source_year", help="Tên năm học nguồn")
+        parser.add_argument("target_year", help="Tên năm học đích")
+        parser.add_argument(
+            "--semester", choices=[choice for choice, _ in Course.SEMESTER_CHOICES]
+        )
+        parser.add_argument(
+            "--instructor",
+            action="append",
+            default=[],
+            metavar="CŨ:MỚI",
+            help="Đổi giảng viên theo tên đăng nhập, có thể lặp lại",
+        )
+        parser.add_argument(
+            "--shift-days",
+            type=int,
+            help="Số ngày dời lịch (mặc định: theo ngày bắt đầu của hai năm học)",
+        )
+        parser.add_argument(
+            "--on-conflict",
+            choices=[choice for choice, _ in CONFLICT_CHOICES],
+            default="skip",
+        )
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.in_bulk(
+            [options["source_year"], options["target_year"]], field_name="name"
+        )
+        for name in (options["source_year"], options["target_year"]):
+            if name not in years:
+                raise CommandError(f"Không tìm thấy năm học {name}.")
+
+        courses = Course.objects.filter(academic_year=years[options["source_year"]])
+        if options["semester"]:
+            courses = courses.filter(semester=options["semester"])
+
+        shift = options["shift_days"]
+        result = clone_courses(
+            courses,
+            years[options["target_year"]],
+            instructor_map=self._instructor_map(options["instructor"]),
+            shift=timedelta(days=shift) if shift is not None else None,
+            on_conflict=options["on_conflict"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Đã tạo {result.created} lớp, cập nhật {result.updated} lớp, "
+                f"bỏ qua {result.skipped} lớp."
+            )
+        )
+
+    def _instructor_map(self, pairs):
+        pairs = [pair.split(":", 1) for pair in pairs]
+        if any(len(pair) != 2 for pair in pairs):
+            raise CommandError("--instructor phải có dạng CŨ:MỚI.")
+        usernames = {name for pair in pairs for name in pair}
+        teachers = dict(
+            Teacher.objects.filter(user__username__in=usernames).values_list(
+                "user__username", "pk"
+            )
+        )
+        missing = usernames - teachers.keys()
+        if missing:
+            raise CommandError(
+                f"Không tìm thấy giảng viên: {', '.join(sorted(missing))}."
+            )
+        return {teachers[old]: teachers[new] for old, new in pairs}
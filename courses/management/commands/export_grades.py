@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.exports import EXPORT_CHUNK_SIZE, iter_grade_csv
+from courses.models import AcademicYear, Course
+
+
+class Command(BaseCommand):
+    help = "Xuất điểm của mọi đăng ký trong một năm học ra CSV (ghi dần từng phần)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--academic-year", required=True, help="Tên năm học")
+        parser.add_argument(
+            "--semester", choices=[choice for choice, _ in Course.SEMESTER_CHOICES]
+        )
+        parser.add_argument("--output", help="Đường dẫn file CSV (mặc định: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        academic_years = AcademicYear.objects.filter(name=options["academic_year"])
+        if not academic_years.exists():
+            raise CommandError("Không tìm thấy năm học.")
+
+        lines = iter_grade_csv(
+            academic_years, options["semester"], options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
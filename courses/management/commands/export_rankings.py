@@ -0,0 +1,43 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import AcademicYear, Course
+from courses.rankings import COHORT_FIELDS, cohort_rankings
+
+COLUMNS = [
+    ("cohort", "Khóa"),
+    ("rank", "Hạng"),
+    ("dense_rank", "Hạng liên tục"),
+    ("percentile", "Phân vị"),
+    ("student__user__username", "Mã chủng sinh"),
+    ("student__user__last_name", "Họ"),
+    ("student__user__first_name", "Tên"),
+    ("score", "Điểm trung bình"),
+]
+
+
+class Command(BaseCommand):
+    help = "Xuất bảng xếp hạng chủng sinh theo khóa ra CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--academic-year", required=True, help="Tên năm học")
+        parser.add_argument(
+            "--semester", choices=[choice for choice, _ in Course.SEMESTER_CHOICES]
+        )
+        parser.add_argument(
+            "--cohort", choices=list(COHORT_FIELDS), default="current_year"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            academic_year = AcademicYear.objects.get(name=options["academic_year"])
+        except AcademicYear.DoesNotExist:
+            raise CommandError("Không tìm thấy năm học.")
+
+        writer = csv.writer(self.stdout)
+        writer.writerow([label for _, label in COLUMNS])
+        for row in cohort_rankings(
+            academic_year, options["semester"], options["cohort"]
+        ):
+            writer.writerow([row[key] for key, _ in COLUMNS])
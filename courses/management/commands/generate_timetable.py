@@ -0,0 +1,226 @@
+import random
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses.models import AcademicYear, Course
+from courses.reference import current_academic_year
+from courses.scheduling import TermSchedule, describe_conflict, parse_schedule
+from courses.timetable import (
+    DEFAULT_PERIODS,
+    DEFAULT_SESSION_LENGTH,
+    CourseSpec,
+    Room,
+    build_slots,
+    solve,
+    to_schedule,
+)
+
+
+def parse_room(value):
+    try:
+        name, capacity = value.rsplit(":", 1)
+        return Room(name.strip(), int(capacity))
+    except ValueError:
+        raise CommandError(f"Phòng không hợp lệ: {value!r} (định dạng TÊN:SỨC_CHỨA)")
+
+
+class Command(BaseCommand):
+    help = "Tự động xếp thời khóa biểu (thứ, giờ, phòng) cho các lớp của một học kỳ"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--academic-year", help="Tên năm học (mặc định: năm học hiện tại)"
+        )
+        parser.add_argument(
+            "--semester", choices=[choice for choice, _ in Course.SEMESTER_CHOICES]
+        )
+        parser.add_argument(
+            "--room",
+            action="append",
+            type=parse_room,
+            dest="rooms",
+            default=[],
+            help="Phòng học dạng TÊN:SỨC_CHỨA, có thể lặp lại",
+        )
+        parser.add_argument("--sessions", type=int, default=2, help="Số buổi mỗi tuần")
+        parser.add_argument(
+            "--periods", default=",".join(DEFAULT_PERIODS), help="Giờ bắt đầu các ca"
+        )
+        parser.add_argument(
+            "--session-length", type=int, default=DEFAULT_SESSION_LENGTH
+        )
+        parser.add_argument("--time-budget", type=float, default=5.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            nargs="+",
+            metavar="COURSES",
+            help="Đo thời gian và chất lượng trên dữ liệu tổng hợp các kích thước",
+        )
+
+    def handle(self, *args, **options):
+        slots = build_slots(
+            periods=options["periods"].split(","), length=options["session_length"]
+        )
+        if options["synthetic"]:
+            for size in options["synthetic"]:
+                courses, rooms = self._synthetic(size, options["sessions"])
+                self._report(size, solve(courses, rooms, slots, options["time_budget"]))
+            return
+
+        if not options["semester"]:
+            raise CommandError("Cần chọn học kỳ (--semester).")
+        if not options["rooms"]:
+            raise CommandError("Cần khai báo ít nhất một phòng học (--room).")
+
+        courses = list(
+            Course.objects.filter(
+                academic_year=self._academic_year(options["academic_year"]),
+                semester=options["semester"],
+                is_active=True,
+            )
+            .exclude(status="cancelled")
+            .select_related("subject")
+            .only(
+                "subject_id",
+                "subject__year_taught",
+                "instructor_id",
+                "max_students",
+                "schedule",
+                "classroom",
+                "class_code",
+            )
+        )
+        specs = [
+            CourseSpec(
+                course.pk,
+                course.subject_id,
+                course.instructor_id,
+                course.subject.year_taught,
+                course.max_students,
+                options["sessions"],
+            )
+            for course in courses
+        ]
+        # Lớp chưa xếp đủ buổi giữ nguyên lịch cũ thay vì bị xóa hoặc xếp dở;
+        # lịch cũ đó được giữ chỗ rồi xếp lại các lớp còn lại để không trùng
+        by_id = {course.pk: course for course in courses}
+        kept = {}
+        while True:
+            solution = solve(
+                [spec for spec in specs if spec.course_id not in kept],
+                options["rooms"],
+                slots,
+                options["time_budget"],
+                options["seed"],
+                fixed=[
+                    (spec, kept[spec.course_id])
+                    for spec in specs
+                    if spec.course_id in kept
+                ],
+            )
+            self._report(len(specs) - len(kept), solution)
+            if not solution.unplaced:
+                break
+            for course_id in solution.unplaced:
+                kept[course_id] = self._placements(by_id[course_id])
+
+        placed = [course for course in courses if course.pk not in kept]
+        skipped = [course for course in courses if course.pk in kept]
+        for course in placed:
+            placements = solution.assignments[course.pk]
+            course.schedule = to_schedule(placements)
+            course.classroom = placements[0][3] if placements else course.classroom
+        if skipped:
+            self.stderr.write(
+                f"Giữ lịch cũ cho {len(skipped)} lớp chưa xếp đủ buổi: "
+                + ", ".join(f"{course.class_code} (#{course.pk})" for course in skipped)
+            )
+
+        # bulk_update bỏ qua Course.clean(): kiểm tra lại toàn bộ học kỳ trước khi lưu
+        term = TermSchedule(
+            (
+                course.pk,
+                course.instructor_id,
+                course.schedule,
+                course.classroom,
+                course.class_code,
+            )
+            for course in courses
+        )
+        conflicts = []
+        for conflict in term.conflicts():
+            self.stderr.write(describe_conflict(conflict, term.labels))
+            if {conflict.first.course_id, conflict.second.course_id} - kept.keys():
+                conflicts.append(conflict)
+        # Xung đột chỉ giữa các lịch cũ được giữ nguyên thì đã có từ trước
+        if conflicts:
+            raise CommandError(
+                f"Lịch mới có {len(conflicts)} xung đột, không lưu thay đổi."
+            )
+
+        if options["dry_run"]:
+            self.stdout.write("Chạy thử: không lưu thay đổi.")
+            return
+        with transaction.atomic():
+            Course.objects.bulk_update(
+                placed, ["schedule", "classroom"], batch_size=500
+            )
+        self.stdout.write(self.style.SUCCESS(f"Đã lưu lịch học cho {len(placed)} lớp."))
+
+    def _academic_year(self, name):
+        if not name:
+            academic_year = current_academic_year()
+            if academic_year is None:
+                raise CommandError("Chưa đặt năm học hiện tại.")
+            return academic_year
+        try:
+            return AcademicYear.objects.get(name=name)
+        except AcademicYear.DoesNotExist:
+            raise CommandError("Không tìm thấy năm học.")
+
+    def _placements(self, course):
+        """Các buổi của lịch hiện tại dạng (day, start, end, room)"""
+        try:
+            slots = parse_schedule(course.schedule, course.pk, course.classroom)
+        except ValidationError:
+            # Lịch cũ không hợp lệ không chiếm khung giờ nào
+            return []
+        return [(slot.day, slot.start, slot.end, slot.room) for slot in slots]
+
+    def _synthetic(self, size, sessions):
+        # Mỗi môn có khoảng 4 lớp song song, mỗi khóa học khoảng 5 môn
+        rng = random.Random(size)
+        subjects = max(1, size // 4)
+        cohorts = max(1, subjects // 5)
+        courses = [
+            CourseSpec(
+                course_id,
+                course_id % subjects,
+                rng.randrange(max(1, size // 3)),
+                course_id % subjects % cohorts,
+                rng.choice([15, 20, 30, 40, 60]),
+                sessions,
+            )
+            for course_id in range(size)
+        ]
+        rooms = [
+            Room(f"P{number}", rng.choice([20, 30, 40, 60, 80]))
+            for number in range(max(2, size // 6))
+        ]
+        return courses, rooms
+
+    def _report(self, size, solution):
+        unplaced = sum(solution.unplaced.values())
+        self.stdout.write(
+            f"{size} lớp: {solution.elapsed * 1000:.0f} ms, "
+            f"{solution.iterations} lần thử, "
+            f"xếp được {solution.placed_ratio:.1%} buổi "
+            f"({unplaced} buổi chưa xếp, điểm phạt {solution.penalty})"
+        )
+        for course_id, missing in solution.unplaced.items():
+            self.stderr.write(f"Lớp #{course_id}: chưa xếp được {missing} buổi")
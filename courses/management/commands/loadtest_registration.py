@@ -0,0 +1,187 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.utils import timezone
+
+from courses.models import AcademicYear, Course, Enrollment, Subject
+from courses.registration import RegistrationError, register
+from students.models import Student
+from teachers.models import Teacher
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Kiểm tra tải đăng ký đồng thời: nhiều luồng cùng đăng ký một lớp, "
+        "xác nhận không vượt sĩ số và báo số lượt đăng ký mỗi giây"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=500)
+        parser.add_argument("--seats", type=int, default=100)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=2,
+            help="Số lần mỗi chủng sinh gửi yêu cầu (kiểm tra idempotency)",
+        )
+        parser.add_argument(
+            "--course-saves",
+            type=int,
+            default=0,
+            help=(
+                "Số lần lưu lại một bản sao cũ của lớp học trong lúc đăng ký "
+                "(như form admin mở từ trước), kiểm tra bộ đếm sĩ số không bị ghi đè"
+            ),
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Giữ lại dữ liệu tổng hợp"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise CommandError("Cần cơ sở dữ liệu dùng chung giữa các luồng.")
+
+        tag = uuid.uuid4().hex[:8]
+        course, student_ids = self._create_dataset(
+            tag, options["students"], options["seats"]
+        )
+        try:
+            results = self._run(course.pk, student_ids, options)
+            self._report(course, results, options)
+        finally:
+            if not options["keep"]:
+                self._cleanup(tag, course)
+
+    def _create_dataset(self, tag, student_count, seats):
+        today = timezone.localdate()
+        teacher = Teacher.objects.create(
+            user=User.objects.create(username=f"lt-{tag}-gv", user_type="teacher"),
+            hire_date=today,
+            position="lecturer",
+        )
+        course = Course.objects.create(
+            subject=Subject.objects.create(
+                code=f"LT-{tag}", name=f"Load test {tag}", category="general", credits=1
+            ),
+            instructor=teacher,
+            academic_year=AcademicYear.objects.create(
+                name=f"LT-{tag}", start_date=today, end_date=today + timedelta(days=90)
+            ),
+            semester="fall",
+            class_code=f"LT-{tag}",
+            max_students=seats,
+            start_date=today,
+            end_date=today + timedelta(days=90),
+            status="open_registration",
+        )
+        users = User.objects.bulk_create(
+            User(username=f"lt-{tag}-{i}", user_type="student")
+            for i in range(student_count)
+        )
+        students = Student.objects.bulk_create(
+            Student(user=user, entry_year=today.year, current_year=1) for user in users
+        )
+        return course, [student.pk for student in students]
+
+    def _run(self, course_id, student_ids, options):
+        requests = student_ids * options["repeat"]
+        chunks = [requests[i :: options["threads"]] for i in range(options["threads"])]
+        results = {
+            "created": 0,
+            "existing": 0,
+            "rejected": 0,
+            "errors": 0,
+            "saves": 0,
+        }
+        lock = threading.Lock()
+
+        def worker(chunk):
+            counts = dict.fromkeys(results, 0)
+            try:
+                for student_id in chunk:
+                    try:
+                        _, created = register(student_id, course_id)
+                        counts["created" if created else "existing"] += 1
+                    except RegistrationError:
+                        counts["rejected"] += 1
+                    except DatabaseError:
+                        counts["errors"] += 1
+            finally:
+                connections.close_all()
+            with lock:
+                for key, value in counts.items():
+                    results[key] += value
+
+        def save_course(stale, saves):
+            counts = dict.fromkeys(results, 0)
+            try:
+                for i in range(saves):
+                    stale.notes = f"Lưu lần {i + 1}"
+                    try:
+                        stale.save()
+                        counts["saves"] += 1
+                    except DatabaseError:
+                        counts["errors"] += 1
+            finally:
+                connections.close_all()
+            with lock:
+                for key, value in counts.items():
+                    results[key] += value
+
+        threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        if options["course_saves"]:
+            # Bản sao tải trước khi có đăng ký nên enrolled_total của nó đã cũ
+            stale = Course.objects.get(pk=course_id)
+            threads.append(
+                threading.Thread(
+                    target=save_course, args=(stale, options["course_saves"])
+                )
+            )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results["elapsed"] = time.perf_counter() - started
+        results["requests"] = len(requests)
+        return results
+
+    def _report(self, course, results, options):
+        course.refresh_from_db(fields=["enrolled_total"])
+        enrolled = Enrollment.objects.filter(course=course, status="enrolled").count()
+        self.stdout.write(
+            f"{connection.vendor}: {results['requests']} yêu cầu, "
+            f"{options['threads']} luồng, {results['elapsed']:.2f}s "
+            f"({results['requests'] / results['elapsed']:.0f} yêu cầu/s, "
+            f"{results['created'] / results['elapsed']:.0f} đăng ký/s)"
+        )
+        self.stdout.write(
+            f"Tạo mới: {results['created']}, đã có: {results['existing']}, "
+            f"từ chối: {results['rejected']}, lỗi: {results['errors']}, "
+            f"lưu lớp học: {results['saves']}"
+        )
+        self.stdout.write(
+            f"Sĩ số: {enrolled}/{course.max_students} (bộ đếm: {course.enrolled_total})"
+        )
+        if (
+            enrolled > course.max_students
+            or enrolled != course.enrolled_total
+            or enrolled != results["created"]
+        ):
+            raise CommandError("Phát hiện vượt sĩ số hoặc bộ đếm sai lệch.")
+        self.stdout.write(self.style.SUCCESS("Không có đăng ký vượt sĩ số."))
+
+    def _cleanup(self, tag, course):
+        subject, academic_year = course.subject, course.academic_year
+        course.delete()
+        subject.delete()
+        academic_year.delete()
+        User.objects.filter(username__startswith=f"lt-{tag}-").delete()
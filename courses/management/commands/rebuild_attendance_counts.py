@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from courses.counters import rebuild_attendance_counts
+
+
+class Command(BaseCommand):
+    help = "Tính lại số buổi học và số buổi có mặt của mọi đăng ký từ bảng điểm danh"
+
+    def handle(self, *args, **options):
+        corrected = rebuild_attendance_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f"Đã điều chỉnh số buổi của {corrected} đăng ký.")
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from courses.grading import recompute_grades
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Tính lại điểm tổng kết và điểm chữ cho các lớp học"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course", type=int, nargs="+", dest="course_ids", help="ID lớp học"
+        )
+        parser.add_argument("--academic-year", help="Tên năm học, VD: 2024-2025")
+        parser.add_argument(
+            "--semester", choices=[choice for choice, _ in Course.SEMESTER_CHOICES]
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options["course_ids"]:
+            courses = courses.filter(pk__in=options["course_ids"])
+        if options["academic_year"]:
+            courses = courses.filter(academic_year__name=options["academic_year"])
+        if options["semester"]:
+            courses = courses.filter(semester=options["semester"])
+
+        course_ids = list(courses.values_list("pk", flat=True))
+        changed = recompute_grades(course_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Đã cập nhật {changed} điểm trong {len(course_ids)} lớp học."
+            )
+        )
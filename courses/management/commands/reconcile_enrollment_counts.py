@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from courses.counters import reconcile_enrolled_totals
+
+
+class Command(BaseCommand):
+    help = "Đếm lại sĩ số đang học của tất cả lớp học"
+
+    def handle(self, *args, **options):
+        corrected = reconcile_enrolled_totals()
+        self.stdout.write(
+            self.style.SUCCESS(f"Đã điều chỉnh sĩ số của {corrected} lớp học.")
+        )
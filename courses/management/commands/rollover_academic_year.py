@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import AcademicYear
+from courses.rollover import RolloverError, rollover
+
+
+class Command(BaseCommand):
+    help = (
+        "Kết chuyển năm học: lên năm cho chủng sinh, tốt nghiệp năm cuối, "
+        "khóa năm học cũ và đặt năm học mới làm năm hiện tại"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("from_year", help="Tên năm học cũ, VD: 2024-2025")
+        parser.add_argument("to_year", help="Tên năm học mới, VD: 2025-2026")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Chỉ báo số lượng, không ghi"
+        )
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.in_bulk(
+            [options["from_year"], options["to_year"]], field_name="name"
+        )
+        for name in (options["from_year"], options["to_year"]):
+            if name not in years:
+                raise CommandError(f"Không tìm thấy năm học {name}.")
+
+        try:
+            result = rollover(
+                years[options["from_year"]],
+                years[options["to_year"]],
+                dry_run=options["dry_run"],
+                log=self.stdout.write,
+            )
+        except RolloverError as error:
+            raise CommandError(error)
+
+        if not result.dry_run and not result.already_done:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Đã kết chuyển: {result.promoted} lên năm, "
+                    f"{result.graduated} tốt nghiệp."
+                )
+            )
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_enrolled_total(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    enrolled = (
+        Enrollment.objects.filter(course=OuterRef('pk'), status='enrolled')
+        .order_by()
+        .values('course')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Course.objects.update(enrolled_total=Coalesce(Subquery(enrolled), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrolled_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sĩ số đang học'),
+        ),
+        migrations.RunPython(backfill_enrolled_total, migrations.RunPython.noop),
+    ]
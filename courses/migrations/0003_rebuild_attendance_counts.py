@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:10
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def rebuild_attendance_counts(apps, schema_editor):
+    # Số buổi trước đây được nhập tay; tính lại từ bảng điểm danh
+    Attendance = apps.get_model('courses', 'Attendance')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    attendances = (
+        Attendance.objects.filter(
+            course=OuterRef('course'), student=OuterRef('student')
+        )
+        .order_by()
+        .values('course', 'student')
+    )
+    Enrollment.objects.update(
+        total_sessions=Coalesce(
+            Subquery(attendances.annotate(total=Count('id')).values('total')), 0
+        ),
+        attendance_count=Coalesce(
+            Subquery(
+                attendances.annotate(
+                    total=Count('id', filter=Q(status__in=['present', 'late']))
+                ).values('total')
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_enrolled_total'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_attendance_counts, migrations.RunPython.noop),
+    ]
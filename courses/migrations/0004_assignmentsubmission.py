@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:44
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_rebuild_attendance_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='assignment_scores',
+            field=models.JSONField(blank=True, default=list, verbose_name='Điểm bài tập (cũ)'),
+        ),
+        migrations.CreateModel(
+            name='AssignmentSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Điểm')),
+                ('submitted_at', models.DateTimeField(blank=True, null=True, verbose_name='Ngày nộp')),
+                ('feedback', models.TextField(blank=True, verbose_name='Nhận xét')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='courses.assignment', verbose_name='Bài tập')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='courses.enrollment', verbose_name='Đăng ký')),
+            ],
+            options={
+                'verbose_name': 'Bài nộp',
+                'verbose_name_plural': 'Bài nộp',
+                'ordering': ['assignment__due_date'],
+                'indexes': [models.Index(condition=models.Q(('score__isnull', False)), fields=['enrollment', 'assignment'], name='courses_submission_graded_idx')],
+                'unique_together': {('assignment', 'enrollment')},
+            },
+        ),
+    ]
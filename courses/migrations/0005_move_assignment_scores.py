@@ -0,0 +1,154 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:44
+
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+SCORE_PRECISION = Decimal('0.01')
+# Giới hạn của Assignment.max_score (numeric(4,2)) và Assignment.weight (numeric(5,2))
+MAX_SCORE_LIMIT = Decimal('99.99')
+WEIGHT_LIMIT = Decimal('999.99')
+
+
+def _decimal(value):
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return number if number.is_finite() else None
+
+
+def _due_date(end_date):
+    return timezone.make_aware(
+        datetime.datetime.combine(end_date, datetime.time(23, 59)),
+        datetime.UTC,
+    )
+
+
+def move_assignment_scores(apps, schema_editor):
+    # Mỗi lô đăng ký được chuyển trong một giao dịch riêng. Nếu bị ngắt giữa
+    # chừng, chạy lại sẽ tiếp tục sau đăng ký cuối cùng đã có bài nộp.
+    Assignment = apps.get_model('courses', 'Assignment')
+    AssignmentSubmission = apps.get_model('courses', 'AssignmentSubmission')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    db = schema_editor.connection.alias
+
+    last_pk = (
+        AssignmentSubmission.objects.using(db).aggregate(last=Max('enrollment_id'))[
+            'last'
+        ]
+        or 0
+    )
+    enrollments = (
+        Enrollment.objects.using(db)
+        .exclude(assignment_scores=[])
+        .exclude(assignment_scores__isnull=True)
+        .order_by('pk')
+        .values_list('pk', 'course_id', 'course__end_date', 'assignment_scores')
+    )
+    skipped = []
+    while True:
+        batch = list(enrollments.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        with transaction.atomic(using=db):
+            skipped += _move_batch(Assignment, AssignmentSubmission, db, batch)
+        last_pk = batch[-1][0]
+
+    if skipped:
+        print(f'\n  Bỏ qua {len(skipped)} điểm bài tập cũ không chuyển được:')
+        for enrollment_id, index, reason in skipped:
+            print(f'    Đăng ký #{enrollment_id}, bài {index}: {reason}')
+
+
+def _move_batch(Assignment, AssignmentSubmission, db, batch):
+    assignments = {
+        (assignment.course_id, assignment.title): assignment
+        for assignment in Assignment.objects.using(db).filter(
+            course_id__in={course_id for _, course_id, _, _ in batch}
+        )
+    }
+
+    entries, skipped = [], []
+    for enrollment_id, course_id, end_date, scores in batch:
+        seen = set()
+        for index, entry in enumerate(scores if isinstance(scores, list) else [], 1):
+            if not isinstance(entry, dict):
+                skipped.append((enrollment_id, index, f'không phải bài tập: {entry!r}'))
+                continue
+            max_score = _decimal(entry.get('max'))
+            if max_score is None or max_score <= 0:
+                reason = f'điểm tối đa không hợp lệ: {entry.get("max")!r}'
+                skipped.append((enrollment_id, index, reason))
+                continue
+            if max_score > WEIGHT_LIMIT:
+                reason = f'điểm tối đa quá lớn: {entry.get("max")!r}'
+                skipped.append((enrollment_id, index, reason))
+                continue
+            title = str(entry.get('name') or f'Bài tập {index}')[:200]
+            # Hai bài trùng tên trong cùng một đăng ký vẫn là hai bài khác nhau
+            base, copy = title, 1
+            while title in seen:
+                copy += 1
+                title = f'{base[:190]} ({copy})'
+            seen.add(title)
+
+            if (course_id, title) not in assignments:
+                # Trọng số = điểm tối đa giữ nguyên cách tính cũ: Σđiểm / Σtối đa.
+                # Điểm tối đa vượt giới hạn cột (ví dụ thang 100) được quy về
+                # thang 10; điểm bài nộp được quy đổi theo bên dưới.
+                assignments[(course_id, title)] = Assignment(
+                    course_id=course_id,
+                    title=title,
+                    type='homework',
+                    description='',
+                    due_date=_due_date(end_date),
+                    max_score=(
+                        max_score if max_score <= MAX_SCORE_LIMIT else Decimal(10)
+                    ),
+                    weight=max_score,
+                )
+            entries.append(
+                (enrollment_id, (course_id, title), max_score, _decimal(entry.get('score')))
+            )
+
+    Assignment.objects.using(db).bulk_create(
+        [assignment for assignment in assignments.values() if assignment.pk is None]
+    )
+
+    submissions = []
+    for enrollment_id, key, max_score, score in entries:
+        assignment = assignments[key]
+        if score is not None:
+            # Quy về thang điểm của bài tập, không vượt quá điểm tối đa
+            score = min(
+                max(score * assignment.max_score / max_score, Decimal(0)),
+                assignment.max_score,
+            ).quantize(SCORE_PRECISION)
+        submissions.append(
+            AssignmentSubmission(
+                assignment_id=assignment.pk, enrollment_id=enrollment_id, score=score
+            )
+        )
+    AssignmentSubmission.objects.using(db).bulk_create(
+        submissions, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    return skipped
+
+
+class Migration(migrations.Migration):
+
+    # Không bọc cả migration trong một giao dịch để mỗi lô được commit riêng
+    atomic = False
+
+    dependencies = [
+        ('courses', '0004_assignmentsubmission'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_assignment_scores, migrations.RunPython.noop),
+    ]
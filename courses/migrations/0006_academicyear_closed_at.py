@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_move_assignment_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='academicyear',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Ngày kết chuyển'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_academicyear_closed_at'),
+        ('students', '0002_student_related_names'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'id'], name='courses_attendance_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrollment_date', 'id'], name='courses_enrollment_date_idx'),
+        ),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
+from decimal import Decimal
+from typing import ClassVar
+
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Cast
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -8,6 +14,116 @@ from teachers.models import Teacher
 
 User = get_user_model()
 
+SCORE_PRECISION = Decimal("0.01")
+
+# Thang điểm chữ: (điểm tối thiểu, điểm chữ), xếp giảm dần
+LETTER_GRADE_SCALE = [
+    (Decimal("9.0"), "A"),
+    (Decimal("8.5"), "B+"),
+    (Decimal("8.0"), "B"),
+    (Decimal("7.0"), "C+"),
+    (Decimal("6.0"), "C"),
+    (Decimal("5.0"), "D"),
+]
+
+
+def assignment_averages(enrollment_ids):
+    """
+    Điểm trung bình bài tập (thang điểm 10) của nhiều đăng ký trong một truy
+    vấn: mỗi bài được quy về tỷ lệ score / max_score và tính theo trọng số
+    Assignment.weight. Chỉ tính bài đã chấm của bài tập đang hoạt động.
+    """
+    # Ép kiểu sang số thực để SQLite không chia nguyên
+    normalized = (
+        Cast("score", models.FloatField())
+        * F("assignment__weight")
+        / F("assignment__max_score")
+    )
+    rows = (
+        AssignmentSubmission.objects.filter(
+            enrollment_id__in=list(enrollment_ids),
+            score__isnull=False,
+            assignment__is_active=True,
+            assignment__max_score__gt=0,
+            assignment__weight__gt=0,
+        )
+        .order_by()
+        .values("enrollment_id")
+        .annotate(
+            average=Sum(normalized, output_field=models.FloatField())
+            * 10
+            / Sum("assignment__weight", output_field=models.FloatField())
+        )
+        .values_list("enrollment_id", "average")
+    )
+    return {enrollment_id: Decimal(str(average)) for enrollment_id, average in rows}
+
+
+def calculate_overall_score(
+    midterm_score,
+    final_score,
+    assignment_avg,
+    midterm_weight,
+    final_weight,
+    assignment_weight,
+):
+    """Điểm tổng kết theo trọng số của lớp học"""
+    # Giá trị mặc định của DecimalField là float khi chưa lưu vào DB
+    scores = [
+        Decimal(str(value))
+        for value in (
+            midterm_score,
+            midterm_weight,
+            final_score,
+            final_weight,
+            assignment_avg,
+            assignment_weight,
+        )
+    ]
+    overall = sum(
+        score * weight / 100 for score, weight in zip(scores[::2], scores[1::2])
+    )
+    return overall.quantize(SCORE_PRECISION)
+
+
+def calculate_letter_grade(overall_score):
+    """Điểm chữ tương ứng với điểm tổng kết"""
+    if overall_score is None:
+        return ""
+
+    for threshold, letter in LETTER_GRADE_SCALE:
+        if overall_score >= threshold:
+            return letter
+    return "F"
+
+
+def counter_safe_save_kwargs(instance, counters, kwargs):
+    """
+    Keyword arguments for Model.save() that leave `counters` untouched.
+
+    Counter columns (and a few markers such as AcademicYear.closed_at) are
+    only changed by queryset updates elsewhere; writing back the value an
+    instance happened to load would undo the updates made since.
+    Updates of existing rows therefore get update_fields listing every other
+    loaded column. Inserts and saves that already pass update_fields (or
+    force_insert) are left as they are.
+    """
+    if (
+        instance._state.adding
+        or kwargs.get("force_insert")
+        or kwargs.get("update_fields") is not None
+    ):
+        return kwargs
+    deferred = instance.get_deferred_fields()
+    kwargs["update_fields"] = [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key
+        and field.name not in counters
+        and field.attname not in deferred
+    ]
+    return kwargs
+
 
 class AcademicYear(models.Model):
     """Năm học"""
@@ -18,6 +134,9 @@ class AcademicYear(models.Model):
     start_date = models.DateField(verbose_name="Ngày bắt đầu")
     end_date = models.DateField(verbose_name="Ngày kết thúc")
     is_current = models.BooleanField(default=False, verbose_name="Năm học hiện tại")
+    closed_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Ngày kết chuyển"
+    )  # đặt bởi courses.rollover khi chuyển sang năm học mới
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -29,11 +148,37 @@ class AcademicYear(models.Model):
     def __str__(self):
         return self.name
 
+    # Chỉ courses.rollover đặt (bằng update()), không ghi đè khi lưu năm học
+    ROLLOVER_FIELDS = frozenset({"closed_at"})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_current = instance.__dict__.get("is_current")
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None or "is_current" in fields:
+            self._loaded_current = self.__dict__.get("is_current")
+
     def save(self, *args, **kwargs):
-        if self.is_current:
-            # Chỉ có một năm học hiện tại
-            AcademicYear.objects.filter(is_current=True).update(is_current=False)
-        super().save(*args, **kwargs)
+        # Chỉ có một năm học hiện tại: bỏ cờ của các năm khác khi cờ vừa được
+        # bật. Cờ không đổi so với bản đã tải thì không ghi lại, để một bản
+        # cũ không kéo năm hiện tại về năm này sau khi đã đổi sang năm khác.
+        changed = self._state.adding or self.is_current != getattr(
+            self, "_loaded_current", None
+        )
+        untouched = self.ROLLOVER_FIELDS
+        if not changed:
+            untouched |= {"is_current"}
+        with transaction.atomic():
+            if changed and self.is_current:
+                AcademicYear.objects.filter(is_current=True).exclude(pk=self.pk).update(
+                    is_current=False
+                )
+            super().save(*args, **counter_safe_save_kwargs(self, untouched, kwargs))
+        self._loaded_current = self.is_current
 
 
 class Subject(models.Model):
@@ -111,7 +256,9 @@ class Subject(models.Model):
 
     @property
     def current_courses_count(self):
-        """Số lớp học hiện tại của môn này"""
+        """Số lớp học hiện tại của môn này (dùng giá trị annotate nếu có)"""
+        if hasattr(self, "active_courses_count"):
+            return self.active_courses_count
         return self.courses.filter(is_active=True).count()
 
 
@@ -209,6 +356,11 @@ class Course(models.Model):
         verbose_name="Trọng số bài tập (%)",
     )
 
+    # Sĩ số đang học, cập nhật theo Enrollment (xem Enrollment.save và signals)
+    enrolled_total = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Sĩ số đang học"
+    )
+
     is_active = models.BooleanField(default=True, verbose_name="Đang mở")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -220,15 +372,77 @@ class Course(models.Model):
         ordering = ["-academic_year", "semester", "subject__name"]
 
     def __str__(self):
-        return f"{self.subject.name} - {self.class_code} ({self.academic_year.name})"
+        from .reference import get_academic_year, get_subject
+
+        subject = get_subject(self.subject_id) or self.subject
+        academic_year = get_academic_year(self.academic_year_id) or self.academic_year
+        return f"{subject.name} - {self.class_code} ({academic_year.name})"
 
     def get_absolute_url(self):
         return reverse("courses:course_detail", kwargs={"pk": self.pk})
 
+    GRADE_WEIGHT_FIELDS = ("midterm_weight", "final_weight", "assignment_weight")
+
+    def clean(self):
+        from .scheduling import (
+            course_conflicts,
+            describe_conflict,
+            normalize_schedule,
+            parse_schedule,
+        )
+
+        # Chuẩn hóa lịch học và kiểm tra trùng phòng/giảng viên trong học kỳ
+        try:
+            slots = parse_schedule(self.schedule, self.pk, self.classroom)
+        except ValidationError as error:
+            raise ValidationError({"schedule": error.messages})
+        self.schedule = normalize_schedule(slots)
+
+        if self.academic_year_id and self.instructor_id and self.semester:
+            conflicts, labels = course_conflicts(self)
+            if conflicts:
+                raise ValidationError(
+                    {
+                        "schedule": [
+                            describe_conflict(conflict, labels)
+                            for conflict in conflicts
+                        ]
+                    }
+                )
+
+    # Chỉ cập nhật bằng F() (Enrollment và courses.registration), không ghi đè khi lưu
+    COUNTER_FIELDS = frozenset({"enrolled_total"})
+
+    def save(self, *args, **kwargs):
+        weights_changed = self._grade_weights_changed()
+        super().save(
+            *args, **counter_safe_save_kwargs(self, self.COUNTER_FIELDS, kwargs)
+        )
+        if weights_changed:
+            # Cập nhật lại điểm đã lưu khi trọng số thay đổi
+            from .grading import recompute_grades
+
+            recompute_grades([self.pk])
+
+    def _grade_weights_changed(self):
+        if self.pk is None:
+            return False
+        stored = (
+            Course.objects.filter(pk=self.pk)
+            .values_list(*self.GRADE_WEIGHT_FIELDS)
+            .first()
+        )
+        if stored is None:
+            return False
+        current = tuple(
+            Decimal(str(getattr(self, field))) for field in self.GRADE_WEIGHT_FIELDS
+        )
+        return stored != current
+
     @property
     def enrolled_count(self):
         """Số sinh viên đã đăng ký"""
-        return self.enrollments.filter(status="enrolled").count()
+        return self.enrolled_total
 
     @property
     def available_slots(self):
@@ -243,11 +457,19 @@ class Course(models.Model):
     @property
     def completion_rate(self):
         """Tỷ lệ hoàn thành"""
-        total = self.enrollments.count()
-        if total == 0:
+        counts = self.enrollments.aggregate(
+            total=models.Count("pk"),
+            completed=models.Count("pk", filter=models.Q(status="completed")),
+        )
+        if counts["total"] == 0:
             return 0
-        completed = self.enrollments.filter(status="completed").count()
-        return (completed / total) * 100
+        return (counts["completed"] / counts["total"]) * 100
+
+
+# Các trường ảnh hưởng đến sĩ số đang học của lớp
+SEAT_FIELDS = {"course", "course_id", "status"}
+# Các điểm thi nhập tay, điểm tổng kết được tính lại khi chúng thay đổi
+EXAM_SCORE_FIELDS = {"midterm_score", "final_score"}
 
 
 class Enrollment(models.Model):
@@ -275,9 +497,9 @@ class Enrollment(models.Model):
         auto_now_add=True, verbose_name="Ngày đăng ký"
     )
 
-    # Điểm số chi tiết
+    # Điểm số chi tiết. Dữ liệu cũ: điểm bài tập nay lưu ở AssignmentSubmission
     assignment_scores = models.JSONField(
-        default=list, blank=True, verbose_name="Điểm bài tập"
+        default=list, blank=True, verbose_name="Điểm bài tập (cũ)"
     )  # [{"name": "BT1", "score": 8.5, "max": 10}]
     midterm_score = models.DecimalField(
         max_digits=4,
@@ -304,7 +526,7 @@ class Enrollment(models.Model):
         max_length=5, blank=True, verbose_name="Điểm chữ"
     )  # A, B+, B, C+, C, D, F
 
-    # Đánh giá thêm
+    # Đánh giá thêm: cập nhật tự động từ Attendance (xem Attendance.save)
     attendance_count = models.IntegerField(default=0, verbose_name="Số buổi có mặt")
     total_sessions = models.IntegerField(default=0, verbose_name="Tổng số buổi học")
     participation_score = models.DecimalField(
@@ -338,64 +560,126 @@ class Enrollment(models.Model):
         verbose_name = "Đăng ký học"
         verbose_name_plural = "Đăng ký học"
         ordering = ["-enrollment_date"]
+        indexes = (
+            # Phân trang theo khóa (enrollment_date, id) trong admin
+            models.Index(
+                fields=["enrollment_date", "id"], name="courses_enrollment_date_idx"
+            ),
+        )
+
+    # Chỉ cập nhật bằng F() khi lưu Attendance, không ghi đè khi lưu đăng ký
+    COUNTER_FIELDS = frozenset({"attendance_count", "total_sessions"})
 
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.course.subject.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Ghi nhớ lớp và trạng thái đã lưu để cập nhật sĩ số khi chúng thay đổi
+        instance._loaded_seat = instance._current_seat()
+        # và điểm đã lưu để chỉ tính lại điểm tổng kết khi điểm thi thay đổi
+        instance._loaded_scores = instance._current_scores()
+        return instance
+
+    def _current_seat(self):
+        """(course_id, đang học) hoặc None nếu chưa tải trạng thái"""
+        if "status" not in self.__dict__ or "course_id" not in self.__dict__:
+            return None
+        return (self.course_id, self.status == "enrolled")
+
+    def _current_scores(self):
+        """(điểm giữa kỳ, điểm cuối kỳ) hoặc None nếu chưa tải"""
+        if not EXAM_SCORE_FIELDS <= self.__dict__.keys():
+            return None
+        return (self.midterm_score, self.final_score)
+
+    def _grade_needs_update(self):
+        # Điểm bài tập và trọng số thay đổi thì courses.grading tính lại
+        if self.midterm_score is None or self.final_score is None:
+            return False
+        return (
+            self._state.adding
+            or self.overall_score is None
+            or getattr(self, "_loaded_scores", None) != self._current_scores()
+        )
+
+    def clean(self):
+        from .scheduling import describe_conflict, student_conflicts
+
+        # Không cho đăng ký lớp trùng lịch với lớp đang học cùng học kỳ
+        if self.student_id and self.course_id and self.status == "enrolled":
+            conflicts, labels = student_conflicts(self.student_id, self.course)
+            if conflicts:
+                raise ValidationError(
+                    [describe_conflict(conflict, labels) for conflict in conflicts]
+                )
+
     def save(self, *args, **kwargs):
-        # Tự động tính điểm tổng kết
-        if self.midterm_score is not None and self.final_score is not None:
+        # Tự động tính điểm tổng kết khi vừa nhập hoặc sửa điểm thi
+        if self._grade_needs_update():
             course = self.course
-            assignment_avg = self.get_assignment_average()
-
-            self.overall_score = (
-                (self.midterm_score * course.midterm_weight / 100)
-                + (self.final_score * course.final_weight / 100)
-                + (assignment_avg * course.assignment_weight / 100)
+            self.overall_score = calculate_overall_score(
+                self.midterm_score,
+                self.final_score,
+                self.get_assignment_average(),
+                course.midterm_weight,
+                course.final_weight,
+                course.assignment_weight,
             )
 
             # Tính điểm chữ
             self.letter_grade = self.calculate_letter_grade()
 
-        super().save(*args, **kwargs)
+        kwargs = counter_safe_save_kwargs(self, self.COUNTER_FIELDS, kwargs)
+        update_fields = kwargs.get("update_fields")
+        tracks_seat = update_fields is None or not SEAT_FIELDS.isdisjoint(update_fields)
+        previous_seat = self._previous_seat() if tracks_seat else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if tracks_seat:
+                self._update_enrolled_totals(previous_seat, self._current_seat())
+        if tracks_seat:
+            self._loaded_seat = self._current_seat()
+        if update_fields is None or not EXAM_SCORE_FIELDS.isdisjoint(update_fields):
+            self._loaded_scores = self._current_scores()
+
+    def _previous_seat(self):
+        if self._state.adding:
+            return None
+        seat = getattr(self, "_loaded_seat", None)
+        if seat is None:
+            # Trạng thái chưa được tải (deferred hoặc tạo thủ công với pk)
+            row = (
+                Enrollment.objects.filter(pk=self.pk)
+                .values_list("course_id", "status")
+                .first()
+            )
+            if row is not None:
+                seat = (row[0], row[1] == "enrolled")
+        return seat
+
+    @staticmethod
+    def _update_enrolled_totals(previous_seat, current_seat):
+        deltas = {}
+        for seat, delta in ((previous_seat, -1), (current_seat, 1)):
+            if seat is not None and seat[1]:
+                deltas[seat[0]] = deltas.get(seat[0], 0) + delta
+        for course_id, delta in deltas.items():
+            if delta:
+                Course.objects.filter(pk=course_id).update(
+                    enrolled_total=F("enrolled_total") + delta
+                )
 
     def get_assignment_average(self):
         """Tính điểm trung bình bài tập"""
-        if not self.assignment_scores:
-            return 0
-
-        total_score = sum(
-            score["score"] for score in self.assignment_scores if "score" in score
-        )
-        total_max = sum(
-            score["max"] for score in self.assignment_scores if "max" in score
-        )
-
-        if total_max == 0:
-            return 0
-
-        return (total_score / total_max) * 10  # Chuẩn hóa về thang điểm 10
+        if self.pk is None:
+            return Decimal(0)
+        return assignment_averages([self.pk]).get(self.pk, Decimal(0))
 
     def calculate_letter_grade(self):
         """Tính điểm chữ dựa trên điểm tổng kết"""
-        if self.overall_score is None:
-            return ""
-
-        score = float(self.overall_score)
-        if score >= 9.0:
-            return "A"
-        elif score >= 8.5:
-            return "B+"
-        elif score >= 8.0:
-            return "B"
-        elif score >= 7.0:
-            return "C+"
-        elif score >= 6.0:
-            return "C"
-        elif score >= 5.0:
-            return "D"
-        else:
-            return "F"
+        return calculate_letter_grade(self.overall_score)
 
     @property
     def attendance_rate(self):
@@ -463,6 +747,74 @@ class Assignment(models.Model):
         return f"{self.title} - {self.course.subject.name}"
 
 
+class AssignmentSubmission(models.Model):
+    """Bài nộp và điểm của một chủng sinh cho một bài tập"""
+
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name="submissions",
+        verbose_name="Bài tập",
+    )
+    enrollment = models.ForeignKey(
+        Enrollment,
+        on_delete=models.CASCADE,
+        related_name="submissions",
+        verbose_name="Đăng ký",
+    )
+    score = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+        verbose_name="Điểm",
+    )  # theo thang Assignment.max_score, để trống nếu chưa chấm
+    submitted_at = models.DateTimeField(null=True, blank=True, verbose_name="Ngày nộp")
+    feedback = models.TextField(blank=True, verbose_name="Nhận xét")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("assignment", "enrollment")
+        verbose_name = "Bài nộp"
+        verbose_name_plural = "Bài nộp"
+        # Giữ dạng list như trong migration: đổi sang tuple sẽ sinh migration mới
+        ordering: ClassVar[list] = ["assignment__due_date"]
+        indexes = (
+            # Điểm trung bình theo đăng ký chỉ đọc các bài đã chấm
+            models.Index(
+                fields=["enrollment", "assignment"],
+                condition=models.Q(score__isnull=False),
+                name="courses_submission_graded_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.assignment.title} - {self.enrollment.student}"
+
+    def clean(self):
+        if (
+            self.assignment_id
+            and self.enrollment_id
+            and self.assignment.course_id != self.enrollment.course_id
+        ):
+            raise ValidationError("Bài tập không thuộc lớp học của đăng ký này.")
+        if (
+            self.score is not None
+            and self.assignment_id
+            and self.score > self.assignment.max_score
+        ):
+            raise ValidationError(
+                {"score": f"Điểm không được vượt quá {self.assignment.max_score}."}
+            )
+
+
+# Các trường ảnh hưởng đến số buổi học/có mặt của Enrollment
+ROLL_FIELDS = {"course", "course_id", "student", "student_id", "status"}
+
+
 class Attendance(models.Model):
     """Điểm danh từng buổi học"""
 
@@ -500,6 +852,74 @@ class Attendance(models.Model):
         verbose_name = "Điểm danh"
         verbose_name_plural = "Điểm danh"
         ordering = ["-date", "session_number"]
+        indexes = (
+            # Phân trang theo khóa (date, id) và lọc theo ngày trong admin
+            models.Index(fields=["date", "id"], name="courses_attendance_date_idx"),
+        )
+
+    # Các trạng thái được tính là có mặt trong Enrollment.attendance_count
+    ATTENDED_STATUSES = frozenset({"present", "late"})
 
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.course.subject.name} - {self.date}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Ghi nhớ bản ghi đã lưu để cập nhật số buổi của Enrollment khi thay đổi
+        instance._loaded_roll = instance._current_roll()
+        return instance
+
+    def _current_roll(self):
+        """(course_id, student_id, có mặt) hoặc None nếu chưa tải đủ trường"""
+        if not {"course_id", "student_id", "status"} <= self.__dict__.keys():
+            return None
+        return (
+            self.course_id,
+            self.student_id,
+            self.status in self.ATTENDED_STATUSES,
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        tracks_roll = update_fields is None or not ROLL_FIELDS.isdisjoint(update_fields)
+        previous_roll = self._previous_roll() if tracks_roll else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if tracks_roll:
+                self._update_roll_ups(previous_roll, self._current_roll())
+        if tracks_roll:
+            self._loaded_roll = self._current_roll()
+
+    def _previous_roll(self):
+        if self._state.adding:
+            return None
+        roll = getattr(self, "_loaded_roll", None)
+        if roll is None:
+            row = (
+                Attendance.objects.filter(pk=self.pk)
+                .values_list("course_id", "student_id", "status")
+                .first()
+            )
+            if row is not None:
+                roll = (row[0], row[1], row[2] in self.ATTENDED_STATUSES)
+        return roll
+
+    @staticmethod
+    def _update_roll_ups(previous_roll, current_roll):
+        """Cộng dồn thay đổi số buổi học/có mặt vào Enrollment tương ứng"""
+        deltas = {}
+        for roll, sign in ((previous_roll, -1), (current_roll, 1)):
+            if roll is None:
+                continue
+            course_id, student_id, attended = roll
+            total, present = deltas.get((course_id, student_id), (0, 0))
+            deltas[(course_id, student_id)] = (total + sign, present + sign * attended)
+        for (course_id, student_id), (total, present) in deltas.items():
+            if total or present:
+                Enrollment.objects.filter(
+                    course_id=course_id, student_id=student_id
+                ).update(
+                    total_sessions=F("total_sessions") + total,
+                    attendance_count=F("attendance_count") + present,
+                )
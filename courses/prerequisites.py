@@ -0,0 +1,165 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .models import Enrollment, Subject
+
+CACHE_KEY = "courses:prerequisite_graph"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class PrerequisiteCycleError(ValueError):
+    """Chuỗi môn tiên quyết tạo thành vòng lặp"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(
+            "Môn tiên quyết tạo vòng lặp: " + " → ".join(str(pk) for pk in cycle)
+        )
+
+
+def compute_closure(edges):
+    """
+    Transitive closure of a prerequisite graph.
+
+    `edges` is an iterable of (subject_id, prerequisite_id) pairs. Returns a
+    dict mapping every subject that appears in the graph to the frozenset of
+    all its direct and indirect prerequisites. The walk is iterative
+    (Tarjan's strongly connected components), so deep chains do not hit the
+    recursion limit. Cycles already in the data do not stop the build: every
+    subject on a cycle is its own indirect prerequisite, so it never becomes
+    eligible (see eligible_subjects) until the cycle is removed.
+    """
+    graph = defaultdict(set)
+    for subject_id, prerequisite_id in edges:
+        graph[subject_id].add(prerequisite_id)
+        graph.setdefault(prerequisite_id, set())
+
+    closure = {}
+    order, low = {}, {}
+    stack, on_stack = [], set()
+    for root in graph:
+        if root in order:
+            continue
+        order[root] = low[root] = len(order)
+        stack.append(root)
+        on_stack.add(root)
+        walk = [(root, iter(graph[root]))]
+        while walk:
+            node, children = walk[-1]
+            for child in children:
+                if child not in order:
+                    order[child] = low[child] = len(order)
+                    stack.append(child)
+                    on_stack.add(child)
+                    walk.append((child, iter(graph[child])))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], order[child])
+            else:
+                walk.pop()
+                if walk:
+                    parent = walk[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] != order[node]:
+                    continue
+                # node là gốc của một thành phần liên thông mạnh: mọi môn trong
+                # đó có chung bao đóng, gồm cả chính chúng nếu nằm trên vòng lặp
+                component = []
+                while not component or component[-1] != node:
+                    component.append(stack.pop())
+                    on_stack.discard(component[-1])
+                reachable = set()
+                for member in component:
+                    for child in graph[member]:
+                        reachable.add(child)
+                        reachable |= closure.get(child, frozenset())
+                reachable = frozenset(reachable)
+                for member in component:
+                    closure[member] = reachable
+    return closure
+
+
+def get_prerequisite_graph():
+    """
+    Cached prerequisite data: {"closure": {subject_id: frozenset},
+    "active": frozenset of active subject ids}. Rebuilt with two queries on a
+    cache miss; signals clear it whenever prerequisites or subjects change.
+    """
+    graph = cache.get(CACHE_KEY)
+    if graph is None:
+        edges = Subject.prerequisites.through.objects.values_list(
+            "from_subject_id", "to_subject_id"
+        )
+        graph = {
+            "closure": compute_closure(edges),
+            "active": frozenset(
+                Subject.objects.filter(is_active=True).values_list("pk", flat=True)
+            ),
+        }
+        cache.set(CACHE_KEY, graph, CACHE_TIMEOUT)
+    return graph
+
+
+def invalidate_prerequisite_graph():
+    cache.delete(CACHE_KEY)
+
+
+def get_all_prerequisites(subject):
+    """Tất cả môn tiên quyết (trực tiếp và gián tiếp) của một môn học"""
+    subject_id = getattr(subject, "pk", subject)
+    return get_prerequisite_graph()["closure"].get(subject_id, frozenset())
+
+
+def would_create_cycle(subject_id, prerequisite_ids):
+    """
+    Kiểm tra việc thêm các môn tiên quyết có tạo vòng lặp hay không: một môn
+    đề xuất dẫn ngược về môn đang sửa. Đường đi đó không qua các cạnh đi ra
+    của chính môn này, nên vòng lặp có sẵn ở nơi khác hay việc bỏ cạnh cũ
+    không làm kết quả sai.
+    """
+    closure = get_prerequisite_graph()["closure"]
+    return any(
+        prerequisite_id == subject_id or subject_id in closure.get(prerequisite_id, ())
+        for prerequisite_id in prerequisite_ids
+    )
+
+
+def eligible_subjects(completed_subject_ids, graph=None):
+    """Các môn đang mở mà mọi môn tiên quyết đều nằm trong tập đã hoàn thành"""
+    graph = graph or get_prerequisite_graph()
+    closure = graph["closure"]
+    completed = frozenset(completed_subject_ids)
+    return {
+        subject_id
+        for subject_id in graph["active"] - completed
+        if closure.get(subject_id, frozenset()) <= completed
+    }
+
+
+def get_eligible_subjects(student):
+    """Các môn học mà chủng sinh đủ điều kiện đăng ký"""
+    student_id = getattr(student, "pk", student)
+    return get_eligible_subjects_bulk([student_id])[student_id]
+
+
+def get_eligible_subjects_bulk(students):
+    """
+    Eligible subject ids for many students at once, e.g. a whole cohort.
+
+    Completed enrollments for all students are fetched in one query and the
+    cached closure is reused for every student. Returns
+    {student_id: set of subject ids}.
+    """
+    student_ids = [getattr(student, "pk", student) for student in students]
+    completed = defaultdict(set)
+    for student_id, subject_id in Enrollment.objects.filter(
+        student_id__in=student_ids, status="completed"
+    ).values_list("student_id", "course__subject_id"):
+        completed[student_id].add(subject_id)
+
+    graph = get_prerequisite_graph()
+    return {
+        student_id: eligible_subjects(completed[student_id], graph)
+        for student_id in student_ids
+    }
@@ -0,0 +1,115 @@
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
+from django.db.models.functions import DenseRank, PercentRank, Rank
+
+from .models import SCORE_PRECISION, Enrollment
+from .transcripts import GRADED_STATUSES
+
+COHORT_FIELDS = {
+    "current_year": "student__current_year",
+    "entry_year": "student__entry_year",
+}
+
+RANKING_FIELDS = [
+    "student_id",
+    "student__user__username",
+    "student__user__first_name",
+    "student__user__last_name",
+]
+
+
+def _score_rows(academic_year, semester, cohort_field):
+    decimal = DecimalField(max_digits=12, decimal_places=4)
+    credits = F("course__subject__credits")
+    enrollments = Enrollment.objects.filter(
+        course__academic_year=academic_year,
+        status__in=GRADED_STATUSES,
+        overall_score__isnull=False,
+    )
+    if semester:
+        enrollments = enrollments.filter(course__semester=semester)
+    return (
+        enrollments.order_by()
+        .values(*RANKING_FIELDS, cohort_field)
+        .annotate(
+            score=ExpressionWrapper(
+                Sum(
+                    ExpressionWrapper(
+                        F("overall_score") * credits, output_field=decimal
+                    )
+                )
+                / Sum(credits),
+                output_field=decimal,
+            )
+        )
+    )
+
+
+def cohort_rankings(academic_year, semester=None, cohort="current_year"):
+    """
+    Rank students inside each cohort by credit-weighted average score.
+
+    `cohort` is "current_year" (formation year) or "entry_year". Returns a
+    list of dicts with the student's id, username and name, the cohort value
+    under "cohort", and score, rank, dense_rank and percentile (the share of
+    the rest of the cohort with a lower score, 0-100), ordered by cohort then
+    rank. Uses database window functions
+    over one grouped query, with a pure-Python fallback for databases without
+    window support.
+    """
+    cohort_field = COHORT_FIELDS[cohort]
+    rows = _score_rows(academic_year, semester, cohort_field)
+
+    if connection.features.supports_over_clause:
+        partition = [F(cohort_field)]
+        rows = rows.annotate(
+            rank=Window(Rank(), partition_by=partition, order_by=F("score").desc()),
+            dense_rank=Window(
+                DenseRank(), partition_by=partition, order_by=F("score").desc()
+            ),
+            percent_rank=Window(
+                PercentRank(), partition_by=partition, order_by=F("score").asc()
+            ),
+        ).order_by(cohort_field, "rank", "student__user__username")
+        ranked = list(rows)
+    else:
+        ranked = _rank_in_python(list(rows), cohort_field)
+
+    for row in ranked:
+        row["cohort"] = row.pop(cohort_field)
+        row["score"] = Decimal(row["score"]).quantize(SCORE_PRECISION)
+        row["percentile"] = round(row.pop("percent_rank") * 100, 1)
+    return ranked
+
+
+def _rank_in_python(rows, cohort_field):
+    by_cohort = defaultdict(list)
+    for row in rows:
+        by_cohort[row[cohort_field]].append(row)
+
+    ranked = []
+    for cohort in sorted(by_cohort, key=lambda value: (value is None, value)):
+        members = sorted(
+            by_cohort[cohort],
+            key=lambda row: (-row["score"], row["student__user__username"]),
+        )
+        size = len(members)
+        ascending = sorted(row["score"] for row in members)
+        rank = dense_rank = 0
+        previous = None
+        for position, row in enumerate(members, start=1):
+            if row["score"] != previous:
+                rank, dense_rank, previous = position, dense_rank + 1, row["score"]
+            # Số người có điểm thấp hơn hẳn, giống PERCENT_RANK() theo thứ tự tăng
+            below = bisect_left(ascending, row["score"])
+            row.update(
+                rank=rank,
+                dense_rank=dense_rank,
+                percent_rank=below / (size - 1) if size > 1 else 0.0,
+            )
+            ranked.append(row)
+    return ranked
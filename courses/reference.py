@@ -0,0 +1,32 @@
+from seminary_management.reference_cache import ReferenceCache
+
+
+def _load_academic_years():
+    from .models import AcademicYear
+
+    by_id = {year.pk: year for year in AcademicYear.objects.all()}
+    current = next((year for year in by_id.values() if year.is_current), None)
+    return {"by_id": by_id, "current": current}
+
+
+def _load_subjects():
+    from .models import Subject
+
+    return {subject.pk: subject for subject in Subject.objects.all()}
+
+
+academic_years = ReferenceCache("courses:academic_years", _load_academic_years)
+subjects = ReferenceCache("courses:subjects", _load_subjects)
+
+
+def current_academic_year():
+    """Năm học hiện tại (is_current=True), None nếu chưa đặt"""
+    return academic_years.get()["current"]
+
+
+def get_academic_year(pk):
+    return academic_years.get()["by_id"].get(pk)
+
+
+def get_subject(pk):
+    return subjects.get().get(pk)
@@ -0,0 +1,127 @@
+import random
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Course, Enrollment
+from .scheduling import describe_conflict, student_conflicts
+from .statistics import invalidate_statistics
+
+MAX_RETRIES = 5
+RETRY_BACKOFF = 0.02  # giây, nhân đôi sau mỗi lần thử lại
+
+
+class RegistrationError(Exception):
+    """Không thể đăng ký lớp học"""
+
+
+class RegistrationClosed(RegistrationError):
+    """Lớp học không trong thời gian mở đăng ký"""
+
+
+class CourseFull(RegistrationError):
+    """Lớp học đã hết chỗ"""
+
+
+class ScheduleConflict(RegistrationError):
+    """Lớp học trùng lịch với lớp chủng sinh đang học"""
+
+
+def open_for_registration(now=None):
+    """Điều kiện lớp học đang mở đăng ký tại thời điểm `now`"""
+    now = now or timezone.now()
+    return (
+        Q(status="open_registration", is_active=True)
+        & (Q(registration_start__isnull=True) | Q(registration_start__lte=now))
+        & (Q(registration_end__isnull=True) | Q(registration_end__gte=now))
+    )
+
+
+def register(student, course, now=None, max_retries=MAX_RETRIES, check_schedule=True):
+    """
+    Enroll `student` in `course`, reserving a seat atomically.
+
+    The seat is taken with a single conditional UPDATE on Course.enrolled_total
+    (open for registration and below max_students), so concurrent requests can
+    never overbook a course. Calling it again for the same (student, course)
+    returns the existing enrollment instead of taking a second seat.
+
+    Returns (enrollment, created). Raises RegistrationClosed, CourseFull or
+    ScheduleConflict.
+    """
+    student_id = getattr(student, "pk", student)
+    course_id = getattr(course, "pk", course)
+
+    if check_schedule:
+        if not isinstance(course, Course):
+            course = Course.objects.only(
+                "academic_year_id", "semester", "schedule", "classroom", "class_code"
+            ).get(pk=course_id)
+        conflicts, labels = student_conflicts(student_id, course)
+        if conflicts:
+            raise ScheduleConflict(describe_conflict(conflicts[0], labels))
+
+    for attempt in range(max_retries + 1):
+        try:
+            enrollment, created = _register_once(student_id, course_id, now)
+        except IntegrityError:
+            # Một yêu cầu song song vừa tạo đăng ký này: trả về bản ghi đó
+            continue
+        except OperationalError:
+            # SQLite: "database is locked" khi nhiều ghi đồng thời
+            if attempt == max_retries:
+                raise
+            time.sleep(RETRY_BACKOFF * 2**attempt * random.uniform(0.5, 1.5))
+            continue
+        if created:
+            # Ghi trực tiếp không phát tín hiệu post_save
+            invalidate_statistics()
+        return enrollment, created
+    raise RegistrationError("Không thể đăng ký lớp học, vui lòng thử lại.")
+
+
+def _register_once(student_id, course_id, now):
+    existing = (
+        Enrollment.objects.filter(student_id=student_id, course_id=course_id)
+        .only("id", "student_id", "course_id", "status")
+        .first()
+    )
+    if existing is not None and existing.status == "enrolled":
+        return existing, False
+
+    with transaction.atomic():
+        reserved = (
+            Course.objects.filter(open_for_registration(now), pk=course_id)
+            .filter(enrolled_total__lt=F("max_students"))
+            .update(enrolled_total=F("enrolled_total") + 1)
+        )
+        if not reserved:
+            _raise_unavailable(course_id, now)
+
+        # Ghi trực tiếp để không đi qua Enrollment.save(), vốn sẽ cộng sĩ số
+        # thêm một lần nữa cho chỗ vừa giữ ở trên.
+        if existing is not None:
+            reactivated = (
+                Enrollment.objects.filter(pk=existing.pk)
+                .exclude(status="enrolled")
+                .update(status="enrolled", updated_at=timezone.now())
+            )
+            existing.status = "enrolled"
+            if not reactivated:
+                # Yêu cầu song song đã đăng ký lại trước: trả lại chỗ vừa giữ
+                transaction.set_rollback(True)
+            return existing, bool(reactivated)
+
+        (enrollment,) = Enrollment.objects.bulk_create(
+            [Enrollment(student_id=student_id, course_id=course_id)]
+        )
+        return enrollment, True
+
+
+def _raise_unavailable(course_id, now):
+    is_open = Course.objects.filter(open_for_registration(now), pk=course_id).exists()
+    if is_open:
+        raise CourseFull("Lớp học đã hết chỗ.")
+    raise RegistrationClosed("Lớp học không trong thời gian đăng ký.")
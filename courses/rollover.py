@@ -0,0 +1,106 @@
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from accounts.profiles import invalidate_users
+from church_structure.rollups import invalidate_student_rollups
+from students.models import Student
+
+from .models import AcademicYear, Enrollment
+from .reference import academic_years
+
+# Năm đào tạo cuối cùng; chủng sinh năm này được tốt nghiệp khi kết chuyển
+FINAL_YEAR = max(year for year, _ in Student.YEAR_CHOICES)
+
+
+class RolloverError(Exception):
+    pass
+
+
+class RolloverResult(NamedTuple):
+    promoted: int  # số chủng sinh lên năm
+    graduated: int  # số chủng sinh tốt nghiệp
+    open_enrollments: int  # đăng ký của năm cũ vẫn ở trạng thái "đang học"
+    dry_run: bool
+    already_done: bool = False
+
+
+def _counts():
+    return Student.objects.filter(status="active").aggregate(
+        promoted=Count("pk", filter=Q(current_year__lt=FINAL_YEAR)),
+        graduated=Count("pk", filter=Q(current_year__gte=FINAL_YEAR)),
+    )
+
+
+def rollover(from_year, to_year, dry_run=False, log=None):
+    """
+    Close `from_year` and make `to_year` the current academic year.
+
+    Active students below the final formation year move up one year and
+    final-year students are marked graduated, each with a single UPDATE,
+    all inside one transaction. The old year is stamped with closed_at, so
+    running the rollover again for the same year does nothing. With
+    `dry_run` only the counts are computed.
+    """
+    log = log or (lambda message: None)
+    if from_year.pk == to_year.pk:
+        raise RolloverError("Năm học mới phải khác năm học cũ.")
+    if to_year.start_date < from_year.end_date:
+        raise RolloverError("Năm học mới phải bắt đầu sau khi năm học cũ kết thúc.")
+
+    with transaction.atomic():
+        # Khóa năm học cũ: hai lần chạy song song không lên năm hai lần
+        closed_at, is_current = (
+            AcademicYear.objects.select_for_update()
+            .filter(pk=from_year.pk)
+            .values_list("closed_at", "is_current")
+            .get()
+        )
+        open_enrollments = Enrollment.objects.filter(
+            course__academic_year=from_year, status="enrolled"
+        ).count()
+        if closed_at is not None:
+            log(f"Năm học {from_year} đã được kết chuyển lúc {closed_at}, bỏ qua.")
+            return RolloverResult(0, 0, open_enrollments, dry_run, already_done=True)
+        if not is_current:
+            raise RolloverError(f"Năm học {from_year} không phải năm học hiện tại.")
+        if open_enrollments:
+            log(
+                f"Cảnh báo: còn {open_enrollments} đăng ký đang học của năm {from_year}."
+            )
+
+        if dry_run:
+            counts = _counts()
+            log(
+                f"[Chạy thử] Lên năm: {counts['promoted']}, "
+                f"tốt nghiệp: {counts['graduated']}."
+            )
+            return RolloverResult(
+                counts["promoted"], counts["graduated"], open_enrollments, True
+            )
+
+        now = timezone.now()
+        # Tốt nghiệp trước, để chủng sinh vừa lên năm cuối không bị tốt nghiệp luôn
+        graduated = Student.objects.filter(
+            status="active", current_year__gte=FINAL_YEAR
+        ).update(status="graduated", updated_at=now)
+        log(f"Đã tốt nghiệp {graduated} chủng sinh năm cuối.")
+        promoted = Student.objects.filter(
+            status="active", current_year__lt=FINAL_YEAR
+        ).update(current_year=F("current_year") + 1, updated_at=now)
+        log(f"Đã lên năm {promoted} chủng sinh.")
+
+        AcademicYear.objects.filter(is_current=True).exclude(pk=to_year.pk).update(
+            is_current=False
+        )
+        AcademicYear.objects.filter(pk=from_year.pk).update(closed_at=now)
+        AcademicYear.objects.filter(pk=to_year.pk).update(is_current=True)
+        # update() không phát tín hiệu post_save
+        academic_years.invalidate()
+        transaction.on_commit(invalidate_student_rollups)
+        transaction.on_commit(invalidate_users)
+        log(f"Năm học hiện tại: {to_year}.")
+
+    return RolloverResult(promoted, graduated, open_enrollments, False)
@@ -0,0 +1,276 @@
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+
+DAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+
+class Slot(NamedTuple):
+    """Một buổi học đã chuẩn hóa: giờ tính bằng phút kể từ 00:00"""
+
+    course_id: int
+    day: str
+    start: int
+    end: int
+    room: str
+
+
+class Conflict(NamedTuple):
+    kind: str  # "student", "instructor" hoặc "room"
+    key: object  # student_id, instructor_id hoặc tên phòng
+    first: Slot
+    second: Slot
+
+
+def _parse_time(value):
+    try:
+        hours, minutes = str(value).split(":")
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        raise ValidationError(f"Giờ không hợp lệ: {value!r} (định dạng HH:MM)")
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValidationError(f"Giờ không hợp lệ: {value!r}")
+    return hours * 60 + minutes
+
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_schedule(schedule, course_id=None, default_room=""):
+    """
+    Validate a Course.schedule JSON list and return its slots as Slot tuples.
+
+    Raises ValidationError for unknown days, malformed times, empty intervals
+    or slots of the same course that overlap each other.
+    """
+    if not isinstance(schedule, list):
+        raise ValidationError("Lịch học phải là danh sách các buổi học.")
+
+    slots = []
+    for entry in schedule:
+        if not isinstance(entry, dict):
+            raise ValidationError(f"Buổi học không hợp lệ: {entry!r}")
+        day = str(entry.get("day", "")).strip().lower()
+        if day not in DAYS:
+            raise ValidationError(f"Thứ không hợp lệ: {entry.get('day')!r}")
+        start = _parse_time(entry.get("start"))
+        end = _parse_time(entry.get("end"))
+        if start >= end:
+            raise ValidationError(
+                f"Giờ kết thúc phải sau giờ bắt đầu ({entry.get('start')}-{entry.get('end')})."
+            )
+        room = str(entry.get("room") or default_room).strip()
+        slots.append(Slot(course_id, day, start, end, room))
+
+    for first, second in _sweep(slots):
+        raise ValidationError(
+            f"Các buổi học trùng giờ vào {first.day}: "
+            f"{format_time(first.start)}-{format_time(first.end)} và "
+            f"{format_time(second.start)}-{format_time(second.end)}."
+        )
+    return slots
+
+
+def normalize_schedule(slots):
+    """Dạng JSON chuẩn của lịch học, sắp theo thứ và giờ bắt đầu"""
+    return [
+        {
+            "day": slot.day,
+            "start": format_time(slot.start),
+            "end": format_time(slot.end),
+            "room": slot.room,
+        }
+        for slot in sorted(slots, key=lambda slot: (DAYS.index(slot.day), slot.start))
+    ]
+
+
+def _sweep(slots):
+    """
+    Yield every overlapping pair among `slots` that share a day.
+
+    Slots are sorted by start time and swept once while keeping only the
+    intervals that are still open, so the cost is O(n log n + conflicts)
+    rather than comparing every pair.
+    """
+    by_day = defaultdict(list)
+    for slot in slots:
+        by_day[slot.day].append(slot)
+
+    for day_slots in by_day.values():
+        day_slots.sort(key=lambda slot: slot.start)
+        active = []
+        for slot in day_slots:
+            active = [other for other in active if other.end > slot.start]
+            for other in active:
+                yield other, slot
+            active.append(slot)
+
+
+def find_conflicts(kind, slots_by_key):
+    """Xung đột giữa các lớp khác nhau dùng chung một khóa (phòng, giảng viên, ...)"""
+    conflicts = []
+    for key, slots in slots_by_key.items():
+        for first, second in _sweep(slots):
+            if first.course_id != second.course_id:
+                conflicts.append(Conflict(kind, key, first, second))
+    return conflicts
+
+
+class TermSchedule:
+    """
+    Index of every slot of a set of courses, grouped by room, instructor and
+    student, used to detect clashes inside one academic year and semester.
+    """
+
+    def __init__(self, courses, enrollments=()):
+        """
+        `courses` yields (course_id, instructor_id, schedule, classroom,
+        class_code) rows and `enrollments` yields (student_id, course_id) rows.
+        """
+        self.slots = {}
+        self.labels = {}
+        self.by_room = defaultdict(list)
+        self.by_instructor = defaultdict(list)
+        self.by_student = defaultdict(list)
+        self.invalid = {}
+
+        for course_id, instructor_id, schedule, classroom, class_code in courses:
+            self.labels[course_id] = class_code
+            try:
+                slots = parse_schedule(schedule, course_id, classroom)
+            except ValidationError as error:
+                self.invalid[course_id] = error.messages
+                continue
+            self.slots[course_id] = slots
+            self.by_instructor[instructor_id].extend(slots)
+            for slot in slots:
+                if slot.room:
+                    self.by_room[slot.room].append(slot)
+
+        for student_id, course_id in enrollments:
+            self.by_student[student_id].extend(self.slots.get(course_id, ()))
+
+    def conflicts(self):
+        return (
+            find_conflicts("room", self.by_room)
+            + find_conflicts("instructor", self.by_instructor)
+            + find_conflicts("student", self.by_student)
+        )
+
+
+def load_term_schedule(
+    academic_year, semester=None, exclude_course=None, with_enrollments=True
+):
+    """Dựng TermSchedule cho một năm học (và học kỳ) bằng hai truy vấn"""
+    from .models import Course, Enrollment
+
+    courses = Course.objects.filter(academic_year=academic_year, is_active=True)
+    if semester:
+        courses = courses.filter(semester=semester)
+    if exclude_course is not None:
+        courses = courses.exclude(pk=exclude_course)
+    courses = courses.exclude(status="cancelled").order_by()
+
+    enrollments = ()
+    if with_enrollments:
+        enrollments = Enrollment.objects.filter(
+            course__in=courses, status="enrolled"
+        ).values_list("student_id", "course_id")
+    return TermSchedule(
+        courses.values_list(
+            "pk", "instructor_id", "schedule", "classroom", "class_code"
+        ),
+        enrollments,
+    )
+
+
+def course_conflicts(course):
+    """Xung đột phòng học và giảng viên của một lớp với các lớp cùng học kỳ"""
+    slots = parse_schedule(course.schedule, course.pk, course.classroom)
+    term = load_term_schedule(
+        course.academic_year_id,
+        course.semester,
+        exclude_course=course.pk,
+        with_enrollments=False,
+    )
+
+    own_rooms = defaultdict(list)
+    for slot in slots:
+        if slot.room:
+            own_rooms[slot.room].append(slot)
+    conflicts = find_conflicts(
+        "room",
+        {room: term.by_room.get(room, []) + own for room, own in own_rooms.items()},
+    ) + find_conflicts(
+        "instructor",
+        {
+            course.instructor_id: term.by_instructor.get(course.instructor_id, [])
+            + slots
+        },
+    )
+    # Chỉ giữ các xung đột có liên quan đến lớp đang kiểm tra
+    return [
+        conflict
+        for conflict in conflicts
+        if course.pk in (conflict.first.course_id, conflict.second.course_id)
+    ], {**term.labels, course.pk: course.class_code}
+
+
+def student_conflicts(student_id, course):
+    """Xung đột lịch học của chủng sinh nếu đăng ký thêm lớp `course`"""
+    from .models import Course
+
+    try:
+        slots = parse_schedule(course.schedule, course.pk, course.classroom)
+    except ValidationError:
+        # Lịch cũ không hợp lệ (Course.clean sẽ báo khi sửa lớp): bỏ qua kiểm tra
+        return [], {course.pk: course.class_code}
+
+    taken = Course.objects.filter(
+        academic_year=course.academic_year_id,
+        semester=course.semester,
+        enrollments__student_id=student_id,
+        enrollments__status="enrolled",
+    ).exclude(pk=course.pk)
+    labels = {course.pk: course.class_code}
+    for course_id, schedule, classroom, class_code in taken.values_list(
+        "pk", "schedule", "classroom", "class_code"
+    ):
+        labels[course_id] = class_code
+        try:
+            slots += parse_schedule(schedule, course_id, classroom)
+        except ValidationError:
+            continue
+    return find_conflicts("student", {student_id: slots}), labels
+
+
+CONFLICT_LABELS = {
+    "room": "Trùng phòng {key}",
+    "instructor": "Giảng viên trùng lịch",
+    "student": "Chủng sinh trùng lịch",
+}
+
+
+def describe_conflict(conflict, labels=None):
+    """Mô tả xung đột để hiển thị cho người dùng"""
+    labels = labels or {}
+
+    def describe_slot(slot):
+        course = labels.get(slot.course_id) or f"#{slot.course_id or 'mới'}"
+        return f"{course} {format_time(slot.start)}-{format_time(slot.end)}"
+
+    return (
+        f"{CONFLICT_LABELS[conflict.kind].format(key=conflict.key)} vào "
+        f"{conflict.first.day}: {describe_slot(conflict.first)} và "
+        f"{describe_slot(conflict.second)}"
+    )
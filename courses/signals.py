@@ -0,0 +1,100 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import grading
+from .models import (
+    AcademicYear,
+    Assignment,
+    AssignmentSubmission,
+    Attendance,
+    Course,
+    Enrollment,
+    Subject,
+)
+from .prerequisites import (
+    PrerequisiteCycleError,
+    invalidate_prerequisite_graph,
+    would_create_cycle,
+)
+from .reference import academic_years, subjects
+from .statistics import invalidate_statistics
+from .transcripts import invalidate_course_transcripts, invalidate_transcripts
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_enrolled_seat(sender, instance, **kwargs):
+    """Giảm sĩ số lớp khi xóa một đăng ký đang học (kể cả xóa hàng loạt)"""
+    instance._update_enrolled_totals(instance._current_seat(), None)
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_attendance_roll_up(sender, instance, **kwargs):
+    """Trừ buổi học khỏi Enrollment khi xóa bản ghi điểm danh"""
+    instance._update_roll_ups(instance._current_roll(), None)
+
+
+@receiver(m2m_changed, sender=Subject.prerequisites.through)
+def prerequisites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Chặn vòng lặp môn tiên quyết và làm mới đồ thị đã lưu cache"""
+    if action == "pre_add":
+        if reverse:
+            cyclic = any(
+                would_create_cycle(subject_id, [instance.pk]) for subject_id in pk_set
+            )
+        else:
+            cyclic = would_create_cycle(instance.pk, pk_set)
+        if cyclic:
+            raise PrerequisiteCycleError([instance.pk, *sorted(pk_set)])
+    elif action in ("post_add", "post_remove", "post_clear"):
+        invalidate_prerequisite_graph()
+
+
+@receiver(post_save, sender=AcademicYear)
+@receiver(post_delete, sender=AcademicYear)
+def academic_year_changed(sender, instance, **kwargs):
+    academic_years.invalidate()
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    invalidate_prerequisite_graph()
+    invalidate_statistics()
+    subjects.invalidate()
+    # Số tín chỉ thay đổi làm thay đổi điểm trung bình của người đã học
+    invalidate_course_transcripts(Course.objects.filter(subject=instance))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, created=False, **kwargs):
+    invalidate_statistics()
+    if not created:
+        invalidate_course_transcripts([instance])
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    invalidate_transcripts([instance.student_id])
+    invalidate_statistics()
+
+
+@receiver(post_save, sender=AssignmentSubmission)
+@receiver(post_delete, sender=AssignmentSubmission)
+def submission_changed(sender, instance, **kwargs):
+    """Tính lại điểm tổng kết của đăng ký khi điểm bài tập thay đổi"""
+    course_id = (
+        Enrollment.objects.filter(pk=instance.enrollment_id)
+        .values_list("course_id", flat=True)
+        .first()
+    )
+    if course_id is not None:
+        grading.recompute_grades([course_id], enrollment_ids=[instance.enrollment_id])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def assignment_changed(sender, instance, **kwargs):
+    """Trọng số, điểm tối đa hoặc trạng thái bài tập đổi điểm của cả lớp"""
+    grading.recompute_grades([instance.course_id])
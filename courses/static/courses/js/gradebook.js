@@ -0,0 +1,41 @@
+// Di chuyển giữa các ô điểm bằng bàn phím như bảng tính
+"use strict";
+document.addEventListener("DOMContentLoaded", function () {
+  const table = document.querySelector("#gradebook table");
+  if (!table) {
+    return;
+  }
+  const rows = Array.from(table.tBodies[0].rows)
+    .map((row) => Array.from(row.querySelectorAll("input[type=text]")))
+    .filter((cells) => cells.length);
+
+  function focusCell(row, column) {
+    const cell = rows[row] && rows[row][column];
+    if (cell) {
+      cell.focus();
+      cell.select();
+    }
+  }
+
+  rows.forEach(function (cells, row) {
+    cells.forEach(function (cell, column) {
+      cell.addEventListener("keydown", function (event) {
+        const atStart = cell.selectionStart === 0 && cell.selectionEnd === 0;
+        const atEnd = cell.selectionStart === cell.value.length;
+        if (event.key === "ArrowDown" || (event.key === "Enter" && !event.shiftKey)) {
+          focusCell(row + 1, column);
+        } else if (event.key === "ArrowUp" || (event.key === "Enter" && event.shiftKey)) {
+          focusCell(row - 1, column);
+        } else if (event.key === "ArrowLeft" && atStart) {
+          focusCell(row, column - 1);
+        } else if (event.key === "ArrowRight" && atEnd) {
+          focusCell(row, column + 1);
+        } else {
+          return;
+        }
+        // Enter không gửi biểu mẫu giữa chừng; dùng nút "Lưu điểm"
+        event.preventDefault();
+      });
+    });
+  });
+});
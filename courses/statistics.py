@@ -0,0 +1,125 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import SCORE_PRECISION, Course
+
+CACHE_TIMEOUT = 60 * 60
+VERSION_KEY = "courses:statistics:version"
+
+# Số đăng ký theo từng trạng thái
+STATUS_FIELDS = ["enrolled", "completed", "failed", "withdrawn"]
+
+
+def statistics_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate_statistics():
+    """Đổi phiên bản khóa cache, mọi thống kê cũ hết hiệu lực ngay"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def _dashboard_key(academic_year_id):
+    return f"courses:dashboard:{statistics_version()}:{academic_year_id}"
+
+
+def _course_rows(academic_year_id):
+    """Số đăng ký theo trạng thái và tổng điểm của từng lớp (một truy vấn)"""
+    scored = Q(enrollments__overall_score__isnull=False)
+    return (
+        Course.objects.filter(academic_year_id=academic_year_id)
+        .order_by("semester", "subject__code", "class_code")
+        .values(
+            "pk",
+            "class_code",
+            "semester",
+            "subject_id",
+            "subject__code",
+            "subject__name",
+        )
+        .annotate(
+            total=Count("enrollments"),
+            **{
+                status: Count("enrollments", filter=Q(enrollments__status=status))
+                for status in STATUS_FIELDS
+            },
+            score_sum=Sum("enrollments__overall_score", filter=scored),
+            score_count=Count("enrollments", filter=scored),
+        )
+    )
+
+
+def _totals(rows):
+    totals = {field: 0 for field in ["total", "score_count", *STATUS_FIELDS]}
+    totals["score_sum"] = Decimal(0)
+    for row in rows:
+        for field in totals:
+            totals[field] += row[field] or 0
+    return totals
+
+
+def _finish(row):
+    score_sum, score_count = row.pop("score_sum"), row.pop("score_count")
+    row["completion_rate"] = (
+        round(row["completed"] * 100 / row["total"], 1) if row["total"] else 0
+    )
+    row["average_score"] = (
+        (Decimal(score_sum) / score_count).quantize(SCORE_PRECISION)
+        if score_count
+        else None
+    )
+    return row
+
+
+def build_dashboard(academic_year_id):
+    """
+    Enrollment statistics of one academic year per course, subject and
+    semester, plus the year's totals.
+
+    Every figure comes from a single grouped query over the year's courses
+    using conditional aggregation; subject, semester and year totals are
+    rolled up from those rows in Python.
+    """
+    course_rows = list(_course_rows(academic_year_id))
+    by_subject = defaultdict(list)
+    by_semester = defaultdict(list)
+    for row in course_rows:
+        by_subject[(row["subject__code"], row["subject__name"])].append(row)
+        by_semester[row["semester"]].append(row)
+
+    subjects = [
+        _finish({"code": code, "name": name, **_totals(rows)})
+        for (code, name), rows in sorted(by_subject.items())
+    ]
+    semester_labels = dict(Course.SEMESTER_CHOICES)
+    semesters = [
+        _finish(
+            {"semester": semester_labels[semester], **_totals(by_semester[semester])}
+        )
+        for semester in semester_labels
+        if semester in by_semester
+    ]
+    totals = _finish(_totals(course_rows))
+    return {
+        "courses": [_finish(row) for row in course_rows],
+        "subjects": subjects,
+        "semesters": semesters,
+        "totals": totals,
+    }
+
+
+def get_dashboard(academic_year):
+    """build_dashboard() qua cache, khóa theo phiên bản thống kê hiện tại"""
+    academic_year_id = getattr(academic_year, "pk", academic_year)
+    key = _dashboard_key(academic_year_id)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = build_dashboard(academic_year_id)
+        cache.set(key, dashboard, CACHE_TIMEOUT)
+    return dashboard
@@ -0,0 +1,48 @@
+import copy
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.contrib.admin.utils import get_fields_from_path
+from django.db import models
+
+from courses.changelist import IndexedDates
+
+register = template.Library()
+
+
+def indexed_date_hierarchy(cl):
+    """date_hierarchy của admin, lấy danh sách năm/tháng/ngày qua chỉ mục"""
+    field = get_fields_from_path(cl.model, cl.date_hierarchy)[-1]
+    if isinstance(field, models.DateTimeField):
+        # Múi giờ làm việc lấy mốc phức tạp hơn, giữ cách của Django
+        return date_hierarchy(cl)
+    indexed = copy.copy(cl)
+    indexed.queryset = IndexedDates(cl.queryset)
+    return date_hierarchy(indexed)
+
+
+def keyset_pagination(cl):
+    return {"cl": cl}
+
+
+@register.tag(name="indexed_date_hierarchy")
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=indexed_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
+
+
+@register.tag(name="keyset_pagination")
+def keyset_pagination_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=keyset_pagination,
+        template_name="keyset_pagination.html",
+        takes_context=False,
+    )
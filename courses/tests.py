@@ -1,3 +1,991 @@
-from django.test import TestCase
+import csv
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, OperationalError, connection, connections
+from django.forms import model_to_dict
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.tests import PLAIN_STATIC_STORAGES
+from seminary_management.reference_cache import ReferenceCache
+from students.models import Student
+from teachers.models import Teacher
+
+from .attendance import get_roster, record_attendance
+from .changelist import distinct_dates
+from .cloning import CloneResult, clone_courses
+from .exports import GRADE_COLUMNS
+from .forms import SubjectAdminForm
+from .gradebook import StaleGradesError, gradebook_rows, save_grades
+from .grading import recompute_grades
+from .models import (
+    AcademicYear,
+    Assignment,
+    AssignmentSubmission,
+    Attendance,
+    Course,
+    Enrollment,
+    Subject,
+)
+from .prerequisites import (
+    PrerequisiteCycleError,
+    eligible_subjects,
+    get_all_prerequisites,
+    invalidate_prerequisite_graph,
+)
+from .rankings import cohort_rankings
+from .reference import current_academic_year
+from .registration import (
+    CourseFull,
+    RegistrationError,
+    ScheduleConflict,
+    register,
+)
+from .rollover import FINAL_YEAR, rollover
+from .scheduling import load_term_schedule, student_conflicts
+from .statistics import get_dashboard
+from .transcripts import get_transcript, get_transcripts_bulk
+
+
+def create_course(code="TH101", max_students=30, **fields):
+    today = timezone.localdate()
+    teacher = Teacher.objects.create(
+        user=User.objects.create(username=f"gv-{code}", user_type="teacher"),
+        hire_date=today,
+        position="lecturer",
+    )
+    academic_year = fields.pop("academic_year", None) or AcademicYear.objects.create(
+        name=f"NH-{code}", start_date=today, end_date=today + timedelta(days=90)
+    )
+    return Course.objects.create(
+        subject=Subject.objects.create(
+            code=code, name=f"Môn {code}", category="general", credits=2
+        ),
+        instructor=teacher,
+        academic_year=academic_year,
+        semester="fall",
+        class_code=code,
+        max_students=max_students,
+        start_date=today,
+        end_date=today + timedelta(days=90),
+        status="open_registration",
+        **fields,
+    )
+
+
+def create_students(count, prefix="cs"):
+    users = User.objects.bulk_create(
+        User(username=f"{prefix}-{i}", user_type="student") for i in range(count)
+    )
+    return Student.objects.bulk_create(
+        Student(user=user, entry_year=2024, current_year=1) for user in users
+    )
+
+
+class RegistrationCapTests(TestCase):
+    def setUp(self):
+        self.course = create_course(max_students=2)
+        self.students = create_students(3)
+
+    def test_register_stops_at_max_students(self):
+        register(self.students[0], self.course)
+        register(self.students[1], self.course)
+        with self.assertRaises(CourseFull):
+            register(self.students[2], self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_total, 2)
+
+    def test_register_twice_takes_one_seat(self):
+        _, created = register(self.students[0], self.course)
+        _, created_again = register(self.students[0], self.course)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_total, 1)
+
+    def test_saving_stale_course_keeps_enrolled_total(self):
+        # Bản sao lớp học tải trước khi có đăng ký (ví dụ form admin đang mở)
+        stale = Course.objects.get(pk=self.course.pk)
+        register(self.students[0], self.course)
+        stale.notes = "Đổi ghi chú"
+        stale.save()
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_total, 1)
+        self.assertEqual(self.course.notes, "Đổi ghi chú")
+        register(self.students[1], self.course)
+        with self.assertRaises(CourseFull):
+            register(self.students[2], self.course)
+        self.assertEqual(
+            Enrollment.objects.filter(course=self.course, status="enrolled").count(),
+            2,
+        )
+
+
+class PrerequisiteCycleTests(TestCase):
+    def setUp(self):
+        self.subjects = [
+            Subject.objects.create(
+                code=f"MH{i}", name=f"Môn {i}", category="general", credits=2
+            )
+            for i in range(4)
+        ]
+        # MH2 cần MH1, MH1 cần MH0; MH3 độc lập
+        self.subjects[2].prerequisites.add(self.subjects[1])
+        self.subjects[1].prerequisites.add(self.subjects[0])
+        # Vòng lặp có sẵn từ trước khi có kiểm tra: MH0 cần MH2
+        Subject.prerequisites.through.objects.create(
+            from_subject=self.subjects[0], to_subject=self.subjects[2]
+        )
+        invalidate_prerequisite_graph()
+
+    def form(self, subject, prerequisites):
+        data = model_to_dict(subject, exclude=["prerequisites"])
+        data["prerequisites"] = [prerequisite.pk for prerequisite in prerequisites]
+        return SubjectAdminForm(data, instance=subject)
+
+    def test_subjects_on_an_existing_cycle_are_not_eligible(self):
+        subjects = self.subjects
+        self.assertEqual(eligible_subjects(set()), {subjects[3].pk})
+        self.assertIn(subjects[0].pk, get_all_prerequisites(subjects[0]))
+        # Thêm cạnh không liên quan vẫn được
+        subjects[3].prerequisites.add(subjects[2])
+        with self.assertRaises(PrerequisiteCycleError):
+            subjects[2].prerequisites.add(subjects[3])
+
+    def test_admin_form_can_remove_the_cycle(self):
+        form = self.form(self.subjects[0], [self.subjects[2]])
+        self.assertFalse(form.is_valid())
+        self.assertIn("prerequisites", form.errors)
+
+        form = self.form(self.subjects[0], [])
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(
+            eligible_subjects(set()), {self.subjects[0].pk, self.subjects[3].pk}
+        )
+
+
+class AttendanceCounterTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        self.student = create_students(1)[0]
+        self.enrollment, _ = register(self.student, self.course)
+
+    def record(self, session_number, status):
+        return Attendance.objects.create(
+            course=self.course,
+            student=self.student,
+            date=timezone.localdate(),
+            session_number=session_number,
+            status=status,
+            recorded_by=self.course.instructor.user,
+        )
+
+    def counts(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.total_sessions, self.enrollment.attendance_count
+
+    def test_attendance_changes_update_counters(self):
+        first = self.record(1, "present")
+        second = self.record(2, "absent")
+        self.record(3, "late")
+        self.assertEqual(self.counts(), (3, 2))
+
+        second.status = "present"
+        second.save()
+        self.assertEqual(self.counts(), (3, 3))
+        first.delete()
+        self.assertEqual(self.counts(), (2, 2))
+
+    def test_saving_stale_enrollment_keeps_counters(self):
+        stale = Enrollment.objects.get(pk=self.enrollment.pk)
+        self.record(1, "present")
+        self.record(2, "absent")
+        stale.midterm_score = Decimal(8)
+        stale.save()
+
+        self.assertEqual(self.counts(), (2, 1))
+        self.assertEqual(self.enrollment.midterm_score, Decimal(8))
+
+
+class RosterAttendanceTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        self.students = create_students(3)
+        for student, last_name in zip(self.students, ["Trần", "Lê", "Phạm"]):
+            User.objects.filter(pk=student.user_id).update(last_name=last_name)
+            register(student, self.course)
+        self.today = timezone.localdate()
+
+    def record(self, statuses, session_number=1):
+        return record_attendance(
+            self.course,
+            self.today,
+            session_number,
+            {
+                student.pk: (status, "")
+                for student, status in zip(self.students, statuses)
+            },
+            self.course.instructor.user,
+        )
+
+    def counts(self):
+        return [
+            Enrollment.objects.values_list("total_sessions", "attendance_count").get(
+                course=self.course, student=student
+            )
+            for student in self.students
+        ]
+
+    def test_roster_lists_enrolled_students_by_name(self):
+        self.record(["present", "absent", "late"])
+        roster = get_roster(self.course, self.today, 1)
+        self.assertEqual(
+            [enrollment.student for enrollment, _ in roster],
+            [self.students[1], self.students[2], self.students[0]],
+        )
+        self.assertEqual(
+            [attendance.status for _, attendance in roster],
+            ["absent", "late", "present"],
+        )
+        self.assertEqual(
+            [attendance for _, attendance in get_roster(self.course, self.today, 2)],
+            [None, None, None],
+        )
+
+    def test_resaving_a_session_moves_counters_by_the_change_only(self):
+        self.assertEqual(self.record(["present", "absent", "late"]), 3)
+        self.assertEqual(self.counts(), [(1, 1), (1, 0), (1, 1)])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.record(["absent", "present", "late"])
+        self.assertEqual(self.counts(), [(1, 0), (1, 1), (1, 1)])
+        self.assertEqual(Attendance.objects.filter(course=self.course).count(), 3)
+        # Savepoint, khóa, đọc bản cũ, upsert, một UPDATE cho mỗi loại thay đổi
+        self.assertLessEqual(len(queries), 7)
+
+        self.record(["present", "present", "present"], session_number=2)
+        self.assertEqual(self.counts(), [(2, 1), (2, 2), (2, 2)])
+
+
+class GradeRecomputeTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        self.enrollment, _ = register(create_students(1)[0], self.course)
+        self.assignment = Assignment.objects.create(
+            course=self.course,
+            title="Bài 1",
+            type="homework",
+            description="",
+            due_date=timezone.now(),
+            max_score=Decimal(10),
+            weight=Decimal(10),
+        )
+        self.submission = AssignmentSubmission.objects.create(
+            assignment=self.assignment, enrollment=self.enrollment, score=Decimal(5)
+        )
+
+    def grade(self, midterm, final):
+        self.enrollment.midterm_score = Decimal(midterm)
+        self.enrollment.final_score = Decimal(final)
+        self.enrollment.save()
+
+    def test_overall_score_uses_course_weights_and_assignments(self):
+        self.grade(8, 9)
+        self.enrollment.refresh_from_db()
+        # 8 x 30% + 9 x 50% + 5 x 20%
+        self.assertEqual(self.enrollment.overall_score, Decimal("7.90"))
+        self.assertEqual(self.enrollment.letter_grade, "C+")
+
+    def test_save_without_score_change_skips_assignment_average(self):
+        self.grade(8, 9)
+        enrollment = Enrollment.objects.get(pk=self.enrollment.pk)
+        enrollment.instructor_notes = "Chăm chỉ"
+        with CaptureQueriesContext(connection) as queries:
+            enrollment.save()
+        self.assertFalse(
+            any("assignmentsubmission" in query["sql"] for query in queries)
+        )
+
+        enrollment.final_score = Decimal(10)
+        with CaptureQueriesContext(connection) as queries:
+            enrollment.save()
+        self.assertTrue(
+            any("assignmentsubmission" in query["sql"] for query in queries)
+        )
+        self.assertEqual(enrollment.overall_score, Decimal("8.40"))
+
+    def test_submission_change_recomputes_overall_score(self):
+        self.grade(8, 9)
+        self.submission.score = Decimal(10)
+        self.submission.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.overall_score, Decimal("8.90"))
+
+    def test_weight_change_recomputes_stored_grades(self):
+        self.grade(8, 9)
+        self.course.midterm_weight = Decimal(20)
+        self.course.final_weight = Decimal(60)
+        self.course.save()
+        self.enrollment.refresh_from_db()
+        # 8 x 20% + 9 x 60% + 5 x 20%
+        self.assertEqual(self.enrollment.overall_score, Decimal("8.00"))
+        self.assertEqual(self.enrollment.letter_grade, "B")
+
+    def test_recompute_grades_fixes_drifted_rows_only(self):
+        self.grade(8, 9)
+        other, _ = register(create_students(1, prefix="khac")[0], self.course)
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(
+            overall_score=Decimal(1), letter_grade="F"
+        )
+
+        self.assertEqual(recompute_grades([self.course.pk]), 1)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.overall_score, Decimal("7.90"))
+        other.refresh_from_db()
+        self.assertIsNone(other.overall_score)
+        self.assertEqual(recompute_grades([self.course]), 0)
+
+
+class AcademicYearRolloverTests(TestCase):
+    def setUp(self):
+        self.old_year = AcademicYear.objects.create(
+            name="2024-2025",
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 6, 30),
+            is_current=True,
+        )
+        self.new_year = AcademicYear.objects.create(
+            name="2025-2026", start_date=date(2025, 9, 1), end_date=date(2026, 6, 30)
+        )
+        self.first_year, self.final_year = create_students(2)
+        Student.objects.filter(pk=self.final_year.pk).update(current_year=FINAL_YEAR)
+
+    def test_rollover_runs_once(self):
+        result = rollover(self.old_year, self.new_year)
+        self.assertEqual((result.promoted, result.graduated), (1, 1))
+
+        again = rollover(self.old_year, self.new_year)
+        self.assertTrue(again.already_done)
+        self.assertEqual((again.promoted, again.graduated), (0, 0))
+        self.first_year.refresh_from_db()
+        self.final_year.refresh_from_db()
+        self.assertEqual(self.first_year.current_year, 2)
+        self.assertEqual(self.final_year.status, "graduated")
+        self.assertEqual(
+            list(AcademicYear.objects.filter(is_current=True)), [self.new_year]
+        )
+
+    def test_saving_stale_year_keeps_closed_at(self):
+        stale = AcademicYear.objects.get(pk=self.old_year.pk)
+        rollover(self.old_year, self.new_year)
+        stale.is_current = False
+        stale.end_date = date(2025, 7, 15)
+        stale.save()
+
+        self.old_year.refresh_from_db()
+        self.assertIsNotNone(self.old_year.closed_at)
+        self.assertTrue(rollover(self.old_year, self.new_year).already_done)
+        self.first_year.refresh_from_db()
+        self.assertEqual(self.first_year.current_year, 2)
+
+    def test_saving_stale_current_year_keeps_the_newer_switch(self):
+        stale = AcademicYear.objects.get(pk=self.old_year.pk)
+        self.new_year.is_current = True
+        self.new_year.save()
+        stale.end_date = date(2025, 7, 15)
+        stale.save()
+
+        self.assertEqual(
+            list(AcademicYear.objects.filter(is_current=True)), [self.new_year]
+        )
+        self.old_year.refresh_from_db()
+        self.assertEqual(self.old_year.end_date, date(2025, 7, 15))
+
+        self.old_year.is_current = True
+        self.old_year.save()
+        self.assertEqual(
+            list(AcademicYear.objects.filter(is_current=True)), [self.old_year]
+        )
+
+
+class ReferenceCacheTests(TestCase):
+    def create_year(self, name, **fields):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            return AcademicYear.objects.create(
+                name=name, start_date=today, end_date=today, **fields
+            )
+
+    def test_current_year_reloads_after_commit(self):
+        first = self.create_year("2024-2025", is_current=True)
+        self.assertEqual(current_academic_year(), first)
+        with self.assertNumQueries(0):
+            self.assertEqual(current_academic_year(), first)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = AcademicYear.objects.create(
+                name="2025-2026",
+                start_date=first.start_date,
+                end_date=first.end_date,
+                is_current=True,
+            )
+        # Chưa commit: các worker vẫn thấy năm học cũ
+        self.assertEqual(current_academic_year(), first)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(current_academic_year(), second)
+
+    def test_other_workers_reload_when_the_version_changes(self):
+        loads = []
+
+        def loader():
+            loads.append(len(loads))
+            return len(loads)
+
+        worker = ReferenceCache("tests:worker", loader, check_interval=0)
+        self.addCleanup(ReferenceCache.registry.pop, "tests:worker")
+        self.assertEqual(worker.get(), 1)
+        self.assertEqual(worker.get(), 1)
+
+        cache.set(worker.version_key, "changed-elsewhere", None)
+        self.assertEqual(worker.get(), 2)
+        self.assertEqual(worker.stats(), {"hits": 1, "misses": 2})
+
+
+class CloneCoursesTests(TestCase):
+    def setUp(self):
+        self.course = create_course("TH101")
+        self.source_year = self.course.academic_year
+        self.other = create_course("TH102", academic_year=self.source_year)
+        start = self.source_year.start_date + timedelta(days=365)
+        self.target_year = AcademicYear.objects.create(
+            name="NH-dich", start_date=start, end_date=start + timedelta(days=90)
+        )
+        self.existing = Course.objects.create(
+            subject=self.other.subject,
+            instructor=self.other.instructor,
+            academic_year=self.target_year,
+            semester="fall",
+            class_code="TH102",
+            max_students=10,
+            start_date=start,
+            end_date=start,
+        )
+
+    def test_clone_skips_existing_courses_and_shifts_dates(self):
+        result = clone_courses(
+            Course.objects.filter(academic_year=self.source_year), self.target_year
+        )
+        self.assertEqual(result, CloneResult(created=1, updated=0, skipped=1))
+        clone = Course.objects.get(academic_year=self.target_year, class_code="TH101")
+        self.assertEqual(clone.status, "planning")
+        self.assertEqual(clone.instructor, self.course.instructor)
+        self.assertEqual(clone.start_date, self.course.start_date + timedelta(days=365))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.max_students, 10)
+
+    def test_clone_updates_existing_courses_on_conflict(self):
+        result = clone_courses(
+            Course.objects.filter(pk=self.other.pk),
+            self.target_year,
+            instructor_map={self.other.instructor_id: self.course.instructor_id},
+            on_conflict="update",
+        )
+        self.assertEqual(result, CloneResult(created=0, updated=1, skipped=0))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.max_students, 30)
+        self.assertEqual(self.existing.instructor, self.course.instructor)
+        self.assertEqual(
+            Course.objects.filter(academic_year=self.target_year).count(), 1
+        )
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        self.first, _ = register(create_students(1)[0], self.course)
+        self.second, _ = register(create_students(1, prefix="khac")[0], self.course)
+
+    def rows(self):
+        return {row.pk: row for row in gradebook_rows(self.course)}
+
+    def test_save_grades_updates_scores_and_overall(self):
+        rows = self.rows()
+        changes = {
+            pk: (row.updated_at, {"midterm_score": Decimal(6), "final_score": 8})
+            for pk, row in rows.items()
+        }
+        self.assertEqual(save_grades(self.course, changes), 2)
+
+        self.first.refresh_from_db()
+        # 6 x 30% + 8 x 50%, chưa có bài tập
+        self.assertEqual(self.first.overall_score, Decimal("5.80"))
+        self.assertEqual(self.first.letter_grade, "D")
+
+    def test_stale_grades_are_refused_without_writing(self):
+        rows = self.rows()
+        # Người khác lưu điểm sau khi bảng điểm được mở
+        self.first.midterm_score = Decimal(9)
+        self.first.save()
+
+        changes = {
+            pk: (row.updated_at, {"midterm_score": Decimal(5)})
+            for pk, row in rows.items()
+        }
+        with self.assertRaises(StaleGradesError) as raised:
+            save_grades(self.course, changes)
+
+        self.assertEqual(list(raised.exception.enrollments), [self.first.pk])
+        self.assertEqual(
+            raised.exception.enrollments[self.first.pk].midterm_score, Decimal(9)
+        )
+        self.second.refresh_from_db()
+        self.assertIsNone(self.second.midterm_score)
+
+
+class TranscriptTests(TestCase):
+    def setUp(self):
+        # Bảng điểm được cache theo id, mà id có thể trùng với kiểm thử trước
+        cache.clear()
+
+    def test_bulk_transcripts_cover_the_same_students_in_both_modes(self):
+        course = create_course()
+        graded, ungraded, graduated = create_students(3)
+        Student.objects.filter(pk=graduated.pk).update(status="graduated")
+        enrollment, _ = register(graded, course)
+        enrollment.midterm_score = Decimal(7)
+        enrollment.final_score = Decimal(8)
+        enrollment.status = "completed"
+        enrollment.save()
+
+        default = get_transcripts_bulk()
+        explicit = get_transcripts_bulk([graded, ungraded])
+        self.assertEqual(default, explicit)
+        self.assertEqual(set(default), {graded.pk, ungraded.pk})
+        self.assertEqual(default[ungraded.pk]["terms"], [])
+        self.assertEqual(default[graded.pk]["credits_attempted"], 2)
+        self.assertEqual(default[graded.pk], get_transcript(graded))
+
+    def test_cached_transcript_follows_grade_and_credit_changes(self):
+        course = create_course()
+        student = create_students(1)[0]
+        enrollment, _ = register(student, course)
+        self.assertEqual(get_transcript(student)["credits_attempted"], 0)
+        with self.assertNumQueries(0):
+            get_transcript(student)
+
+        enrollment.midterm_score = Decimal(7)
+        enrollment.final_score = Decimal(8)
+        enrollment.status = "completed"
+        enrollment.save()
+        self.assertEqual(get_transcript(student)["credits_attempted"], 2)
+
+        course.subject.credits = 3
+        course.subject.save()
+        self.assertEqual(get_transcript(student)["credits_attempted"], 3)
+
+
+class CohortRankingTests(TestCase):
+    def setUp(self):
+        self.course = create_course("TH101")
+        self.other = create_course("TH102", academic_year=self.course.academic_year)
+        Subject.objects.filter(pk=self.other.subject_id).update(credits=4)
+        self.students = create_students(5)
+        Student.objects.filter(pk=self.students[4].pk).update(current_year=2)
+        for student, score in zip(self.students, [9, 8, 8, 6, 5]):
+            self.grade(student, self.course, score)
+        # Điểm theo tín chỉ: (6 x 2 + 9 x 4) / 6 = 8
+        self.grade(self.students[3], self.other, 9)
+
+    def grade(self, student, course, score):
+        enrollment, _ = register(student, course)
+        Enrollment.objects.filter(pk=enrollment.pk).update(
+            overall_score=Decimal(score), status="completed"
+        )
+
+    def test_ranks_and_percentiles_inside_each_cohort(self):
+        rows = cohort_rankings(self.course.academic_year)
+        self.assertEqual(
+            [
+                (row["student_id"], row["cohort"], row["score"], row["rank"])
+                for row in rows
+            ],
+            [
+                (self.students[0].pk, 1, Decimal("9.00"), 1),
+                (self.students[1].pk, 1, Decimal("8.00"), 2),
+                (self.students[2].pk, 1, Decimal("8.00"), 2),
+                (self.students[3].pk, 1, Decimal("8.00"), 2),
+                (self.students[4].pk, 2, Decimal("5.00"), 1),
+            ],
+        )
+        self.assertEqual([row["dense_rank"] for row in rows], [1, 2, 2, 2, 1])
+        self.assertEqual(
+            [row["percentile"] for row in rows], [100.0, 0.0, 0.0, 0.0, 0.0]
+        )
+
+    def test_export_rankings_command(self):
+        stdout = StringIO()
+        call_command(
+            "export_rankings",
+            academic_year=self.course.academic_year.name,
+            stdout=stdout,
+        )
+        rows = list(csv.reader(StringIO(stdout.getvalue())))
+        self.assertEqual(rows[0][:2], ["Khóa", "Hạng"])
+        self.assertEqual(rows[1], ["1", "1", "1", "100.0", "cs-0", "", "", "9.00"])
+        self.assertEqual(len(rows), 6)
+
+    def test_python_fallback_matches_window_functions(self):
+        academic_year = self.course.academic_year
+        expected = cohort_rankings(academic_year, cohort="entry_year")
+        with mock.patch.object(connection.features, "supports_over_clause", False):
+            self.assertEqual(
+                cohort_rankings(academic_year, cohort="entry_year"), expected
+            )
+
+
+class DashboardTests(TestCase):
+    def test_dashboard_is_cached_until_an_enrollment_changes(self):
+        course = create_course()
+        student, other = create_students(2)
+        register(student, course)
+
+        dashboard = get_dashboard(course.academic_year)
+        self.assertEqual(dashboard["totals"]["total"], 1)
+        self.assertEqual(dashboard["courses"][0]["enrolled"], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard(course.academic_year), dashboard)
+
+        register(other, course)
+        dashboard = get_dashboard(course.academic_year)
+        self.assertEqual(dashboard["totals"]["total"], 2)
+        self.assertEqual(dashboard["subjects"][0]["enrolled"], 2)
+
+
+class GradeExportTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        enrollment, _ = register(create_students(1)[0], self.course)
+        enrollment.midterm_score = Decimal(7)
+        enrollment.save()
+        self.client.force_login(
+            User.objects.create_superuser("admin", password="x", user_type="admin")
+        )
+
+    def export(self, action):
+        return self.client.post(
+            reverse("admin:courses_academicyear_changelist"),
+            {
+                "action": action,
+                "_selected_action": [self.course.academic_year_id],
+            },
+        )
+
+    def test_csv_export(self):
+        response = self.export("export_grades")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("cs-0", lines[1])
+
+    @skipUnless(find_spec("openpyxl"), "openpyxl chưa được cài")
+    def test_xlsx_export_matches_csv_columns(self):
+        from openpyxl import load_workbook
+
+        response = self.export("export_grades_xlsx")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(".xlsx", response["Content-Disposition"])
+        sheet = load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], tuple(label for _, label in GRADE_COLUMNS))
+        self.assertEqual(rows[1][5], "cs-0")
+        self.assertEqual(rows[1][8], 7)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        for i, last_name in enumerate(["Nguyễn", "Nguyễn", "Nguyễn", "Trần"]):
+            Student.objects.create(
+                user=User.objects.create(
+                    username=f"cs-{i}", last_name=last_name, user_type="student"
+                ),
+                entry_year=2024,
+                current_year=1,
+            )
+        self.client.force_login(
+            User.objects.create_superuser("admin", password="x", user_type="admin")
+        )
+
+    def lookup(self, term):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:autocomplete"),
+                {
+                    "term": term,
+                    "app_label": "courses",
+                    "model_name": "enrollment",
+                    "field_name": "student",
+                },
+            )
+        return response.json()["results"], len(queries)
+
+    def test_students_are_found_through_the_index_in_constant_queries(self):
+        one, one_queries = self.lookup("tran")
+        many, many_queries = self.lookup("nguyen")
+        self.assertEqual([result["text"] for result in one], ["cs-3 - Trần"])
+        self.assertEqual(len(many), 3)
+        self.assertEqual(many_queries, one_queries)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class KeysetChangeListTests(TestCase):
+    def setUp(self):
+        course = create_course()
+        student = create_students(1)[0]
+        admin_user = User.objects.create_superuser(
+            "admin", password="x", user_type="admin"
+        )
+        dates = [
+            (date(2025, 1, 5), 1),
+            (date(2025, 1, 5), 2),
+            (date(2025, 1, 20), 1),
+            (date(2025, 2, 3), 1),
+            (date(2026, 3, 1), 1),
+        ]
+        self.rows = [
+            Attendance.objects.create(
+                course=course,
+                student=student,
+                date=day,
+                session_number=session,
+                status="present",
+                recorded_by=admin_user,
+            )
+            for day, session in dates
+        ]
+        self.client.force_login(admin_user)
+        # COUNT(*) của bảng được cache, bỏ giá trị từ các kiểm thử trước
+        cache.delete("changelist:count:courses_attendance")
+        patcher = mock.patch.object(site._registry[Attendance], "list_per_page", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def changelist(self, query=""):
+        url = reverse("admin:courses_attendance_changelist")
+        response = self.client.get(url + query)
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"]
+
+    def test_pages_follow_the_cursor_both_ways(self):
+        expected = [
+            row.pk for row in sorted(self.rows, key=lambda row: (row.date, row.pk))
+        ]
+        expected.reverse()
+
+        pages = [self.changelist()]
+        while pages[-1].next_url:
+            pages.append(self.changelist(pages[-1].next_url))
+        self.assertEqual(
+            [[row.pk for row in cl.result_list] for cl in pages],
+            [expected[:2], expected[2:4], expected[4:]],
+        )
+        self.assertIsNone(pages[0].previous_url)
+        self.assertIsNone(pages[-1].next_url)
+
+        back = self.changelist(pages[-1].previous_url)
+        self.assertEqual([row.pk for row in back.result_list], expected[2:4])
+        self.assertEqual(self.changelist(back.previous_url).previous_url, None)
+
+    def test_counts_are_estimated_or_bounded(self):
+        cl = self.changelist()
+        self.assertEqual((cl.result_count, cl.count_precision), (5, "estimate"))
+        cl = self.changelist("?date__year=2025")
+        self.assertEqual((cl.result_count, cl.count_precision), (4, "exact"))
+        with mock.patch("courses.changelist.COUNT_LIMIT", 3):
+            cl = self.changelist("?date__year=2025")
+        self.assertEqual((cl.result_count, cl.count_precision), (3, "at_least"))
+
+    def test_distinct_dates_match_queryset_dates(self):
+        queryset = Attendance.objects.all()
+        for kind in ["year", "month", "day"]:
+            with self.subTest(kind):
+                self.assertEqual(
+                    distinct_dates(queryset, "date", kind),
+                    list(queryset.dates("date", kind)),
+                )
+
+        url = reverse("admin:courses_attendance_changelist")
+        years = self.client.get(url)
+        self.assertContains(years, "?date__year=2025")
+        self.assertContains(years, "?date__year=2026")
+        months = self.client.get(url + "?date__year=2025")
+        self.assertContains(months, "date__month=2")
+        self.assertNotContains(months, "date__month=3")
+
+
+class StudentConflictTests(TestCase):
+    def test_course_with_malformed_schedule_is_skipped(self):
+        student = create_students(1)[0]
+        taken = create_course(
+            "TH101", schedule=[{"day": "monday", "start": "07:00", "end": "09:00"}]
+        )
+        register(student, taken)
+        # Lịch nhập trước khi có kiểm tra, không qua Course.clean
+        broken = create_course(
+            "TH102",
+            academic_year=taken.academic_year,
+            schedule=[{"day": "thứ hai", "start": "7h", "end": "9h"}],
+        )
+
+        self.assertEqual(student_conflicts(student.pk, broken)[0], [])
+        _, created = register(student, broken)
+        self.assertTrue(created)
+
+    def test_overlapping_course_is_reported(self):
+        student = create_students(1)[0]
+        taken = create_course(
+            "TH101", schedule=[{"day": "monday", "start": "07:00", "end": "09:00"}]
+        )
+        register(student, taken)
+        other = create_course(
+            "TH102",
+            academic_year=taken.academic_year,
+            schedule=[{"day": "monday", "start": "08:00", "end": "10:00"}],
+        )
+
+        with self.assertRaises(ScheduleConflict):
+            register(student, other)
+
+
+class GenerateTimetableTests(TestCase):
+    def test_unplaced_course_keeps_its_schedule(self):
+        old_schedule = [{"day": "friday", "start": "13:00", "end": "15:00"}]
+        small = create_course("TH101", max_students=20)
+        large = create_course(
+            "TH102",
+            max_students=100,
+            academic_year=small.academic_year,
+            schedule=old_schedule,
+        )
+        stderr = StringIO()
+        call_command(
+            "generate_timetable",
+            "--room=P1:30",
+            "--sessions=1",
+            "--time-budget=0.1",
+            academic_year=small.academic_year.name,
+            semester="fall",
+            stdout=StringIO(),
+            stderr=stderr,
+        )
+
+        small.refresh_from_db()
+        large.refresh_from_db()
+        self.assertEqual(len(small.schedule), 1)
+        self.assertEqual(small.classroom, "P1")
+        self.assertEqual(large.schedule, old_schedule)
+        self.assertIn("TH102", stderr.getvalue())
+
+    def test_new_sessions_avoid_the_slots_of_kept_schedules(self):
+        kept_schedule = [
+            {"day": "monday", "start": "07:30", "end": "09:00", "room": "P1"}
+        ]
+        large = create_course("TH100", max_students=100, schedule=kept_schedule)
+        # Sáu lớp cho sáu khung giờ của một phòng, kể cả khung của lịch cũ
+        for i in range(1, 7):
+            create_course(
+                f"TH10{i}", max_students=20, academic_year=large.academic_year
+            )
+        call_command(
+            "generate_timetable",
+            "--room=P1:30",
+            "--sessions=1",
+            "--periods=07:30",
+            "--time-budget=0.1",
+            academic_year=large.academic_year.name,
+            semester="fall",
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+        large.refresh_from_db()
+        self.assertEqual(large.schedule, kept_schedule)
+        term = load_term_schedule(large.academic_year, "fall", with_enrollments=False)
+        self.assertEqual(term.conflicts(), [])
+        self.assertEqual(
+            sum(
+                len(schedule) == 1
+                for schedule in Course.objects.exclude(pk=large.pk).values_list(
+                    "schedule", flat=True
+                )
+            ),
+            5,
+        )
+
+
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """Như lệnh loadtest_registration: đăng ký song song xen lẫn lưu lớp học"""
+
+    def test_mixed_registrations_and_course_saves_keep_invariants(self):
+        course = create_course(max_students=10)
+        student_ids = [student.pk for student in create_students(30)]
+        stale = Course.objects.get(pk=course.pk)
+        created, saves, errors = [], [], []
+
+        def register_all(chunk):
+            try:
+                for student_id in chunk * 2:
+                    try:
+                        if register(student_id, course.pk)[1]:
+                            created.append(student_id)
+                    except (RegistrationError, OperationalError):
+                        # OperationalError: CSDL thử nghiệm SQLite trong bộ nhớ khóa cả bảng
+                        pass
+                    except DatabaseError as error:
+                        errors.append(error)
+            finally:
+                connections.close_all()
+
+        def save_course():
+            try:
+                for i in range(20):
+                    stale.notes = f"Lưu lần {i + 1}"
+                    try:
+                        stale.save()
+                        saves.append(i)
+                    except OperationalError:
+                        pass
+                    except DatabaseError as error:
+                        errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=register_all, args=(student_ids[i::4],))
+            for i in range(4)
+        ]
+        threads.append(threading.Thread(target=save_course))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        course.refresh_from_db()
+        enrolled = Enrollment.objects.filter(course=course, status="enrolled").count()
+        self.assertEqual(errors, [])
+        self.assertTrue(saves)
+        self.assertLessEqual(enrolled, course.max_students)
+        self.assertEqual(course.enrolled_total, enrolled)
+        self.assertEqual(len(created), enrolled)
@@ -0,0 +1,197 @@
+import random
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+from .scheduling import DAYS, format_time
+
+DEFAULT_PERIODS = ["07:30", "09:30", "13:30", "15:30"]
+DEFAULT_SESSION_LENGTH = 90  # phút
+
+
+class Room(NamedTuple):
+    name: str
+    capacity: int
+
+
+class CourseSpec(NamedTuple):
+    """Dữ liệu của một lớp cần xếp lịch"""
+
+    course_id: int
+    subject_id: int
+    instructor_id: int
+    cohort: object  # Subject.year_taught, None nếu không theo khóa
+    size: int  # Course.max_students
+    sessions: int  # số buổi mỗi tuần
+
+
+class Solution(NamedTuple):
+    assignments: dict  # course_id -> [(day, start, end, room)]
+    unplaced: dict  # course_id -> số buổi chưa xếp được
+    penalty: int
+    iterations: int
+    elapsed: float
+
+    @property
+    def placed_ratio(self):
+        placed = sum(len(slots) for slots in self.assignments.values())
+        total = placed + sum(self.unplaced.values())
+        return placed / total if total else 1.0
+
+
+def build_slots(days=None, periods=None, length=DEFAULT_SESSION_LENGTH):
+    """Các khung giờ (day, start, end) theo phút kể từ 00:00"""
+    slots = []
+    for day in days or DAYS[:6]:
+        for period in periods or DEFAULT_PERIODS:
+            hours, minutes = (int(part) for part in period.split(":"))
+            start = hours * 60 + minutes
+            slots.append((day, start, start + length))
+    return slots
+
+
+def solve(courses, rooms, slots, time_budget=5.0, seed=0, fixed=()):
+    """
+    Assign weekly sessions of `courses` to (slot, room) pairs.
+
+    `fixed` lists (CourseSpec, [(day, start, end, room)]) for courses that
+    keep their current sessions: every slot those sessions overlap is booked
+    for their instructor, room and cohort before anything is placed.
+
+    Hard constraints: an instructor, a room or a cohort (courses of different
+    subjects taught to the same formation year) is never booked twice in the
+    same slot, and a room must seat the course's max_students. Sessions of one
+    course go on different days where possible and small classes avoid large
+    rooms; both are counted in the soft penalty.
+
+    Runs randomized greedy constructions, hardest courses first, until the
+    time budget is spent and keeps the best result (fewest unplaced sessions,
+    then lowest penalty).
+    """
+    rng = random.Random(seed)
+    booked = _book_fixed(fixed, slots)
+    rooms = sorted(rooms, key=lambda room: room.capacity)
+    fitting_rooms = {
+        spec.course_id: [room for room in rooms if room.capacity >= spec.size]
+        for spec in courses
+    }
+    instructor_load = defaultdict(int)
+    for spec in courses:
+        instructor_load[spec.instructor_id] += spec.sessions
+
+    started = time.perf_counter()
+    deadline = started + time_budget
+    best = None
+    iterations = 0
+    while True:
+        iterations += 1
+        order = sorted(
+            courses,
+            key=lambda spec: (
+                len(fitting_rooms[spec.course_id]),
+                -instructor_load[spec.instructor_id],
+                -spec.size,
+                rng.random(),
+            ),
+        )
+        result = _construct(order, fitting_rooms, slots, rng, booked)
+        if best is None or _score(result) < _score(best):
+            best = result
+        if not best[1] and best[2] == 0:
+            break
+        if time.perf_counter() >= deadline:
+            break
+
+    assignments, unplaced, penalty = best
+    return Solution(
+        assignments, unplaced, penalty, iterations, time.perf_counter() - started
+    )
+
+
+def _score(result):
+    _, unplaced, penalty = result
+    return sum(unplaced.values()), penalty
+
+
+def _book_fixed(fixed, slots):
+    """Các khung giờ bị chiếm bởi lịch giữ nguyên: (phòng, giảng viên, khóa)"""
+    room_busy, instructor_busy, cohort_busy = set(), set(), {}
+    for spec, placements in fixed:
+        for day, start, end, room in placements:
+            for index, (slot_day, slot_start, slot_end) in enumerate(slots):
+                if slot_day != day or slot_start >= end or start >= slot_end:
+                    continue
+                if room:
+                    room_busy.add((index, room))
+                instructor_busy.add((index, spec.instructor_id))
+                if spec.cohort is not None:
+                    cohort_busy[(index, spec.cohort)] = spec.subject_id
+    return room_busy, instructor_busy, cohort_busy
+
+
+def _construct(order, fitting_rooms, slots, rng, booked):
+    room_busy = set(booked[0])  # (slot index, room name)
+    instructor_busy = set(booked[1])  # (slot index, instructor_id)
+    cohort_busy = dict(booked[2])  # (slot index, cohort) -> subject_id
+
+    assignments = {}
+    unplaced = {}
+    penalty = 0
+    slot_indexes = list(range(len(slots)))
+    for spec in order:
+        rooms = fitting_rooms[spec.course_id]
+        used_days = set()
+        placed = []
+        rng.shuffle(slot_indexes)
+        for _ in range(spec.sessions):
+            best = None
+            for index in slot_indexes:
+                if (index, spec.instructor_id) in instructor_busy:
+                    continue
+                if (
+                    spec.cohort is not None
+                    and cohort_busy.get((index, spec.cohort), spec.subject_id)
+                    != spec.subject_id
+                ):
+                    continue
+                room = next(
+                    (room for room in rooms if (index, room.name) not in room_busy),
+                    None,
+                )
+                if room is None:
+                    continue
+                day = slots[index][0]
+                cost = (day in used_days) * 10 + (room.capacity - spec.size) // 10
+                if best is None or cost < best[0]:
+                    best = (cost, index, room)
+                    if cost == 0:
+                        break
+            if best is None:
+                unplaced[spec.course_id] = spec.sessions - len(placed)
+                break
+            cost, index, room = best
+            penalty += cost
+            day, start, end = slots[index]
+            used_days.add(day)
+            room_busy.add((index, room.name))
+            instructor_busy.add((index, spec.instructor_id))
+            if spec.cohort is not None:
+                cohort_busy[(index, spec.cohort)] = spec.subject_id
+            placed.append((day, start, end, room.name))
+        assignments[spec.course_id] = placed
+    return assignments, unplaced, penalty
+
+
+def to_schedule(placements):
+    """Chuyển kết quả xếp lịch sang dạng JSON của Course.schedule"""
+    return [
+        {
+            "day": day,
+            "start": format_time(start),
+            "end": format_time(end),
+            "room": room,
+        }
+        for day, start, end, room in sorted(
+            placements, key=lambda placement: (DAYS.index(placement[0]), placement[1])
+        )
+    ]
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import (
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+
+from students.models import Student
+
+from .models import SCORE_PRECISION, Course, Enrollment
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Các trạng thái đã có kết quả cuối cùng, được tính vào điểm trung bình
+GRADED_STATUSES = ["completed", "failed"]
+PASSING_SCORE = Decimal("5.0")
+
+# Quy đổi điểm chữ sang thang điểm 4
+GRADE_POINTS = {
+    "A": Decimal("4.0"),
+    "B+": Decimal("3.5"),
+    "B": Decimal("3.0"),
+    "C+": Decimal("2.5"),
+    "C": Decimal("2.0"),
+    "D": Decimal("1.0"),
+    "F": Decimal("0.0"),
+}
+
+SEMESTER_ORDER = {
+    semester: index for index, (semester, _) in enumerate(Course.SEMESTER_CHOICES)
+}
+
+
+def cache_key(student_id):
+    return f"courses:transcript:{student_id}"
+
+
+def invalidate_transcripts(student_ids):
+    cache.delete_many([cache_key(student_id) for student_id in set(student_ids)])
+
+
+def invalidate_course_transcripts(courses):
+    """Xóa cache bảng điểm của các chủng sinh đã học những lớp này"""
+    invalidate_transcripts(
+        Enrollment.objects.filter(course__in=courses).values_list(
+            "student_id", flat=True
+        )
+    )
+
+
+def _term_rows(enrollments):
+    """Tổng điểm theo tín chỉ của từng chủng sinh trong từng học kỳ (một truy vấn)"""
+    credits = F("course__subject__credits")
+    decimal = DecimalField(max_digits=12, decimal_places=4)
+    grade_points = Case(
+        *[
+            When(letter_grade=letter, then=Value(points))
+            for letter, points in GRADE_POINTS.items()
+        ],
+        default=Value(Decimal(0)),
+        output_field=decimal,
+    )
+    return (
+        enrollments.filter(status__in=GRADED_STATUSES, overall_score__isnull=False)
+        .order_by()
+        .values(
+            "student_id",
+            "course__academic_year_id",
+            "course__academic_year__name",
+            "course__academic_year__start_date",
+            "course__semester",
+        )
+        .annotate(
+            weighted_score=Sum(
+                ExpressionWrapper(F("overall_score") * credits, output_field=decimal)
+            ),
+            weighted_points=Sum(
+                ExpressionWrapper(grade_points * credits, output_field=decimal)
+            ),
+            credits_attempted=Sum(credits, output_field=IntegerField()),
+            credits_earned=Sum(
+                credits,
+                filter=Q(status="completed", overall_score__gte=PASSING_SCORE),
+                output_field=IntegerField(),
+            ),
+        )
+    )
+
+
+def _average(total, credits):
+    if not credits:
+        return None
+    return (Decimal(total) / credits).quantize(SCORE_PRECISION)
+
+
+def _summary(rows):
+    weighted_score = sum(Decimal(row["weighted_score"]) for row in rows)
+    weighted_points = sum(Decimal(row["weighted_points"]) for row in rows)
+    attempted = sum(row["credits_attempted"] for row in rows)
+    return {
+        "gpa": _average(weighted_score, attempted),
+        "gpa_4": _average(weighted_points, attempted),
+        "credits_attempted": attempted,
+        "credits_earned": sum(row["credits_earned"] or 0 for row in rows),
+    }
+
+
+def _build_transcript(rows):
+    rows = sorted(
+        rows,
+        key=lambda row: (
+            row["course__academic_year__start_date"],
+            SEMESTER_ORDER.get(row["course__semester"], len(SEMESTER_ORDER)),
+        ),
+    )
+    terms = [
+        {
+            "academic_year_id": row["course__academic_year_id"],
+            "academic_year": row["course__academic_year__name"],
+            "semester": row["course__semester"],
+            **_summary([row]),
+        }
+        for row in rows
+    ]
+    return {"terms": terms, **_summary(rows)}
+
+
+def get_transcript(student):
+    """
+    Credit-weighted GPA of one student per term and cumulative.
+
+    GPA is on the 10-point overall_score scale (`gpa`) and on the 4-point
+    letter grade scale (`gpa_4`); only completed and failed enrollments are
+    counted. Computed with one grouped query and cached until the student's
+    enrollments change.
+    """
+    student_id = getattr(student, "pk", student)
+    transcript = cache.get(cache_key(student_id))
+    if transcript is None:
+        rows = list(_term_rows(Enrollment.objects.filter(student_id=student_id)))
+        transcript = _build_transcript(rows)
+        cache.set(cache_key(student_id), transcript, CACHE_TIMEOUT)
+    return transcript
+
+
+def get_transcripts_bulk(students=None):
+    """
+    Transcripts of many students in one pass (default: all active students).
+
+    One grouped query covers every student; the results also refresh each
+    student's cache entry. Returns {student_id: transcript} with an entry,
+    empty if need be, for every requested student.
+    """
+    enrollments = Enrollment.objects.all()
+    if students is None:
+        student_ids = Student.objects.filter(status="active").values_list(
+            "pk", flat=True
+        )
+        enrollments = enrollments.filter(student__status="active")
+    else:
+        student_ids = [getattr(student, "pk", student) for student in students]
+        enrollments = enrollments.filter(student_id__in=student_ids)
+
+    rows_by_student = defaultdict(list)
+    for row in _term_rows(enrollments):
+        rows_by_student[row["student_id"]].append(row)
+
+    transcripts = {
+        student_id: _build_transcript(rows)
+        for student_id, rows in rows_by_student.items()
+    }
+    # Chủng sinh chưa có kết quả nào vẫn có bảng điểm (rỗng)
+    for student_id in student_ids:
+        transcripts.setdefault(student_id, _build_transcript([]))
+    cache.set_many(
+        {
+            cache_key(student_id): transcript
+            for student_id, transcript in transcripts.items()
+        },
+        CACHE_TIMEOUT,
+    )
+    return transcripts
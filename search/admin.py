@@ -0,0 +1,59 @@
+from django.db.models import Q
+
+from .index import search_entries
+from .registry import SEARCH_FIELDS
+
+# Tiền tố của search_fields, như trong ModelAdmin.get_search_results
+LOOKUP_PREFIXES = {"^": "istartswith", "=": "iexact"}
+
+
+def field_lookup(field):
+    if field[:1] in LOOKUP_PREFIXES:
+        return f"{field[1:]}__{LOOKUP_PREFIXES[field[0]]}"
+    return f"{field}__icontains"
+
+
+class IndexedSearchMixin:
+    """
+    Admin mixin answering the search box from the search index, so names
+    match without diacritics ("nguyen" finds "Nguyễn") and without an
+    icontains scan per field.
+
+    `indexed_search` lists (path, model label) pairs: the lookup from the
+    admin's model to an indexed model, "pk" for the model itself. Entries of
+    `search_fields` the index already covers are skipped; the others are
+    still searched with icontains, or istartswith / iexact when prefixed
+    with "^" / "=". As with the default admin search, every word of the term
+    must match somewhere.
+    """
+
+    indexed_search = ()
+
+    def _covered_by_index(self, field):
+        for path, label in self.indexed_search:
+            prefix = "" if path == "pk" else f"{path}__"
+            if (
+                field.startswith(prefix)
+                and field[len(prefix) :] in SEARCH_FIELDS[label]
+            ):
+                return True
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        words = search_term.split()
+        if not words or not self.indexed_search:
+            return super().get_search_results(request, queryset, search_term)
+
+        other_fields = [
+            field
+            for field in self.get_search_fields(request)
+            if not self._covered_by_index(field)
+        ]
+        for word in words:
+            condition = Q()
+            for path, label in self.indexed_search:
+                condition |= Q(**{f"{path}__in": search_entries(label, word)})
+            for field in other_fields:
+                condition |= Q(**{field_lookup(field): word})
+            queryset = queryset.filter(condition)
+        return queryset, False
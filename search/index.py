@@ -0,0 +1,112 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import SearchEntry
+from .registry import SEARCH_FIELDS, search_text
+from .text import normalize
+
+INDEX_BATCH_SIZE = 1000
+
+# Bộ tách trigram của FTS5 chỉ khớp được từ khóa từ 3 ký tự trở lên
+MIN_TRIGRAM_LENGTH = 3
+
+FTS_TABLE = "search_searchentry_fts"
+
+
+def get_model(model):
+    return apps.get_model(model) if isinstance(model, str) else model
+
+
+def index_objects(model, pks=None):
+    """
+    Rebuild the search entries of `model` rows (all rows when `pks` is None).
+
+    Rows are read with values_list() in primary-key chunks and written with
+    one upsert per chunk. Returns the number of rows indexed.
+    """
+    model = get_model(model)
+    content_type = ContentType.objects.get_for_model(model)
+    rows = model._default_manager.values_list(
+        "pk", *SEARCH_FIELDS[model._meta.label]
+    ).order_by("pk")
+    if pks is not None:
+        rows = rows.filter(pk__in=pks)
+
+    total, last_pk = 0, None
+    while True:
+        chunk = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        chunk = list(chunk[:INDEX_BATCH_SIZE])
+        if not chunk:
+            return total
+        SearchEntry.objects.bulk_create(
+            [
+                SearchEntry(
+                    content_type=content_type,
+                    object_id=pk,
+                    text=search_text(values, normalize),
+                )
+                for pk, *values in chunk
+            ],
+            update_conflicts=True,
+            unique_fields=["content_type", "object_id"],
+            update_fields=["text"],
+        )
+        total += len(chunk)
+        last_pk = chunk[-1][0]
+
+
+def remove_objects(model, pks):
+    SearchEntry.objects.filter(
+        content_type=ContentType.objects.get_for_model(get_model(model)),
+        object_id__in=pks,
+    ).delete()
+
+
+def search_entries(model, term):
+    """
+    Primary keys of `model` rows whose search text contains every word of
+    `term`, ignoring case and Vietnamese diacritics ("nguyen" finds
+    "Nguyễn"). Returned as a values() queryset to be used as a subquery.
+
+    PostgreSQL answers the LIKE filters from the GIN trigram index; SQLite
+    uses the FTS5 trigram table for words of three letters or more.
+    """
+    words = normalize(term).split()
+    content_type = ContentType.objects.get_for_model(get_model(model))
+    long_words = [word for word in words if len(word) >= MIN_TRIGRAM_LENGTH]
+    if connection.vendor == "sqlite" and long_words:
+        # Lọc loại đối tượng ngay trong truy vấn FTS để SQLite đi từ kết quả
+        # FTS theo khóa chính (CROSS JOIN giữ thứ tự bảng) thay vì quét mọi
+        # mục của loại đối tượng đó
+        query = " AND ".join(
+            '"{}"'.format(word.replace('"', '""')) for word in long_words
+        )
+        entries = SearchEntry.objects.filter(
+            pk__in=RawSQL(
+                f"SELECT fts.rowid FROM {FTS_TABLE} fts "
+                "CROSS JOIN search_searchentry entry ON entry.id = fts.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s AND entry.content_type_id = %s",
+                [query, content_type.pk],
+            )
+        )
+        words = [word for word in words if len(word) < MIN_TRIGRAM_LENGTH]
+    else:
+        entries = SearchEntry.objects.filter(content_type=content_type)
+    for word in words:
+        entries = entries.filter(text__contains=word)
+    return entries.values("object_id")
+
+
+def rebuild_index(labels=None):
+    """Reindex every row of the registered models; returns {label: rows}"""
+    counts = {}
+    for label in labels or SEARCH_FIELDS:
+        model = get_model(label)
+        # Xóa các mục của đối tượng đã không còn tồn tại
+        SearchEntry.objects.filter(
+            content_type=ContentType.objects.get_for_model(model)
+        ).exclude(object_id__in=model._default_manager.values("pk")).delete()
+        counts[label] = index_objects(model)
+    return counts
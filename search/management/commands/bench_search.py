@@ -0,0 +1,75 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from search.index import index_objects, search_entries
+
+User = get_user_model()
+
+FIRST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Võ", "Đặng"]
+LAST_NAMES = ["Văn Đức", "Minh Tuấn", "Quốc Bảo", "Hữu Nghĩa", "Thành Đạt", "Gia Huy"]
+
+
+class Command(BaseCommand):
+    help = (
+        "So sánh tìm kiếm qua chỉ mục với icontains trên dữ liệu tổng hợp "
+        "(mọi thay đổi được hoàn tác khi kết thúc)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--term", default="nguyen duc")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tag = uuid.uuid4().hex[:8]
+            started = time.perf_counter()
+            users = User.objects.bulk_create(
+                (
+                    User(
+                        username=f"bs-{tag}-{i}",
+                        first_name=LAST_NAMES[i % len(LAST_NAMES)],
+                        last_name=FIRST_NAMES[i % len(FIRST_NAMES)],
+                        user_type="student",
+                    )
+                    for i in range(options["rows"])
+                ),
+                batch_size=2000,
+            )
+            self.stdout.write(
+                f"Tạo {len(users)} người dùng: {time.perf_counter() - started:.2f} s"
+            )
+
+            started = time.perf_counter()
+            index_objects(User, User.objects.filter(username__startswith=f"bs-{tag}-"))
+            self.stdout.write(f"Lập chỉ mục: {time.perf_counter() - started:.2f} s")
+
+            words = options["term"].split()
+            indexed = User.objects.all()
+            scanned = User.objects.all()
+            for word in words:
+                indexed = indexed.filter(pk__in=search_entries(User, word))
+                scanned = scanned.filter(
+                    Q(username__icontains=word)
+                    | Q(first_name__icontains=word)
+                    | Q(last_name__icontains=word)
+                    | Q(email__icontains=word)
+                )
+            self._measure("Chỉ mục không dấu", indexed, options["repeat"])
+            self._measure("icontains (có dấu)", scanned, options["repeat"])
+            transaction.set_rollback(True)
+
+    def _measure(self, label, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = queryset.count()
+            timings.append(time.perf_counter() - started)
+        self.stdout.write(
+            f"{label}: {count} kết quả, tốt nhất {min(timings) * 1000:.1f} ms"
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from search.index import rebuild_index
+from search.registry import SEARCH_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Lập lại chỉ mục tìm kiếm không dấu cho các mô hình đã đăng ký"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "labels",
+            nargs="*",
+            help=f"Mô hình cần lập lại ({', '.join(SEARCH_FIELDS)}); mặc định tất cả",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["labels"]) - set(SEARCH_FIELDS)
+        if unknown:
+            raise CommandError(f"Mô hình không có trong chỉ mục: {', '.join(unknown)}")
+        for label, count in rebuild_index(options["labels"]).items():
+            self.stdout.write(f"{label}: {count}")
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+FTS_TABLE = "search_searchentry_fts"
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        text, content='search_searchentry', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER search_searchentry_ai AFTER INSERT ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER search_searchentry_ad AFTER DELETE ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER search_searchentry_au AFTER UPDATE ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_searchentry_au",
+    "DROP TRIGGER IF EXISTS search_searchentry_ad",
+    "DROP TRIGGER IF EXISTS search_searchentry_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    (
+        "CREATE INDEX IF NOT EXISTS search_searchentry_text_trgm "
+        "ON search_searchentry USING gin (text gin_trgm_ops)"
+    ),
+]
+
+POSTGRESQL_REVERSE = [
+    "DROP INDEX IF EXISTS search_searchentry_text_trgm",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_indexes(apps, schema_editor):
+    # Chỉ mục trigram phục vụ LIKE '%...%' trên PostgreSQL; SQLite dùng bảng
+    # ảo FTS5 (bộ tách trigram, cần SQLite >= 3.34) được giữ đồng bộ bằng trigger
+    _run(
+        schema_editor,
+        {
+            "postgresql": POSTGRESQL_FORWARD,
+            "sqlite": SQLITE_FORWARD,
+        },
+    )
+
+
+def drop_indexes(apps, schema_editor):
+    _run(
+        schema_editor,
+        {
+            "postgresql": POSTGRESQL_REVERSE,
+            "sqlite": SQLITE_REVERSE,
+        },
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,76 @@
+import unicodedata
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Bản chụp search.registry.SEARCH_FIELDS và search.text.normalize lúc viết
+# migration: mã hiện tại có thể đổi, còn migration phải chạy như cũ. Sửa
+# danh sách trường về sau thì chạy lại lệnh rebuild_search_index.
+SEARCH_FIELDS = {
+    "accounts.User": ["username", "first_name", "last_name", "email"],
+    "courses.Subject": ["code", "name", "english_name"],
+    "church_structure.Parish": ["name", "code", "pastor", "diocese__name"],
+    "students.StudentNote": [
+        "title",
+        "content",
+        "student__user__first_name",
+        "student__user__last_name",
+    ],
+}
+SPECIAL_LETTERS = str.maketrans({"đ": "d", "Đ": "d"})
+
+
+def normalize(value):
+    decomposed = unicodedata.normalize("NFD", str(value).translate(SPECIAL_LETTERS))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+def search_text(values):
+    return normalize(" ".join(str(value) for value in values if value))
+
+
+def index_existing_rows(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    SearchEntry = apps.get_model("search", "SearchEntry")
+
+    for label, fields in SEARCH_FIELDS.items():
+        model = apps.get_model(label)
+        content_type, _ = ContentType.objects.get_or_create(
+            app_label=model._meta.app_label, model=model._meta.model_name
+        )
+        rows = model._default_manager.values_list("pk", *fields).order_by("pk")
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not chunk:
+                break
+            SearchEntry.objects.bulk_create(
+                [
+                    SearchEntry(
+                        content_type=content_type,
+                        object_id=pk,
+                        text=search_text(values),
+                    )
+                    for pk, *values in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=["content_type", "object_id"],
+                update_fields=["text"],
+            )
+            last_pk = chunk[-1][0]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("search", "0002_search_indexes"),
+        ("accounts", "0001_initial"),
+        ("church_structure", "0001_initial"),
+        ("courses", "0006_academicyear_closed_at"),
+        ("students", "0002_student_related_names"),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
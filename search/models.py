@@ -0,0 +1,23 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    Chuỗi tìm kiếm đã chuẩn hóa (bỏ dấu, chữ thường) của một đối tượng.
+
+    Chỉ mục thật nằm ngoài mô hình: GIN trigram trên PostgreSQL và bảng ảo
+    FTS5 (search_searchentry_fts) trên SQLite, xem migration 0001.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    text = models.TextField()
+
+    class Meta:
+        unique_together = ["content_type", "object_id"]
+        verbose_name = "Mục tìm kiếm"
+        verbose_name_plural = "Mục tìm kiếm"
+
+    def __str__(self):
+        return self.text
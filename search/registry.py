@@ -0,0 +1,23 @@
+# Các trường của từng mô hình được đưa vào chuỗi tìm kiếm
+SEARCH_FIELDS = {
+    "accounts.User": ["username", "first_name", "last_name", "email"],
+    "courses.Subject": ["code", "name", "english_name"],
+    "church_structure.Parish": ["name", "code", "pastor", "diocese__name"],
+    "students.StudentNote": [
+        "title",
+        "content",
+        "student__user__first_name",
+        "student__user__last_name",
+    ],
+}
+
+# Khi một đối tượng đổi, các đối tượng dùng trường của nó cũng được lập lại
+# chỉ mục: mô hình nguồn -> [(mô hình phụ thuộc, đường dẫn tới nguồn)]
+DEPENDENTS = {
+    "church_structure.Diocese": [("church_structure.Parish", "diocese")],
+    "accounts.User": [("students.StudentNote", "student__user")],
+}
+
+
+def search_text(values, normalize):
+    return normalize(" ".join(str(value) for value in values if value))
@@ -0,0 +1,70 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .index import index_objects, remove_objects
+from .registry import DEPENDENTS, SEARCH_FIELDS
+
+
+def field_names(model, paths):
+    """Tên (và attname) các trường của `model` mà các đường dẫn đi qua"""
+    names = set()
+    for path in paths:
+        field = model._meta.get_field(path.split("__")[0])
+        names |= {field.name, field.attname}
+    return frozenset(names)
+
+
+# Trường của từng mô hình mà chuỗi tìm kiếm của nó / của mô hình phụ thuộc đọc
+INDEXED_FIELDS = {
+    label: field_names(apps.get_model(label), fields)
+    for label, fields in SEARCH_FIELDS.items()
+}
+DEPENDENT_FIELDS = {
+    label: field_names(
+        apps.get_model(label),
+        [
+            field[len(path) + 2 :]
+            for dependent, path in dependents
+            for field in SEARCH_FIELDS[dependent]
+            if field.startswith(f"{path}__")
+        ],
+    )
+    for label, dependents in DEPENDENTS.items()
+}
+
+
+def touches(update_fields, fields):
+    # Lưu một phần (ví dụ last_login khi đăng nhập) không đổi chuỗi tìm kiếm
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+def update_search_entry(sender, instance, update_fields=None, **kwargs):
+    if touches(update_fields, INDEXED_FIELDS[sender._meta.label]):
+        index_objects(sender, [instance.pk])
+
+
+def remove_search_entry(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+def update_dependent_entries(sender, instance, update_fields=None, **kwargs):
+    if not touches(update_fields, DEPENDENT_FIELDS[sender._meta.label]):
+        return
+    for label, path in DEPENDENTS[sender._meta.label]:
+        model = apps.get_model(label)
+        index_objects(model, model._default_manager.filter(**{path: instance}))
+
+
+for label in SEARCH_FIELDS:
+    model = apps.get_model(label)
+    post_save.connect(update_search_entry, sender=model, dispatch_uid=f"search:{label}")
+    post_delete.connect(
+        remove_search_entry, sender=model, dispatch_uid=f"search:{label}"
+    )
+
+for label in DEPENDENTS:
+    post_save.connect(
+        update_dependent_entries,
+        sender=apps.get_model(label),
+        dispatch_uid=f"search:dependents:{label}",
+    )
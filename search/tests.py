@@ -0,0 +1,62 @@
+from django.contrib import admin
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from students.models import Student, StudentNote
+
+from .models import SearchEntry
+
+
+def entry_text(obj):
+    return SearchEntry.objects.get(
+        content_type__model=obj._meta.model_name, object_id=obj.pk
+    ).text
+
+
+class SearchSignalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "cs1", password="x", last_name="Nguyễn", user_type="student"
+        )
+        self.note = StudentNote.objects.create(
+            student=Student.objects.create(
+                user=self.user, entry_year=2024, current_year=1
+            ),
+            created_by=self.user,
+            note_type="academic",
+            title="Ghi chú",
+            content="",
+        )
+
+    def test_login_does_not_reindex(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.client.login(username="cs1", password="x"))
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertFalse(any("search_searchentry" in query["sql"] for query in queries))
+
+    def test_saving_indexed_fields_reindexes_the_user_and_notes(self):
+        self.user.last_name = "Trần"
+        self.user.save(update_fields=["last_name"])
+        self.assertIn("tran", entry_text(self.user))
+        self.assertIn("tran", entry_text(self.note))
+
+
+class IndexedSearchMixinTests(TestCase):
+    def test_search_ignores_diacritics(self):
+        nguyen = User.objects.create(
+            username="gv1", last_name="Nguyễn", user_type="teacher"
+        )
+        User.objects.create(username="gv2", last_name="Ngô", user_type="teacher")
+        model_admin = admin.site._registry[User]
+        request = RequestFactory().get("/")
+
+        for term in ["nguyen", "NGUYỄN", "ngu gv1"]:
+            with self.subTest(term):
+                queryset, may_have_duplicates = model_admin.get_search_results(
+                    request, User.objects.all(), term
+                )
+                self.assertEqual(list(queryset), [nguyen])
+                self.assertFalse(may_have_duplicates)
@@ -0,0 +1,11 @@
+import unicodedata
+
+# Chữ không tách được dấu bằng NFD
+SPECIAL_LETTERS = str.maketrans({"đ": "d", "Đ": "d"})
+
+
+def normalize(value):
+    """Bỏ dấu tiếng Việt, chuyển chữ thường và gộp khoảng trắng"""
+    decomposed = unicodedata.normalize("NFD", str(value).translate(SPECIAL_LETTERS))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
@@ -0,0 +1,76 @@
+from typing import ClassVar
+
+from django.contrib import admin
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, outer_field):
+    """Count rows of `queryset` whose `outer_field` points at the outer row"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{outer_field: OuterRef("pk")})
+            .order_by()
+            .values(outer_field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class StrSelectRelatedMixin:
+    """
+    Admin and inline mixin that loads the relations __str__ needs.
+
+    `str_select_related` lists the joins the model's own __str__ follows;
+    they are added to every admin query, including autocomplete lookups
+    (which ignore list_select_related) and inline rows. Widgets of
+    `autocomplete_fields` only load the selected objects, and these are
+    loaded with the target admin's `str_select_related` as well, so no
+    form runs one extra query per widget.
+    """
+
+    str_select_related = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.str_select_related:
+            # ChangeList bỏ qua list_select_related khi truy vấn đã có
+            # select_related, nên gộp cả hai vào đây
+            list_joins = getattr(self, "list_select_related", ())
+            queryset = queryset.select_related(
+                *self.str_select_related,
+                *(list_joins if isinstance(list_joins, (list, tuple)) else ()),
+            )
+        return queryset
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if "queryset" not in kwargs and db_field.name in self.get_autocomplete_fields(
+            request
+        ):
+            model = db_field.remote_field.model
+            related_admin = self.admin_site._registry.get(model)
+            joins = getattr(related_admin, "str_select_related", ())
+            if joins:
+                kwargs["queryset"] = model._default_manager.select_related(*joins)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class AnnotatedModelAdmin(StrSelectRelatedMixin, admin.ModelAdmin):
+    """
+    Base admin for changelists that run a constant number of queries.
+
+    Subclasses declare per-row counts in `list_annotations` (name ->
+    expression, added to the changelist query) and the joins that
+    list_display and __str__ need in `list_select_related`, instead of
+    calling count properties or following relations row by row.
+    """
+
+    list_annotations: ClassVar[dict] = {}
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.list_annotations:
+            queryset = queryset.annotate(**self.list_annotations)
+        return queryset
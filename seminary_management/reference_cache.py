@@ -0,0 +1,83 @@
+import threading
+import time
+import uuid
+from typing import ClassVar
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Số giây giữa hai lần hỏi phiên bản trong cache chung
+CHECK_INTERVAL = 5.0
+
+
+class ReferenceCache:
+    """
+    Reference data (academic years, subjects, church hierarchy) kept in the
+    memory of each worker process.
+
+    A version token lives in the shared Django cache. Saves and deletes
+    replace it (see invalidate()), and every worker compares its own copy
+    with the token at most once per `check_interval` seconds, reloading
+    lazily on the next access when it has changed. The cached objects are
+    shared between requests and must not be modified.
+    """
+
+    registry: ClassVar[dict] = {}
+
+    def __init__(self, name, loader, check_interval=CHECK_INTERVAL):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval
+        self.version_key = f"reference:{name}:version"
+        self.hits = 0
+        self.misses = 0
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # Khóa riêng cho bộ đếm: lượt trúng không phải chờ lúc đang tải lại
+        self._stats_lock = threading.Lock()
+        ReferenceCache.registry[name] = self
+
+    def get(self):
+        now = time.monotonic()
+        data = self._data
+        if data is not None and now - self._checked_at < self.check_interval:
+            self._count(hit=True)
+            return data
+
+        # Token ngẫu nhiên: khóa bị xóa khỏi cache cũng buộc các worker tải lại
+        version = cache.get_or_set(self.version_key, uuid.uuid4().hex, None)
+        with self._lock:
+            hit = self._data is not None and self._version == version
+            if not hit:
+                self._data = self.loader()
+                self._version = version
+            self._count(hit)
+            self._checked_at = now
+            return self._data
+
+    def invalidate(self):
+        """Đổi phiên bản sau khi giao dịch hiện tại commit"""
+
+        def bump():
+            cache.set(self.version_key, uuid.uuid4().hex, None)
+            self._data = None
+
+        transaction.on_commit(bump)
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def reference_cache_stats():
+    """Số lần trúng/trượt của mọi bộ đệm tham chiếu trong tiến trình này"""
+    return {name: ref.stats() for name, ref in ReferenceCache.registry.items()}
@@ -56,6 +56,7 @@ INSTALLED_APPS = [
     'courses',
     'students',
     'teachers',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -65,6 +66,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -99,6 +101,23 @@ db_config.update({'DISABLE_SERVER_SIDE_CURSORS': True})
 DATABASES = {'default': db_config}
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Redis is shared by every gunicorn worker; without it each process keeps its
+# own local-memory cache and version keys are not seen by other workers.
+
+REDIS_URL = get_config('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -148,9 +167,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # WhiteNoise
 # https://whitenoise.readthedocs.io/en/stable/django.html
 STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     }
 }
 
 AUTH_USER_MODEL = 'accounts.User'
+
+# The session user is loaded with its role profile and church hierarchy in one
+# query. ModelBackend stays listed for sessions that were created with it.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Seconds to keep session users in the cache (0 disables it); entries are
+# dropped when the user or their profile is saved
+USER_CACHE_TIMEOUT = int(get_config('USER_CACHE_TIMEOUT', 0))
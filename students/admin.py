@@ -1,7 +1,10 @@
 from django import forms
 from django.contrib import admin
 
-from accounts.admin import BaseUserCreationForm, BaseProfileAdmin
+from accounts.admin import BaseProfileAdmin, BaseUserCreationForm
+from courses.transcripts import get_transcript
+from search.admin import IndexedSearchMixin
+from seminary_management.admin_base import StrSelectRelatedMixin
 
 from .models import Student, StudentNote
 
@@ -32,9 +35,10 @@ class StudentCreationForm(BaseUserCreationForm):
         return student
 
 
-class StudentNoteInline(admin.TabularInline):
+class StudentNoteInline(StrSelectRelatedMixin, admin.TabularInline):
     model = StudentNote
     extra = 0
+    str_select_related = ("student__user", "created_by")
     fields = ("note_type", "title", "content", "is_private", "created_by")
     readonly_fields = ("created_by", "created_at")
 
@@ -45,7 +49,7 @@ class StudentNoteInline(admin.TabularInline):
 
 
 @admin.register(Student)
-class StudentAdmin(BaseProfileAdmin):
+class StudentAdmin(IndexedSearchMixin, BaseProfileAdmin):
     creation_form_class = StudentCreationForm
 
     list_display = (
@@ -64,12 +68,18 @@ class StudentAdmin(BaseProfileAdmin):
         "user__email",
         "hometown",
     )
+    indexed_search = (("user", "accounts.User"),)
+    autocomplete_fields = ("user", "parish", "community")
     ordering = ("user__username",)
+    list_select_related = ("user", "parish__diocese")
     inlines = [StudentNoteInline]
 
     fieldsets = (
         ("Thông tin người dùng", {"fields": ("user", "hometown")}),
-        ("Thông tin cơ bản", {"fields": ("entry_year", "current_year", "status")}),
+        (
+            "Thông tin cơ bản",
+            {"fields": ("entry_year", "current_year", "status", "get_gpa")},
+        ),
         (
             "Thông tin tâm linh",
             {
@@ -84,7 +94,7 @@ class StudentAdmin(BaseProfileAdmin):
         ),
     )
 
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("created_at", "updated_at", "get_gpa")
 
     def get_fieldsets(self, request, obj=None):
         if obj is None:  # Adding new student
@@ -126,9 +136,21 @@ class StudentAdmin(BaseProfileAdmin):
     def get_user_id(self, obj):
         return super().get_user_id(obj)
 
+    @admin.display(description="Điểm trung bình tích lũy")
+    def get_gpa(self, obj):
+        transcript = get_transcript(obj)
+        if transcript["gpa"] is None:
+            return "-"
+        return (
+            f"{transcript['gpa']} (hệ 4: {transcript['gpa_4']}, "
+            f"{transcript['credits_earned']}/{transcript['credits_attempted']} tín chỉ)"
+        )
+
 
 @admin.register(StudentNote)
-class StudentNoteAdmin(admin.ModelAdmin):
+class StudentNoteAdmin(
+    IndexedSearchMixin, StrSelectRelatedMixin, admin.ModelAdmin
+):
     list_display = (
         "title",
         "get_student_name",
@@ -144,7 +166,11 @@ class StudentNoteAdmin(admin.ModelAdmin):
         "student__user__first_name",
         "student__user__last_name",
     )
+    indexed_search = (("pk", "students.StudentNote"),)
+    autocomplete_fields = ("student",)
+    str_select_related = ("student__user",)
     ordering = ("-created_at",)
+    list_select_related = ("student__user", "created_by")
 
     fieldsets = (
         (
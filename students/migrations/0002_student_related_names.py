@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('church_structure', '0001_initial'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='community',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='students', to='church_structure.community', verbose_name='Giáo họ'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='parish',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='students', to='church_structure.parish', verbose_name='Giáo xứ'),
+        ),
+    ]
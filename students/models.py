@@ -35,8 +35,8 @@ class Student(models.Model):
     baptism_name = models.CharField(max_length=100, blank=True, verbose_name='Tên thánh')
     baptism_date = models.DateField(null=True, blank=True, verbose_name='Ngày Rửa Tội')
     confirmation_date = models.DateField(null=True, blank=True, verbose_name='Ngày Thêm Sức')
-    parish = models.ForeignKey(Parish, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Giáo xứ')
-    community = models.ForeignKey(Community, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Giáo họ')
+    parish = models.ForeignKey(Parish, on_delete=models.SET_NULL, null=True, blank=True, related_name='students', verbose_name='Giáo xứ')
+    community = models.ForeignKey(Community, on_delete=models.SET_NULL, null=True, blank=True, related_name='students', verbose_name='Giáo họ')
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -11,9 +11,9 @@ def student_profile_view(request):
     """
     Display the student's profile information.
     """
-    try:
-        student_profile = request.user.student_profile
-    except Student.DoesNotExist:
+    # request.profile: hồ sơ đã nạp cùng người dùng (ProfileMiddleware)
+    student_profile = request.profile
+    if not isinstance(student_profile, Student):
         # Handle cases where a user might not have a student profile
         # This could be an admin or other user type.
         messages.error(request, "You do not have a student profile.")
@@ -29,9 +29,8 @@ def student_profile_update_view(request):
     """
     Allow a student to update their own profile information.
     """
-    try:
-        student_profile = request.user.student_profile
-    except Student.DoesNotExist:
+    student_profile = request.profile
+    if not isinstance(student_profile, Student):
         messages.error(request, "Student profile not found.")
         return redirect("home")  # Or some other appropriate URL
 
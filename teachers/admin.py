@@ -2,6 +2,7 @@ from django import forms
 from django.contrib import admin
 
 from accounts.admin import BaseUserCreationForm, BaseProfileAdmin
+from search.admin import IndexedSearchMixin
 
 from .models import Teacher
 
@@ -31,7 +32,7 @@ class TeacherCreationForm(BaseUserCreationForm):
 
 
 @admin.register(Teacher)
-class TeacherAdmin(BaseProfileAdmin):
+class TeacherAdmin(IndexedSearchMixin, BaseProfileAdmin):
     creation_form_class = TeacherCreationForm
 
     list_display = (
@@ -49,6 +50,8 @@ class TeacherAdmin(BaseProfileAdmin):
         "user__email",
         "specialization",
     )
+    indexed_search = (("user", "accounts.User"),)
+    autocomplete_fields = ("user",)
     ordering = ("user__username",)
 
     fieldsets = (
@@ -11,9 +11,9 @@ def teacher_profile_view(request):
     """
     Display the teacher's profile information.
     """
-    try:
-        teacher_profile = request.user.teacher_profile
-    except Teacher.DoesNotExist:
+    # request.profile: hồ sơ đã nạp cùng người dùng (ProfileMiddleware)
+    teacher_profile = request.profile
+    if not isinstance(teacher_profile, Teacher):
         messages.error(request, "You do not have a teacher profile.")
         return redirect("home")
 
@@ -27,9 +27,8 @@ def teacher_profile_update_view(request):
     """
     Allow a teacher to update their own profile information.
     """
-    try:
-        teacher_profile = request.user.teacher_profile
-    except Teacher.DoesNotExist:
+    teacher_profile = request.profile
+    if not isinstance(teacher_profile, Teacher):
         messages.error(request, "Teacher profile not found.")
         return redirect("home")
 